@@ -0,0 +1,269 @@
+"""
+Admission control and load shedding
+===================================
+Every request that reaches a handler is admitted by its endpoint class:
+
+    heavy    batch analysis (/analyze-cars/, /ai/analyze, /cars/compare-*)
+    bulk     job submission (POST /jobs/analyze-cars), whose upload can
+             stream for minutes
+    light    everything else (/cars/top-deals, /jobs/{id} status and
+             results, ...)
+    exempt   /health*, /metrics, docs, /debug/profiles/ (never queued)
+
+Each class runs at most N requests at once (per worker process). Extra
+requests wait in a FIFO queue of bounded depth:
+
+- queue full                         -> 429 Too Many Requests
+- not admitted before its deadline   -> 503 Service Unavailable
+
+Both come back immediately with `Retry-After` (seconds, estimated from
+the class's recent service time and queue length). The deadline is the
+class timeout, or less when the client sends `X-Request-Timeout:
+<seconds>`. It bounds the time spent waiting for a slot; an admitted
+request runs to completion.
+
+Configured through ADMISSION_ENABLED (default 1) and, per class,
+ADMISSION_<CLASS>_CONCURRENCY / _QUEUE / _TIMEOUT. Queue wait shows up
+in /metrics as car_api_admission_queue_wait_seconds{endpoint_class} and
+as the "queue" stage of the request.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.metrics import ADMISSION_QUEUE_WAIT, ADMISSION_REJECTIONS, REGISTRY, record_queue_wait
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1").lower() in ("1", "true", "yes")
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+# (path prefix, endpoint class); first match wins, None = exempt
+DEFAULT_RULES: List[Tuple[str, Optional[str]]] = [
+    ("/health", None),
+    ("/metrics", None),
+    ("/docs", None),
+    ("/redoc", None),
+    ("/openapi.json", None),
+    ("/debug/profiles/", None),
+    ("/analyze-cars/", "heavy"),
+    ("/ai/analyze", "heavy"),
+    ("/cars/compare-", "heavy"),
+    # Job ids never start with a letter, so only submission matches here
+    ("/jobs/analyze-cars", "bulk"),
+    ("/", "light"),
+]
+
+# name -> (max concurrent, max queued, timeout seconds)
+DEFAULT_LIMITS = {
+    "heavy": (2, 16, 30.0),
+    "bulk": (2, 8, 30.0),
+    "light": (32, 256, 5.0),
+}
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+# =========================
+# ENDPOINT CLASSES
+# =========================
+class EndpointClass:
+    """
+    Concurrency limit + bounded FIFO queue for one class of endpoints.
+    Used from the event loop only.
+
+    Usage:
+        heavy = EndpointClass("heavy", max_concurrency=2, max_queue=16, timeout=30)
+        waited = await heavy.acquire(deadline=time.monotonic() + 5)   # or Rejected
+        try:
+            ...
+        finally:
+            heavy.release(service_seconds)
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, timeout: float):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+
+        self.active = 0
+        self._waiters: deque = deque()
+        # Moving average of admitted requests' run time, for Retry-After
+        self.service_seconds = 0.1
+
+    @classmethod
+    def from_env(cls, name: str, defaults: Tuple[int, int, float]) -> "EndpointClass":
+        prefix = f"ADMISSION_{name.upper()}_"
+        concurrency, queue, timeout = defaults
+        return cls(
+            name,
+            max_concurrency=int(os.getenv(prefix + "CONCURRENCY", concurrency)),
+            max_queue=int(os.getenv(prefix + "QUEUE", queue)),
+            timeout=float(os.getenv(prefix + "TIMEOUT", timeout)),
+        )
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot"""
+        rounds = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(rounds * self.service_seconds))
+
+    async def acquire(self, deadline: float) -> float:
+        """Wait for a slot until `deadline` (time.monotonic()); seconds waited"""
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTIONS.inc(self.name, "queue_full")
+            raise Rejected(429, f"Too many {self.name} requests queued", self.retry_after())
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # wait() doesn't cancel the waiter on timeout
+            await asyncio.wait([waiter], timeout=max(0.0, deadline - started))
+        except asyncio.CancelledError:
+            # Client went away while queued
+            self._abandon(waiter)
+            raise
+
+        if not waiter.done():
+            self._abandon(waiter)
+            ADMISSION_REJECTIONS.inc(self.name, "deadline")
+            raise Rejected(503, f"Request deadline passed while waiting for a {self.name} slot",
+                           self.retry_after())
+
+        # release() handed its slot over to this request
+        return time.monotonic() - started
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # Got the slot just as it gave up: pass it on
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * service_seconds
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Slot passes straight to the next waiter (active unchanged)
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout,
+            "service_seconds": round(self.service_seconds, 4),
+        }
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+class AdmissionMiddleware:
+    """Pure ASGI middleware admitting requests by endpoint class"""
+
+    def __init__(self, app, classes: Optional[Dict[str, EndpointClass]] = None,
+                 rules: Optional[List[Tuple[str, Optional[str]]]] = None):
+        self.app = app
+        self.classes = classes if classes is not None else ENDPOINT_CLASSES
+        self.rules = rules if rules is not None else DEFAULT_RULES
+
+    def classify(self, path: str) -> Optional[EndpointClass]:
+        for prefix, name in self.rules:
+            if path.startswith(prefix):
+                return self.classes.get(name) if name is not None else None
+        return None
+
+    @staticmethod
+    def _deadline(scope, endpoint_class: EndpointClass) -> float:
+        timeout = endpoint_class.timeout
+        for name, value in scope.get("headers", ()):
+            if name == TIMEOUT_HEADER:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested >= 0:
+                    timeout = min(timeout, requested)
+                break
+        return time.monotonic() + timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        endpoint_class = self.classify(scope["path"])
+        if endpoint_class is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            waited = await endpoint_class.acquire(self._deadline(scope, endpoint_class))
+        except Rejected as e:
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        ADMISSION_QUEUE_WAIT.observe(waited, endpoint_class.name)
+        record_queue_wait(waited)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpoint_class.release(time.perf_counter() - started)
+
+
+ENDPOINT_CLASSES: Dict[str, EndpointClass] = {
+    name: EndpointClass.from_env(name, limits) for name, limits in DEFAULT_LIMITS.items()
+}
+
+
+def admission_status() -> dict:
+    return {"enabled": ADMISSION_ENABLED,
+            "classes": {name: c.status() for name, c in ENDPOINT_CLASSES.items()}}
+
+
+REGISTRY.gauge_callback(
+    "car_api_admission_active", "Requests running per endpoint class",
+    lambda: {(name,): c.active for name, c in ENDPOINT_CLASSES.items()},
+    ("endpoint_class",),
+)
+REGISTRY.gauge_callback(
+    "car_api_admission_queued", "Requests waiting for a slot per endpoint class",
+    lambda: {(name,): c.queued for name, c in ENDPOINT_CLASSES.items()},
+    ("endpoint_class",),
+)
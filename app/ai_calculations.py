@@ -4,14 +4,24 @@
 import os
 import json
 from datetime import datetime
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 # =========================
 # THIRD-PARTY LIBRARIES
 # =========================
-import joblib
 from dotenv import load_dotenv
-import numpy as np
+
+from app.metrics import MODEL_LOADS, REGISTRY, stage
+from app.model_registry import COMPILED_MAX_ROWS, LiveModel, LoadedModel
+from app.parsing import parse_many, parse_mileage, parse_price, parse_year
+from app.prediction_cache import PredictionCache
+from app.shadow import ShadowEvaluator
+from app.singleflight import SingleFlight
+
+# The model stack (joblib / numpy / sklearn) loads on first prediction
+if TYPE_CHECKING:
+    from app.model_bundle import ModelBundle
+    from app.tree_ensemble import CompiledEnsemble
 
 # =========================
 # ENVIRONMENT & CONFIGURATION
@@ -25,6 +35,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "cars_data.json")
 ML_MODEL_PATH = os.path.join(BASE_DIR, "data", "ml_models", "ml_model.joblib")
+COMPILED_MODEL_DIR = os.path.join(BASE_DIR, "data", "ml_models", "ml_model_compiled")
 
 # =========================
 # BRAND GROUPS
@@ -70,31 +81,56 @@ def normalize_scraped_car(scraped_car: dict) -> dict:
     Converts raw scraper output.json car
     into clean numeric format used by profit engine.
     """
+    history = scraped_car.get("Vehicle_History", {})
+    raw_price = scraped_car.get("price")
+    raw_mileage = history.get("Mileage")
+
+    return _clean_record(
+        scraped_car,
+        # Price: "€ 3,950" -> 3950
+        price_numeric=_required_number("price", raw_price, parse_price(raw_price)),
+        # Mileage: "239,000 km" -> 239000
+        mileage_numeric=_required_number("Mileage", raw_mileage, parse_mileage(raw_mileage)),
+        # Year: "11/2015" -> 2015
+        year_numeric=parse_year(history.get("First_registration")),
+    )
 
-    title = scraped_car.get("car_title", "")
-    brand = title.split(" ")[0] if title else ""
 
-    # Price: "€ 3,950" -> 3950
-    price_numeric = 0
-    raw_price = scraped_car.get("price", "")
-    if raw_price:
-        price_numeric = int(
-            raw_price.replace("€", "").replace(",", "").strip()
+def normalize_scraped_cars(scraped_cars: List[dict]) -> List[dict]:
+    """
+    normalize_scraped_car over a batch: each field is parsed as a column,
+    so repeated strings (registration dates, prices) are parsed once.
+    """
+    histories = [car.get("Vehicle_History", {}) for car in scraped_cars]
+    prices = parse_many((car.get("price") for car in scraped_cars), "price")
+    mileages = parse_many((h.get("Mileage") for h in histories), "mileage")
+    years = parse_many((h.get("First_registration") for h in histories), "year")
+
+    return [
+        _clean_record(
+            car,
+            price_numeric=_required_number("price", car.get("price"), price),
+            mileage_numeric=_required_number("Mileage", history.get("Mileage"), mileage),
+            year_numeric=year,
         )
+        for car, history, price, mileage, year
+        in zip(scraped_cars, histories, prices, mileages, years)
+    ]
 
-    # Mileage: "239,000 km" -> 239000
-    mileage_numeric = 0
-    raw_mileage = scraped_car.get("Vehicle_History", {}).get("Mileage", "")
-    if raw_mileage:
-        mileage_numeric = int(
-            raw_mileage.replace("km", "").replace(",", "").strip()
-        )
 
-    # Year: "11/2015" -> 2015
-    year_numeric = None
-    raw_year = scraped_car.get("Vehicle_History", {}).get("First_registration", "")
-    if raw_year and "/" in raw_year:
-        year_numeric = int(raw_year.split("/")[-1])
+def _required_number(field: str, raw, parsed: Optional[int]) -> int:
+    """Missing / empty counts as 0; a value that can't be read is an error"""
+    if parsed is not None:
+        return parsed
+    if not raw:
+        return 0
+    raise ValueError(f"unreadable {field}: {raw!r}")
+
+
+def _clean_record(scraped_car: dict, price_numeric: int, mileage_numeric: int,
+                  year_numeric: Optional[int]) -> dict:
+    title = scraped_car.get("car_title", "")
+    brand = title.split(" ")[0] if title else ""
 
     fuel_type = scraped_car.get("Energy_Consumption", {}).get("Fuel_type")
     transmission = scraped_car.get("Technical_Data", {}).get("Gearbox")
@@ -236,26 +272,143 @@ def calculate_profit_and_recommendation(car_data: dict) -> dict:
 # =========================
 # ML PRICE PREDICTION
 # =========================
-def predict_car_price_ml(car_data: dict) -> float:
-    if not os.path.exists(ML_MODEL_PATH):
+# Loaded bundle, reused until the artifact on disk changes
+_model_cache = {"key": None, "bundle": None}
+
+# Threads that find the same stale artifact share one load
+model_flight = SingleFlight("model")
+
+
+def load_price_model(path: str = ML_MODEL_PATH) -> "ModelBundle":
+    from app.model_bundle import ModelBundle
+
+    if not os.path.exists(path):
         raise FileNotFoundError("ML model not found")
 
-    model = joblib.load(ML_MODEL_PATH)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
 
-    current_year = datetime.now().year
-    year = safe_int(car_data.get("year_numeric"), current_year)
-    age = max(1, current_year - year)
+    if _model_cache["key"] != key:
+        def load() -> "ModelBundle":
+            bundle = ModelBundle.load(path)
+            _model_cache["bundle"] = bundle
+            _model_cache["key"] = key
+            MODEL_LOADS.inc("bundle", "ok")
+            return bundle
 
-    mileage = safe_float(car_data.get("mileage_numeric"), 0)
-    mileage_per_year = mileage / age
+        return model_flight.do(("bundle", key), load)
+
+    return _model_cache["bundle"]
+
+
+_compiled_cache = {"key": None, "ensemble": None}
+
+
+def load_compiled_model(path: str = COMPILED_MODEL_DIR) -> Optional["CompiledEnsemble"]:
+    """Memory-mapped flattened ensemble, or None if not exported"""
+    from app.tree_ensemble import POINTER_NAME, CompiledEnsemble
+
+    # Each export atomically replaces current.json (flat exports: meta.json)
+    marker_path = os.path.join(path, POINTER_NAME)
+    if not os.path.exists(marker_path):
+        marker_path = os.path.join(path, "meta.json")
+        if not os.path.exists(marker_path):
+            return None
+
+    st = os.stat(marker_path)
+    key = (path, st.st_mtime_ns, st.st_ino)
+
+    if _compiled_cache["key"] != key:
+        def load() -> "CompiledEnsemble":
+            ensemble = CompiledEnsemble.load(path, mmap=True)
+            _compiled_cache["ensemble"] = ensemble
+            _compiled_cache["key"] = key
+            MODEL_LOADS.inc("compiled", "ok")
+            return ensemble
+
+        return model_flight.do(("compiled", key), load)
+
+    return _compiled_cache["ensemble"]
+
+
+# Model served from the registry (data/ml_models/registry); when nothing
+# is published there yet, the plain ML_MODEL_PATH artifact is used
+live_model = LiveModel()
+
+# Predictions keyed by encoded feature tuple; cleared when the model changes
+prediction_cache = PredictionCache()
 
-    brand_encoded = hash(car_data.get("brand", "unknown")) % 100
-    fuel_encoded = hash(car_data.get("fuel_type", "unknown")) % 10
+REGISTRY.gauge_callback(
+    "car_api_prediction_cache_lookups_total", "ML prediction cache lookups by result",
+    lambda: {("hit",): prediction_cache.hits, ("miss",): prediction_cache.misses},
+    ("result",), type_name="counter",
+)
+REGISTRY.gauge_callback(
+    "car_api_prediction_cache_hit_ratio", "ML prediction cache hit ratio since start",
+    lambda: {(): prediction_cache.stats()["hit_rate"]},
+)
+REGISTRY.gauge_callback(
+    "car_api_model_swaps_total", "Registry model versions swapped in",
+    lambda: {(): live_model.swaps}, type_name="counter",
+)
 
-    X = np.array([[brand_encoded, age, mileage, fuel_encoded, mileage_per_year]])
-    predicted = model.predict(X)[0]
 
-    return round(max(0, predicted), 2)
+_legacy_model = {"model": None}
+
+
+def _serving_model() -> LoadedModel:
+    """Registry model, or the plain ML_MODEL_PATH artifact"""
+    loaded = live_model.current()
+    if loaded is not None:
+        return loaded
+
+    bundle = load_price_model()
+    compiled = load_compiled_model()
+    if compiled is not None and compiled.version != bundle.version:
+        compiled = None
+
+    model = _legacy_model["model"]
+    if model is None or model.bundle is not bundle or model.compiled is not compiled:
+        model = _legacy_model["model"] = LoadedModel(bundle, compiled)
+    return model
+
+
+# Candidate model scored off the request path (SHADOW_MODEL_VERSION)
+shadow = ShadowEvaluator(_serving_model)
+
+
+def predict_car_prices_ml(cars: List[dict]) -> List[float]:
+    """
+    Batch price prediction: one feature matrix, one model call for the
+    rows not already in the prediction cache.
+    """
+    from app.model_bundle import records_to_columns
+
+    model = _serving_model()
+    bundle = model.bundle
+    prediction_cache.ensure_version(bundle.version)
+
+    columns = prediction_cache.quantize_columns(records_to_columns(cars, bundle.input_columns))
+    X = bundle.transform(columns)
+    if not len(X):
+        return []
+
+    keys = [tuple(row) for row in X.tolist()]
+    predicted = prediction_cache.get_many(keys, bundle.version)
+    missing = [i for i, p in enumerate(predicted) if p is None]
+
+    if missing:
+        fresh = model.predict_features(X[missing])
+        for i, p in zip(missing, fresh):
+            predicted[i] = p
+        prediction_cache.put_many([keys[i] for i in missing], fresh, bundle.version)
+
+    shadow.submit(cars)
+    return [round(p, 2) for p in predicted]
+
+
+def predict_car_price_ml(car_data: dict) -> float:
+    return predict_car_prices_ml([car_data])[0]
 
 
 # =========================
@@ -320,6 +473,67 @@ def compare_cars(cars: List[dict]) -> dict:
     }
 
 
+def analyze_raw_batch(
+    raw_cars: List[dict],
+    errors: Optional[List[dict]] = None,
+    indices: Optional[List[int]] = None,
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Normalize + analyze raw scraped cars exactly like /analyze-cars/
+    (negative profit reported as 0 / NO_PROFIT).
+    Returns (results, normalized cars).
+
+    Fail-fast by default. With an `errors` list, a car that fails is
+    skipped and recorded there as {"index", "stage", "error"} while the
+    rest of the batch completes; `indices`, if given, gets the input
+    index of each result.
+    """
+    if errors is None:
+        with stage("normalize"):
+            clean_cars = normalize_scraped_cars(raw_cars)
+        with stage("analyze"):
+            results = [_analyze_clean_car(clean_car) for clean_car in clean_cars]
+        return results, clean_cars
+
+    normalized = []
+    with stage("normalize"):
+        for index, raw_car in enumerate(raw_cars):
+            try:
+                normalized.append((index, normalize_scraped_car(raw_car)))
+            except Exception as e:
+                errors.append(item_error(index, "normalize", e))
+
+    results, clean_cars = [], []
+    with stage("analyze"):
+        for index, clean_car in normalized:
+            try:
+                results.append(_analyze_clean_car(clean_car))
+            except Exception as e:
+                errors.append(item_error(index, "analyze", e))
+                continue
+            clean_cars.append(clean_car)
+            if indices is not None:
+                indices.append(index)
+
+    errors.sort(key=lambda error: error["index"])
+    return results, clean_cars
+
+
+def _analyze_clean_car(clean_car: dict) -> dict:
+    analysis = calculate_profit_and_recommendation(clean_car)
+
+    # Production safety guard
+    if analysis["profit"] < 0:
+        analysis["profit"] = 0
+        analysis["profit_label"] = "NO_PROFIT"
+
+    return {**clean_car, **analysis}
+
+
+def item_error(index: int, stage_name: str, error: Exception) -> dict:
+    return {"index": index, "stage": stage_name, "error": f"{type(error).__name__}: {error}"}
+
+
 # =========================
 # AI SUGGESTION (PLACEHOLDER)
 # =========================
@@ -332,13 +546,22 @@ async def get_ai_suggestion(prompt: str, budget: Optional[float] = None) -> str:
 # =========================
 __all__ = [
     "normalize_scraped_car",
+    "normalize_scraped_cars",
     "load_car_data",
     "predict_car_price_ml",
+    "predict_car_prices_ml",
+    "load_price_model",
+    "load_compiled_model",
+    "prediction_cache",
+    "live_model",
+    "shadow",
     "estimate_market_value",
     "calculate_profit_and_recommendation",
     "calculate_risk_score",
     "rank_cars_by_investment_quality",
     "analyze_multiple_cars",
+    "analyze_raw_batch",
+    "item_error",
     "compare_cars",
     "get_ai_suggestion",
 ]
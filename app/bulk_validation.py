@@ -0,0 +1,227 @@
+"""
+Bulk request validation into columns
+====================================
+`List[CarInput]` request bodies normally become one pydantic object per
+car, which are then model_dump()-ed back into dicts. For large batches
+that costs more than the analysis. BulkValidator checks the list items
+directly against the item model's constraints (types, ge / le bounds,
+extra="forbid") and returns one list per field:
+
+    validator = BulkValidator(InvestmentCompareRequest, "cars")
+    payload, columns = validator.validate(body)    # RequestValidationError on bad input
+    for car in validator.rows(columns):            # dicts as model_dump() builds them
+        ...
+
+Items in the exact shape the API documents take the fast path. Anything
+else (a constraint violation, a value pydantic would coerce such as
+"2020" for an int, a non-dict item) sends the whole body through the
+regular pydantic validation, so accepted values and 422 error bodies,
+including the offending item's index in `loc`, stay exactly what
+FastAPI produced before.
+"""
+
+import copy
+import math
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import annotated_types
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+class _Missing:
+    """Marks a required field the item doesn't have"""
+
+
+_MISSING = _Missing()
+NoneType = type(None)
+
+_KINDS = {float: "float", int: "int", str: "str", bool: "bool"}
+_TYPES = {kind: python_type for python_type, kind in _KINDS.items()}
+
+_BOUNDS = (
+    (annotated_types.Ge, "ge"),
+    (annotated_types.Gt, "gt"),
+    (annotated_types.Le, "le"),
+    (annotated_types.Lt, "lt"),
+)
+
+# Ints in float fields convert exactly below this; larger ones go to pydantic
+_EXACT_FLOAT_INT = 2 ** 53
+
+
+def _field_spec(name: str, field) -> tuple:
+    annotation = field.annotation
+    args = getattr(annotation, "__args__", (annotation,))
+    nullable = NoneType in args
+    types = [a for a in args if a is not NoneType]
+    if len(types) != 1 or types[0] not in _KINDS:
+        raise ValueError(f"{name}: unsupported field type {annotation}")
+
+    bounds = [(check, getattr(meta, check))
+              for meta in field.metadata
+              for bound_type, check in _BOUNDS
+              if isinstance(meta, bound_type)]
+
+    default = _MISSING if field.is_required() else field.default
+    return name, _KINDS[types[0]], nullable, default, tuple(bounds)
+
+
+def _in_bounds(values: list, bounds) -> bool:
+    """True if every value satisfies every bound (values are non-empty, finite)"""
+    low, high = min(values), max(values)
+    for check, limit in bounds:
+        if check == "ge" and not low >= limit:
+            return False
+        if check == "gt" and not low > limit:
+            return False
+        if check == "le" and not high <= limit:
+            return False
+        if check == "lt" and not high < limit:
+            return False
+    return True
+
+
+def _inline_refs(schema: dict) -> dict:
+    """Model JSON schema with its $defs substituted in (for openapi_extra)"""
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return resolve(copy.deepcopy(defs[ref[len("#/$defs/"):]]))
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+class BulkValidator:
+    """
+    Validates a request model whose `list_field` is a List[ItemModel],
+    with the list checked column-wise.
+    """
+
+    def __init__(self, request_model: Type[BaseModel], list_field: str):
+        self.request_model = request_model
+        self.list_field = list_field
+        self.adapter = TypeAdapter(request_model)
+
+        item_annotation = request_model.model_fields[list_field].annotation
+        self.item_model: Type[BaseModel] = item_annotation.__args__[0]
+        if self.item_model.model_config.get("extra") != "forbid":
+            raise ValueError("BulkValidator expects an item model with extra='forbid'")
+
+        self.fields = [_field_spec(name, field)
+                       for name, field in self.item_model.model_fields.items()]
+        self.names = frozenset(self.item_model.model_fields)
+
+    # -------------------------
+    # Fast path
+    # -------------------------
+    def _column(self, items: list, spec: tuple) -> Optional[list]:
+        name, kind, nullable, default, bounds = spec
+        column = [item.get(name, default) for item in items]
+
+        types = set(map(type, column))
+        if _Missing in types:
+            return None
+        if NoneType in types:
+            if not nullable:
+                return None
+            types.discard(NoneType)
+            values = [v for v in column if v is not None]
+        else:
+            values = column
+        if not values:
+            return column
+
+        if kind == "float":
+            if not types <= {float, int}:
+                return None
+            if int in types:
+                ints = [v for v in values if type(v) is int]
+                if min(ints) < -_EXACT_FLOAT_INT or max(ints) > _EXACT_FLOAT_INT:
+                    return None
+                column = [float(v) if type(v) is int else v for v in column]
+                values = [v for v in column if v is not None]
+            if not all(map(math.isfinite, values)):
+                return None
+        elif types != {_TYPES[kind]}:
+            return None
+
+        if bounds and not _in_bounds(values, bounds):
+            return None
+        return column
+
+    def _columns(self, items: list) -> Optional[Dict[str, list]]:
+        """Columns for exactly-typed items, or None if any item needs pydantic"""
+        if not items:
+            return {name: [] for name, *_ in self.fields}
+        if set(map(type, items)) != {dict} or not self.names.issuperset(set().union(*items)):
+            return None
+
+        columns = {}
+        for spec in self.fields:
+            column = self._column(items, spec)
+            if column is None:
+                return None
+            columns[spec[0]] = column
+        return columns
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def _full_validation(self, body: Any) -> BaseModel:
+        try:
+            return self.adapter.validate_python(body, from_attributes=True)
+        except ValidationError as e:
+            # Same errors FastAPI raises for a typed body parameter
+            errors = [{**error, "loc": ("body", *error["loc"])}
+                      for error in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=body)
+
+    def validate(self, body: Any) -> Tuple[BaseModel, Dict[str, list]]:
+        """
+        (request model with an empty list field, columns of the list).
+        Raises RequestValidationError like FastAPI would.
+        """
+        if type(body) is dict and type(body.get(self.list_field)) is list:
+            columns = self._columns(body[self.list_field])
+            if columns is not None:
+                try:
+                    rest = self.request_model.model_validate({**body, self.list_field: []})
+                except ValidationError:
+                    rest = None
+                if rest is not None:
+                    return rest, columns
+
+        validated = self._full_validation(body)
+        items = getattr(validated, self.list_field)
+        columns = {name: [] for name, *_ in self.fields}
+        for item in items:
+            for name, value in item.model_dump().items():
+                columns[name].append(value)
+        setattr(validated, self.list_field, [])
+        return validated, columns
+
+    def rows(self, columns: Dict[str, list]) -> List[dict]:
+        """Per-item dicts in model field order (what model_dump() returns)"""
+        names = [name for name, *_ in self.fields]
+        return [dict(zip(names, values)) for values in zip(*(columns[n] for n in names))]
+
+    def openapi_extra(self) -> dict:
+        """Request body schema for routes that take the body untyped"""
+        return {
+            "requestBody": {
+                "content": {
+                    "application/json": {
+                        "schema": _inline_refs(self.request_model.model_json_schema()),
+                    }
+                },
+                "required": True,
+            }
+        }
@@ -14,6 +14,32 @@ import os
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from app.parsing import parse_count, parse_mileage, parse_price, parse_year
+
+# Typed fields the scores read (see ingest_car)
+SCORING_FIELDS = ("price_numeric", "mileage_numeric", "year_numeric", "seats_numeric")
+
+
+def ingest_car(car: Dict) -> Dict:
+    """
+    Raw scraped car + the typed fields the scores read, parsed once.
+    Cars that already carry them (ingested before, or converted by
+    scripts/convert_scraped_data.py) are returned as they are, so
+    callers scoring the same cars repeatedly should ingest them first.
+    """
+    if all(field in car for field in SCORING_FIELDS):
+        return car
+
+    history = car.get("Vehicle_History") or {}
+    typed = {
+        "price_numeric": parse_price(car.get("price")),
+        "mileage_numeric": parse_mileage(history.get("Mileage")),
+        "year_numeric": parse_year(history.get("First_registration")),
+        # A listing without the field is scored as a 5-seater
+        "seats_numeric": parse_count((car.get("Basic_Data") or {}).get("Seats", "5")),
+    }
+    return {**typed, **car}
+
 
 class CarRecommendationEngine:
     """
@@ -40,7 +66,7 @@ class CarRecommendationEngine:
         Analyze car with user context
         
         Args:
-            car: Car data from scraping
+            car: Car data from scraping (raw, or from ingest_car)
             user_context: User preferences, budget, usage
             ml_prediction: ML price prediction if available
             
@@ -48,6 +74,8 @@ class CarRecommendationEngine:
             Comprehensive analysis with scores
         """
         
+        car = ingest_car(car)
+        
         analysis = {
             "car_id": car.get("details_url", "unknown"),
             "car_title": car.get("car_title", "Unknown"),
@@ -109,8 +137,7 @@ class CarRecommendationEngine:
     ) -> float:
         """Price affordability & fairness score"""
         try:
-            price_str = car.get("price", "0")
-            price = int(''.join(filter(str.isdigit, price_str))) if price_str else 0
+            price = car.get("price_numeric") or 0
             
             if price == 0:
                 return 0.5
@@ -141,8 +168,7 @@ class CarRecommendationEngine:
             # Check if it's a good deal
             if ml_prediction:
                 predicted = ml_prediction.get("predicted_price", 0)
-                actual_str = car.get("price", "0")
-                actual = int(''.join(filter(str.isdigit, actual_str)))
+                actual = car.get("price_numeric") or 0
                 
                 if predicted > 0 and actual > 0:
                     savings = predicted - actual
@@ -190,16 +216,11 @@ class CarRecommendationEngine:
                     break
             
             # Age penalty
-            hist = car.get("Vehicle_History", {})
-            reg = hist.get("First_registration", "")
-            
-            if reg and "/" in reg:
-                try:
-                    year = int(reg.split("/")[-1])
-                    age = 2025 - year
-                    age_score = max(0.5, 1 - (age * 0.05))  # 5% per year
-                except:
-                    age_score = 0.8
+            year = car.get("year_numeric")
+            
+            if year is not None:
+                age = 2025 - year
+                age_score = max(0.5, 1 - (age * 0.05))  # 5% per year
             else:
                 age_score = 0.8
             
@@ -212,7 +233,6 @@ class CarRecommendationEngine:
         """Features match with user needs"""
         try:
             # Get all feature-related fields
-            basic = car.get("Basic_Data", {})
             tech = car.get("Technical_Data", {})
             
             score = 0.5  # Base
@@ -222,13 +242,9 @@ class CarRecommendationEngine:
             
             # Check seats
             req_seats = user_context.get("min_seats", 0)
-            seats_str = basic.get("Seats", "5")
-            try:
-                seats = int(''.join(filter(str.isdigit, seats_str)))
-                if seats >= req_seats:
-                    score += 0.15
-            except:
-                pass
+            seats = car.get("seats_numeric")
+            if seats is not None and seats >= req_seats:
+                score += 0.15
             
             # Check gearbox preference
             pref_gearbox = user_context.get("preferred_gearbox", "").lower()
@@ -350,15 +366,9 @@ class CarRecommendationEngine:
             warnings.append("Higher maintenance risk")
         
         # Check mileage
-        try:
-            hist = car.get("Vehicle_History", {})
-            mileage_str = hist.get("Mileage", "0")
-            mileage = int(''.join(filter(str.isdigit, mileage_str)))
-            
-            if mileage > 150000:
-                warnings.append("High mileage - thorough inspection recommended")
-        except:
-            pass
+        mileage = car.get("mileage_numeric") or 0
+        if mileage > 150000:
+            warnings.append("High mileage - thorough inspection recommended")
         
         return warnings
     
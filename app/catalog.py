@@ -0,0 +1,295 @@
+"""
+Serving catalog for the investment discovery endpoints.
+
+The raw scraper output (scrapers/output.json) is analyzed and ranked
+once, written to a serving cache (data/serving/catalog.json) by the
+pipeline's "serve" stage, and kept in process memory until the source
+file changes.
+
+/cars/top-deals reads the memory-mapped columnar snapshot
+(data/serving/catalog.snapshot, see app/catalog_snapshot.py) instead,
+which all uvicorn workers share. Whichever process first finds it
+missing or stale publishes a new one (under a flock on
+catalog.snapshot.lock); the others remap it.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # no cross-process publish lock (Windows)
+    fcntl = None
+
+from app.ai_calculations import (
+    normalize_scraped_cars,
+    calculate_profit_and_recommendation,
+    rank_cars_by_investment_quality,
+)
+from app.metrics import CACHE_EVENTS
+from app.singleflight import SingleFlight
+
+# =========================
+# PROJECT PATHS
+# =========================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE_PATH = os.path.join(BASE_DIR, "scrapers", "output.json")
+SERVING_CACHE_PATH = os.path.join(BASE_DIR, "data", "serving", "catalog.json")
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "serving", "catalog.snapshot")
+
+# In-process copy of the ranked catalog, keyed by file signatures
+_memory_cache = {"key": None, "cars": None}
+
+# Currently mapped snapshot (shared pages, nothing copied per worker)
+_snapshot_cache = {"snapshot": None}
+_snapshot_lock = threading.Lock()
+
+# One rebuild / snapshot publish per source version, however many callers
+catalog_flight = SingleFlight("catalog")
+
+
+# =========================
+# ANALYSIS
+# =========================
+def analyze_raw_cars(raw_cars: List[dict]) -> List[dict]:
+    """
+    Normalize and analyze raw scraped cars.
+    """
+    analyzed = []
+
+    for clean in normalize_scraped_cars(raw_cars):
+        analysis = calculate_profit_and_recommendation(clean)
+        analyzed.append({**clean, **analysis})
+
+    return analyzed
+
+
+def build_ranked_catalog(raw_cars: List[dict]) -> List[dict]:
+    return rank_cars_by_investment_quality(analyze_raw_cars(raw_cars))
+
+
+# =========================
+# SERVING CACHE
+# =========================
+def file_signature(path: str) -> Optional[List[int]]:
+    """
+    Cheap change detector: [size, mtime_ns], or None if missing.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def write_serving_cache(
+    source_path: str = SOURCE_PATH,
+    cache_path: str = SERVING_CACHE_PATH,
+    snapshot_path: Optional[str] = SNAPSHOT_PATH,
+) -> int:
+    """
+    Rebuild the ranked catalog from the source file and publish it
+    (JSON cache and, unless snapshot_path is None, the mapped snapshot)
+    atomically. Returns the number of cars written.
+    """
+    signature = file_signature(source_path)
+    if signature is None:
+        raise FileNotFoundError(f"{source_path} not found")
+
+    with open(source_path, "r", encoding="utf-8") as f:
+        ranked = build_ranked_catalog(json.load(f))
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "source_signature": signature,
+                "built_at": datetime.now().isoformat(),
+                "cars": ranked,
+            },
+            f,
+            ensure_ascii=False,
+        )
+
+    os.replace(tmp_path, cache_path)
+
+    if snapshot_path:
+        from app.catalog_snapshot import write_snapshot
+
+        write_snapshot(ranked, snapshot_path, source_signature=signature)
+
+    return len(ranked)
+
+
+def load_ranked_catalog(
+    source_path: str = SOURCE_PATH,
+    cache_path: str = SERVING_CACHE_PATH,
+) -> List[dict]:
+    """
+    Return the ranked catalog for the current source file.
+
+    Uses the in-memory copy when nothing changed, then the serving
+    cache if it was built from the current source, and only rebuilds
+    from the raw scraper output as a last resort.
+    """
+    source_sig = file_signature(source_path)
+    if source_sig is None:
+        raise FileNotFoundError(f"{source_path} not found")
+
+    key = (source_path, tuple(source_sig), cache_path,
+           tuple(file_signature(cache_path) or ()))
+
+    if _memory_cache["key"] == key:
+        CACHE_EVENTS.inc("catalog", "memory")
+        return _memory_cache["cars"]
+
+    cars = _read_ranked_catalog(source_path, cache_path, source_sig)
+
+    _memory_cache["key"] = key
+    _memory_cache["cars"] = cars
+    return cars
+
+
+def _read_ranked_catalog(source_path: str, cache_path: str, source_sig: List[int]) -> List[dict]:
+    """Serving cache if built from the current source, else a rebuild"""
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("source_signature") == source_sig:
+                CACHE_EVENTS.inc("catalog", "disk")
+                return cached["cars"]
+        except (ValueError, KeyError):
+            pass
+
+    def rebuild() -> List[dict]:
+        with open(source_path, "r", encoding="utf-8") as f:
+            cars = build_ranked_catalog(json.load(f))
+        CACHE_EVENTS.inc("catalog", "rebuild")
+        return cars
+
+    return catalog_flight.do(("rebuild", source_path, tuple(source_sig)), rebuild)
+
+
+# =========================
+# SHARED SNAPSHOT
+# =========================
+def load_catalog_snapshot(
+    source_path: str = SOURCE_PATH,
+    snapshot_path: str = SNAPSHOT_PATH,
+    cache_path: str = SERVING_CACHE_PATH,
+):
+    """
+    Mapped snapshot of the ranked catalog for the current source file.
+
+    Remaps when the snapshot file was replaced (new inode) and publishes
+    a new snapshot when it is missing or was built from another source.
+    Concurrent callers share one remap / publish. The replaced snapshot
+    is retired; use catalog_snapshot() to keep it mapped while reading.
+    """
+    return _load_catalog_snapshot(source_path, snapshot_path, cache_path, acquire=False)
+
+
+@contextmanager
+def catalog_snapshot(
+    source_path: str = SOURCE_PATH,
+    snapshot_path: str = SNAPSHOT_PATH,
+    cache_path: str = SERVING_CACHE_PATH,
+):
+    """load_catalog_snapshot(), held open until the block ends"""
+    snapshot = _load_catalog_snapshot(source_path, snapshot_path, cache_path, acquire=True)
+    try:
+        yield snapshot
+    finally:
+        snapshot.release()
+
+
+def _load_catalog_snapshot(source_path: str, snapshot_path: str, cache_path: str,
+                           acquire: bool):
+    source_sig = file_signature(source_path)
+    if source_sig is None:
+        raise FileNotFoundError(f"{source_path} not found")
+
+    while True:
+        try:
+            st = os.stat(snapshot_path)
+            on_disk = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            on_disk = None
+
+        with _snapshot_lock:
+            current = _snapshot_cache["snapshot"]
+            if (current is not None and current.path == snapshot_path
+                    and current.inode == on_disk and current.source_signature == source_sig
+                    and (not acquire or current.acquire())):
+                CACHE_EVENTS.inc("catalog_snapshot", "mapped")
+                return current
+
+        snapshot = catalog_flight.do(
+            ("snapshot", snapshot_path, tuple(source_sig)),
+            lambda: _open_or_publish_snapshot(source_path, snapshot_path, cache_path,
+                                              source_sig, on_disk is not None),
+        )
+
+        with _snapshot_lock:
+            # Closed already: a newer snapshot replaced it meanwhile
+            if snapshot.closed or (acquire and not snapshot.acquire()):
+                continue
+            previous = _snapshot_cache["snapshot"]
+            _snapshot_cache["snapshot"] = snapshot
+        if previous is not None and previous is not snapshot:
+            previous.retire()
+        return snapshot
+
+
+def _open_or_publish_snapshot(source_path: str, snapshot_path: str, cache_path: str,
+                              source_sig: List[int], exists: bool):
+    from app.catalog_snapshot import CatalogSnapshot, write_snapshot
+
+    def open_matching():
+        try:
+            snapshot = CatalogSnapshot.open(snapshot_path)
+        except (OSError, ValueError):
+            return None
+        if snapshot.source_signature != source_sig:
+            snapshot.close()
+            return None
+        return snapshot
+
+    snapshot = open_matching() if exists else None
+    if snapshot is None:
+        os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+        with open(f"{snapshot_path}.lock", "a") as lock:
+            if fcntl is not None:
+                # One publishing process; the others wait and remap its file
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshot = open_matching()
+            if snapshot is None:
+                # Read without keeping a per-process copy of the rows
+                cars = _read_ranked_catalog(source_path, cache_path, source_sig)
+                write_snapshot(cars, snapshot_path, source_signature=source_sig)
+                snapshot = CatalogSnapshot.open(snapshot_path)
+                CACHE_EVENTS.inc("catalog_snapshot", "publish")
+                return snapshot
+
+    CACHE_EVENTS.inc("catalog_snapshot", "remap")
+    return snapshot
+
+
+def snapshot_status() -> dict:
+    snapshot = _snapshot_cache["snapshot"]
+    if snapshot is None:
+        return {"mapped": False}
+    return {
+        "mapped": True,
+        "generation": snapshot.generation,
+        "rows": len(snapshot),
+        "built_at": snapshot.header.get("built_at"),
+    }
@@ -0,0 +1,340 @@
+"""
+Memory-mapped columnar catalog snapshot
+=======================================
+The ranked catalog stored as one read-only file that every uvicorn
+worker maps, so N workers share one copy of the pages through the OS
+page cache instead of each holding its own list of dicts.
+
+Layout (all arrays 64-byte aligned):
+
+    b"CATSNAP1" | uint64 header length | JSON header | arrays...
+
+The header lists the row keys in order and, per column, its kind and
+where its arrays live. Every column has a uint8 state array
+(0 = key absent, 1 = None, 2 = value) and, by kind:
+
+    int / float / bool   one int64 / float64 / uint8 array
+    number               float64 values + uint8 "was an int" flag
+    str / json           int64 end offsets + one UTF-8 blob
+
+Rows rebuilt from a snapshot are equal to the rows it was written from
+(same keys, key order, types and values), so responses don't change.
+
+Snapshots are published by writing a temp file and renaming it over the
+old one; readers see a new inode and remap. Mappings are never written.
+A replaced snapshot is retired and its mapping closed once the last
+reader holding it releases it.
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"CATSNAP1"
+ALIGNMENT = 64
+
+ABSENT, NULL, VALUE = 0, 1, 2
+
+# Ints beyond this are not exact as float64; such columns are stored as JSON
+MAX_EXACT_INT = 2 ** 53
+
+
+# =========================
+# WRITING
+# =========================
+def _column_kind(values: List) -> str:
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, bool) for v in present):
+        return "bool"
+    if any(isinstance(v, bool) for v in present):
+        return "json"
+    if all(isinstance(v, int) for v in present):
+        return "int" if all(abs(v) < 2 ** 63 for v in present) else "json"
+    if all(isinstance(v, float) for v in present):
+        return "float"
+    if all(isinstance(v, (int, float)) for v in present):
+        if all(abs(v) <= MAX_EXACT_INT for v in present if isinstance(v, int)):
+            return "number"
+        return "json"
+    if all(isinstance(v, str) for v in present):
+        return "str"
+    return "json"
+
+
+def _key_order(rows: Sequence[dict]) -> List[str]:
+    """
+    One key order every row follows (rows may miss keys). Raises
+    ValueError when rows disagree on the order.
+    """
+    keys: List[str] = []
+    position: Dict[str, int] = {}
+    for row in rows:
+        last = -1
+        for key in row:
+            if key not in position:
+                position[key] = len(keys)
+                keys.append(key)
+            elif position[key] < last:
+                raise ValueError("Rows have inconsistent key order")
+            last = position[key]
+    return keys
+
+
+def _encode_column(name: str, rows: Sequence[dict]) -> dict:
+    state = np.empty(len(rows), dtype=np.uint8)
+    values = []
+    for i, row in enumerate(rows):
+        if name not in row:
+            state[i] = ABSENT
+            values.append(None)
+        elif row[name] is None:
+            state[i] = NULL
+            values.append(None)
+        else:
+            state[i] = VALUE
+            values.append(row[name])
+
+    kind = _column_kind(values)
+    arrays = {"state": state}
+
+    if kind == "int":
+        arrays["values"] = np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+    elif kind == "float":
+        arrays["values"] = np.array([v if v is not None else np.nan for v in values],
+                                    dtype=np.float64)
+    elif kind == "number":
+        arrays["values"] = np.array([v if v is not None else np.nan for v in values],
+                                    dtype=np.float64)
+        arrays["is_int"] = np.array([isinstance(v, int) for v in values], dtype=np.uint8)
+    elif kind == "bool":
+        arrays["values"] = np.array([bool(v) for v in values], dtype=np.uint8)
+    else:
+        encoded = [
+            b"" if v is None else
+            (v if kind == "str" else json.dumps(v, ensure_ascii=False)).encode("utf-8")
+            for v in values
+        ]
+        arrays["ends"] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        arrays["blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    return {"kind": kind, "arrays": arrays}
+
+
+def _pad(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def write_snapshot(
+    rows: Sequence[dict],
+    path: str,
+    source_signature: Optional[List[int]] = None,
+    generation: Optional[int] = None,
+) -> int:
+    """
+    Write rows as a snapshot and atomically replace `path`.
+    Returns the snapshot generation.
+    """
+    keys = _key_order(rows)
+    columns = {name: _encode_column(name, rows) for name in keys}
+    if generation is None:
+        generation = time.time_ns()
+
+    # Lay out arrays after a header whose size we only know once the
+    # offsets are in it: place them relative to the data start first
+    layout = {}
+    relative = 0
+    for name, column in columns.items():
+        layout[name] = {"kind": column["kind"], "arrays": {}}
+        for array_name, array in column["arrays"].items():
+            relative += _pad(relative)
+            layout[name]["arrays"][array_name] = [relative, array.dtype.str, int(array.size)]
+            relative += array.nbytes
+
+    header = {
+        "generation": generation,
+        "rows": len(rows),
+        "keys": keys,
+        "source_signature": source_signature,
+        "built_at": datetime.now().isoformat(),
+        "columns": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix_len = len(MAGIC) + 8 + len(header_bytes)
+    data_start = prefix_len + _pad(prefix_len)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - prefix_len))
+        written = 0
+        for name, column in columns.items():
+            for array_name, array in column["arrays"].items():
+                offset = layout[name]["arrays"][array_name][0]
+                f.write(b"\0" * (offset - written))
+                f.write(array.tobytes())
+                written = offset + array.nbytes
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return generation
+
+
+# =========================
+# READING
+# =========================
+class CatalogSnapshot:
+    """
+    Read-only view over a mapped snapshot.
+
+    Usage:
+        snap = CatalogSnapshot.open("data/serving/catalog.snapshot")
+        scores = snap.numeric("investment_score")      # float64, NaN if missing
+        snap.rows_where(scores > 0, limit=10)          # list of dicts
+        snap.close()
+
+    Shared snapshots are leased: acquire() / release() around each use
+    and retire() when replaced; the last of retire / release closes it.
+    """
+
+    def __init__(self, path: str, buffer, header: dict, data_start: int, stat: os.stat_result):
+        self.path = path
+        self.header = header
+        self.generation = header["generation"]
+        self.source_signature = header.get("source_signature")
+        self.keys: List[str] = header["keys"]
+        self.inode = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        self._buffer = buffer
+        self._columns: Dict[str, dict] = {}
+        self._lease_lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+        self.closed = False
+
+        for name, column in header["columns"].items():
+            arrays = {
+                array_name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count,
+                                          offset=data_start + offset)
+                for array_name, (offset, dtype, count) in column["arrays"].items()
+            }
+            self._columns[name] = {"kind": column["kind"], **arrays}
+
+    @classmethod
+    def open(cls, path: str) -> "CatalogSnapshot":
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header_len = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 8], "little")
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(buffer[len(MAGIC) + 8:header_end].decode("utf-8"))
+        return cls(path, buffer, header, header_end + _pad(header_end), stat)
+
+    def __len__(self) -> int:
+        return self.header["rows"]
+
+    def acquire(self) -> bool:
+        """Hold the mapping open; False if it was already closed"""
+        with self._lease_lock:
+            if self.closed:
+                return False
+            self._users += 1
+            return True
+
+    def release(self) -> None:
+        with self._lease_lock:
+            self._users -= 1
+            idle = self._retired and self._users == 0
+        if idle:
+            self.close()
+
+    def retire(self) -> None:
+        """Replaced by a newer snapshot: close once no reader holds it"""
+        with self._lease_lock:
+            self._retired = True
+            idle = self._users == 0
+        if idle:
+            self.close()
+
+    def close(self) -> None:
+        with self._lease_lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._columns = {}
+        try:
+            self._buffer.close()
+        except BufferError:
+            # Arrays returned by numeric() are still referenced; the
+            # mapping is released together with them
+            pass
+
+    def numeric(self, name: str) -> np.ndarray:
+        """
+        Column as read-only float64, NaN where absent / None. Float
+        columns are the mapped array itself; int columns are converted
+        once per snapshot.
+        """
+        column = self._columns.get(name)
+        if column is None or column["kind"] not in ("int", "float", "number", "bool"):
+            return np.full(len(self), np.nan)
+        if column["kind"] in ("float", "number"):
+            # Written with NaN for absent / None
+            return column["values"]
+
+        converted = column.get("as_float")
+        if converted is None:
+            converted = column["values"].astype(np.float64)
+            converted[column["state"] != VALUE] = np.nan
+            converted.flags.writeable = False
+            column["as_float"] = converted
+        return converted
+
+    def _value(self, column: dict, i: int):
+        kind = column["kind"]
+        if kind == "int":
+            return int(column["values"][i])
+        if kind == "float":
+            return float(column["values"][i])
+        if kind == "number":
+            value = float(column["values"][i])
+            return int(value) if column["is_int"][i] else value
+        if kind == "bool":
+            return bool(column["values"][i])
+
+        ends = column["ends"]
+        start = int(ends[i - 1]) if i else 0
+        text = column["blob"][start:int(ends[i])].tobytes().decode("utf-8")
+        return text if kind == "str" else json.loads(text)
+
+    def row(self, i: int) -> dict:
+        row = {}
+        for name in self.keys:
+            column = self._columns[name]
+            state = column["state"][i]
+            if state == VALUE:
+                row[name] = self._value(column, i)
+            elif state == NULL:
+                row[name] = None
+        return row
+
+    def rows(self, indices: Optional[Iterable[int]] = None) -> List[dict]:
+        if indices is None:
+            indices = range(len(self))
+        return [self.row(int(i)) for i in indices]
+
+    def rows_where(self, mask: np.ndarray, limit: Optional[int] = None) -> List[dict]:
+        """Rows where mask is true, in catalog order (first `limit`)"""
+        return self.rows(np.flatnonzero(mask)[:limit])
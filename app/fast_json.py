@@ -0,0 +1,203 @@
+"""
+Fast JSON responses for bulk endpoints
+======================================
+The default FastAPI path for `response_model=List[CarAnalysis]` validates
+every row with pydantic, dumps it back to Python and then encodes it
+with the stdlib json module. The analysis results are already typed, so
+bulk endpoints can skip that:
+
+    rows = CAR_ANALYSIS_ROWS.prepare(results)   # None -> use the normal path
+    if rows is not None:
+        return FastJSONResponse(rows)
+
+prepare() reproduces what validation + serialization would produce
+(model field order, missing optional fields as null, ints in float
+fields as floats). Any row it can't reproduce exactly (extra keys,
+unexpected types, missing required fields) makes it return None, and
+the endpoint falls back to the validated path.
+
+FastJSONResponse encodes with orjson when it is installed and the
+payload is one where orjson's output is byte-identical to Starlette's
+JSONResponse (stdlib json, compact separators, ensure_ascii=False);
+otherwise with the stdlib, exactly like JSONResponse. Set
+VALIDATE_RESPONSES=1 in tests / development to validate every prepared
+row against the model as well.
+"""
+
+import json
+import math
+import os
+from typing import Any, List, Optional, Sequence, Type
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", "0").lower() in ("1", "true", "yes")
+
+# Float reprs orjson writes like the stdlib (outside: 1e16 vs 1e+16, 0.00001 vs 1e-05)
+ORJSON_FLOAT_MIN = 1e-4
+ORJSON_FLOAT_MAX = 1e16
+
+_MISSING = object()
+
+
+# =========================
+# ENCODING
+# =========================
+def stdlib_dumps(content: Any) -> bytes:
+    """Exactly what starlette's JSONResponse renders"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _orjson_safe(value: Any) -> bool:
+    """True if orjson encodes value byte-identically to stdlib_dumps"""
+    kind = type(value)
+    if kind is float:
+        if value == 0.0:
+            return True
+        return math.isfinite(value) and ORJSON_FLOAT_MIN <= abs(value) < ORJSON_FLOAT_MAX
+    if kind is str or kind is bool or value is None:
+        return True
+    if kind is int:
+        return -2 ** 63 <= value < 2 ** 64
+    if kind is dict:
+        return all(type(k) is str and _orjson_safe(v) for k, v in value.items())
+    if kind is list or kind is tuple:
+        return all(_orjson_safe(v) for v in value)
+    return False
+
+
+def dumps(content: Any, checked: bool = False) -> bytes:
+    """
+    Compact UTF-8 JSON, byte-identical to JSONResponse. `checked=True`
+    skips the orjson safety scan when the caller already did it.
+    """
+    if orjson is not None and (checked or _orjson_safe(content)):
+        try:
+            return orjson.dumps(content)
+        except (TypeError, orjson.JSONEncodeError):
+            # e.g. lone surrogates in a string
+            pass
+    return stdlib_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def __init__(self, content: Any, *args, orjson_safe: bool = False, **kwargs):
+        self._orjson_safe = orjson_safe
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content, checked=self._orjson_safe)
+
+
+# =========================
+# MODEL ROWS
+# =========================
+def _field_kind(annotation) -> Optional[str]:
+    args = [a for a in getattr(annotation, "__args__", (annotation,)) if a is not type(None)]
+    if len(args) != 1:
+        return None
+    return {float: "float", int: "int", str: "str", bool: "bool"}.get(args[0])
+
+
+class ModelRows:
+    """
+    Precompiled row builder for a flat pydantic model of float / int /
+    str / bool fields.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.fields = []
+        for name, field in model.model_fields.items():
+            kind = _field_kind(field.annotation)
+            if kind is None:
+                raise ValueError(f"{model.__name__}.{name}: unsupported type {field.annotation}")
+            nullable = type(None) in getattr(field.annotation, "__args__", ())
+            default = _MISSING if field.is_required() else field.default
+            self.fields.append((name, kind, nullable, default))
+        self.names = frozenset(model.model_fields)
+
+    def _prepare_row(self, row: dict) -> Optional[tuple]:
+        if not self.names.issuperset(row):
+            return None
+
+        out = {}
+        safe = True
+        for name, kind, nullable, default in self.fields:
+            value = row.get(name, _MISSING)
+            if value is _MISSING:
+                if default is _MISSING:
+                    return None
+                value = default
+            elif value is None:
+                if not nullable:
+                    return None
+            elif kind == "float":
+                if type(value) is int:
+                    value = float(value)
+                elif type(value) is not float or not math.isfinite(value):
+                    return None
+                if value != 0.0 and not ORJSON_FLOAT_MIN <= abs(value) < ORJSON_FLOAT_MAX:
+                    safe = False
+            elif kind == "int":
+                if type(value) is not int:
+                    return None
+                if not -2 ** 63 <= value < 2 ** 64:
+                    safe = False
+            elif kind == "str":
+                if type(value) is not str:
+                    return None
+            elif type(value) is not bool:
+                return None
+            out[name] = value
+        return out, safe
+
+    def prepare(self, rows: Sequence[dict]) -> Optional[tuple]:
+        """
+        (rows as the validated response would serialize them, orjson
+        safe) or None if any row needs real validation.
+        """
+        prepared: List[dict] = []
+        all_safe = True
+        for row in rows:
+            result = self._prepare_row(row)
+            if result is None:
+                return None
+            out, safe = result
+            prepared.append(out)
+            all_safe = all_safe and safe
+
+        if VALIDATE_RESPONSES:
+            for out in prepared:
+                self.model.model_validate(out)
+        return prepared, all_safe
+
+    def dump(self, rows: Sequence[dict]) -> tuple:
+        """
+        (rows as JSON-ready dicts, orjson safe): prepare(), or pydantic
+        validation + dump for rows it can't reproduce.
+        """
+        result = self.prepare(rows)
+        if result is not None:
+            return result
+        return [self.model.model_validate(row).model_dump(mode="json") for row in rows], False
+
+    def response(self, rows: Sequence[dict]):
+        """FastJSONResponse, or the rows unchanged for FastAPI to validate"""
+        result = self.prepare(rows)
+        if result is None:
+            return rows
+        prepared, safe = result
+        return FastJSONResponse(prepared, orjson_safe=safe)
@@ -0,0 +1,318 @@
+"""
+Incremental retraining for the price model
+==========================================
+Instead of refitting the whole forest every night, only rows that are
+new or changed since the last run are used:
+
+1. Rows are fingerprinted; unchanged rows are skipped.
+2. Drift is measured on the new rows with the current model
+   (MAE vs the last full-fit MAE, feature mean shift, unseen brands).
+3. If the error degraded past the threshold -> full refit.
+   Otherwise a few trees are added with warm_start, fitted on the new
+   rows only, and the oldest trees are dropped beyond `max_trees`
+   (a sliding window over trees). Gradient boosting can't drop its
+   first stages, so it gets a full refit once it reaches `max_trees`.
+
+A full refit keeps the current model's estimator type, hyperparameters
+and feature list (e.g. a config picked by scripts/tune_price_model.py).
+
+Training time for the incremental path scales with the new data only.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.model_bundle import (
+    ModelBundle,
+    evaluate,
+    filter_training_records,
+    records_to_columns,
+    train_model_bundle,
+)
+
+# =========================
+# PROJECT PATHS
+# =========================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_STATE_PATH = os.path.join(
+    BASE_DIR, "data", "ml_models", "training_state.json"
+)
+
+DEFAULT_TREES_PER_UPDATE = 20
+DEFAULT_MAX_TREES = 240
+# Full refit when MAE on new rows is this much worse than the baseline
+DEFAULT_DEGRADE_THRESHOLD = 0.25
+HISTORY_LIMIT = 50
+
+
+# =========================
+# ROW FINGERPRINTS
+# =========================
+def row_key(car: dict) -> str:
+    """Stable identity of a listing across scrapes"""
+    if car.get("url"):
+        return car["url"]
+    return f"{car.get('title')}|{car.get('year_numeric')}|{car.get('brand')}"
+
+
+def row_fingerprint(car: dict) -> str:
+    values = [car.get(f) for f in
+              ("brand", "year_numeric", "mileage_numeric", "fuel_type", "price_numeric")]
+    return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()[:16]
+
+
+def split_new_rows(cars: List[dict], seen: Dict[str, str]) -> Tuple[List[dict], int]:
+    """(new or changed rows, number of unchanged rows)"""
+    fresh = []
+    unchanged = 0
+    for car in cars:
+        if seen.get(row_key(car)) == row_fingerprint(car):
+            unchanged += 1
+        else:
+            fresh.append(car)
+    return fresh, unchanged
+
+
+# =========================
+# STATE
+# =========================
+def load_training_state(path: str = TRAINING_STATE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {"fingerprints": {}, "history": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_training_state(state: dict, path: str = TRAINING_STATE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# =========================
+# DRIFT
+# =========================
+def feature_profile(X: np.ndarray) -> dict:
+    return {
+        "mean": X.mean(axis=0).tolist() if len(X) else [],
+        "std": X.std(axis=0).tolist() if len(X) else [],
+    }
+
+
+def drift_metrics(bundle: ModelBundle, rows: List[dict], profile: Optional[dict]) -> dict:
+    """How well the current model explains the new rows"""
+    columns = records_to_columns(rows)
+    X = bundle.transform(columns)
+    y = np.array([float(r["price_numeric"]) for r in rows])
+
+    scores = evaluate(bundle.estimator, X, y)
+    baseline_mae = bundle.metrics.get("baseline_mae", bundle.metrics.get("mae"))
+
+    metrics = {
+        "new_rows": len(rows),
+        "new_mae": round(scores["mae"], 2),
+        "baseline_mae": round(baseline_mae, 2) if baseline_mae else None,
+        "mae_ratio": round(scores["mae"] / baseline_mae, 3) if baseline_mae else None,
+        "unseen_brand_share": round(
+            sum(1 for b in columns["brand"] if str(b) not in bundle.brand_map)
+            / len(rows), 3
+        ),
+    }
+
+    # Largest standardized shift of a feature mean vs the full-fit data
+    if profile and profile.get("mean"):
+        mean = np.array(profile["mean"])
+        std = np.where(np.array(profile["std"]) > 0, profile["std"], 1.0)
+        shift = np.abs(X.mean(axis=0) - mean) / std
+        metrics["max_feature_shift"] = round(float(shift.max()), 3)
+        metrics["shifted_feature"] = bundle.feature_names[int(shift.argmax())]
+
+    return metrics
+
+
+# =========================
+# UPDATE
+# =========================
+def _is_forest(estimator) -> bool:
+    return hasattr(estimator, "warm_start") and hasattr(estimator, "estimators_")
+
+
+def _is_boosting(estimator) -> bool:
+    # HistGradientBoostingRegressor: warm_start adds max_iter - n_iter_ stages
+    return hasattr(estimator, "warm_start") and hasattr(estimator, "n_iter_")
+
+
+def _supports_warm_start(estimator) -> bool:
+    return _is_forest(estimator) or _is_boosting(estimator)
+
+
+def _size_param(estimator) -> str:
+    return "max_iter" if "max_iter" in estimator.get_params() else "n_estimators"
+
+
+def _n_members(estimator) -> int:
+    if _is_boosting(estimator):
+        return int(estimator.n_iter_)
+    return len(estimator.estimators_)
+
+
+def fresh_estimator(bundle: Optional[ModelBundle]):
+    """
+    Unfitted copy of the bundle's estimator: same type and
+    hyperparameters, at the size it was first fitted with. None without
+    a bundle (train_model_bundle then uses its default).
+    """
+    if bundle is None or bundle.estimator is None:
+        return None
+    from sklearn.base import clone
+
+    estimator = clone(bundle.estimator)
+    params = {_size_param(estimator): bundle.metrics.get(
+        "base_estimators", estimator.get_params()[_size_param(estimator)])}
+    if "warm_start" in estimator.get_params():
+        params["warm_start"] = False
+    estimator.set_params(**params)
+    return estimator
+
+
+def full_refit(cars: List[dict], estimator=None,
+               feature_names: Optional[List[str]] = None) -> Tuple[ModelBundle, dict]:
+    # Holdout metrics first, then the served model is fitted on every row;
+    # incremental_train and tune_price_model --save both refit through here
+    bundle = train_model_bundle(cars, estimator=estimator, feature_names=feature_names,
+                                fit_all=True)
+    bundle.metrics["baseline_mae"] = bundle.metrics["mae"]
+    bundle.metrics["incremental_updates"] = 0
+    # Size before any incremental update, for the next full refit
+    bundle.metrics["base_estimators"] = bundle.estimator.get_params().get(
+        _size_param(bundle.estimator))
+
+    X = bundle.transform(records_to_columns(cars))
+    return bundle, feature_profile(X)
+
+
+def add_trees(
+    bundle: ModelBundle,
+    rows: List[dict],
+    trees_per_update: int = DEFAULT_TREES_PER_UPDATE,
+    max_trees: int = DEFAULT_MAX_TREES,
+) -> ModelBundle:
+    """
+    Fit `trees_per_update` new trees (boosting stages) on `rows`; a
+    forest keeps the newest `max_trees`
+    """
+    estimator = bundle.estimator
+    bundle.extend_encoders(rows)
+
+    X = bundle.transform(records_to_columns(rows))
+    y = np.array([float(r["price_numeric"]) for r in rows])
+
+    if _is_boosting(estimator):
+        estimator.set_params(warm_start=True,
+                             max_iter=estimator.n_iter_ + trees_per_update)
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+        return _updated(bundle)
+
+    estimator.set_params(
+        warm_start=True,
+        n_estimators=len(estimator.estimators_) + trees_per_update,
+    )
+    estimator.fit(X, y)
+
+    if len(estimator.estimators_) > max_trees:
+        estimator.estimators_ = estimator.estimators_[-max_trees:]
+        estimator.set_params(n_estimators=max_trees)
+
+    estimator.set_params(warm_start=False)
+    return _updated(bundle)
+
+
+def _updated(bundle: ModelBundle) -> ModelBundle:
+    bundle.metrics["incremental_updates"] = bundle.metrics.get("incremental_updates", 0) + 1
+    bundle.metrics["n_trees"] = _n_members(bundle.estimator)
+    bundle.refresh_version()
+    return bundle
+
+
+def incremental_train(
+    cars: List[dict],
+    bundle: Optional[ModelBundle],
+    state: dict,
+    trees_per_update: int = DEFAULT_TREES_PER_UPDATE,
+    max_trees: int = DEFAULT_MAX_TREES,
+    degrade_threshold: float = DEFAULT_DEGRADE_THRESHOLD,
+    force_full: bool = False,
+) -> Tuple[ModelBundle, dict, dict]:
+    """
+    Update (or build) the model from the current dataset.
+    Returns (bundle, new_state, report).
+    """
+    cars = filter_training_records(cars)
+    if not cars:
+        raise ValueError("No complete car records to train on")
+
+    fresh, unchanged = split_new_rows(cars, state.get("fingerprints", {}))
+    report = {
+        "at": datetime.now().isoformat(),
+        "rows": len(cars),
+        "new_or_changed": len(fresh),
+        "unchanged": unchanged,
+    }
+
+    # A full refit keeps the current estimator config and features
+    estimator = fresh_estimator(bundle)
+    feature_names = bundle.feature_names if bundle is not None else None
+
+    if bundle is None or force_full or not _supports_warm_start(bundle.estimator):
+        report["mode"] = "full"
+        report["reason"] = "forced" if force_full else (
+            "no existing model" if bundle is None else "estimator has no warm start"
+        )
+        bundle, profile = full_refit(cars, estimator, feature_names)
+
+    elif not fresh:
+        report["mode"] = "skipped"
+        report["reason"] = "no new or changed rows"
+        profile = state.get("feature_profile")
+
+    else:
+        drift = drift_metrics(bundle, fresh, state.get("feature_profile"))
+        report["drift"] = drift
+        ratio = drift.get("mae_ratio")
+
+        if ratio is not None and ratio > 1 + degrade_threshold:
+            report["mode"] = "full"
+            report["reason"] = f"MAE degraded x{ratio} (threshold x{1 + degrade_threshold})"
+            bundle, profile = full_refit(cars, estimator, feature_names)
+        elif (_is_boosting(bundle.estimator)
+              and _n_members(bundle.estimator) + trees_per_update > max_trees):
+            report["mode"] = "full"
+            report["reason"] = f"boosting reached {max_trees} stages"
+            bundle, profile = full_refit(cars, estimator, feature_names)
+        else:
+            report["mode"] = "incremental"
+            report["reason"] = f"{len(fresh)} new/changed rows"
+            bundle = add_trees(bundle, fresh, trees_per_update, max_trees)
+            bundle.metrics["last_update_mae"] = drift["new_mae"]
+            profile = state.get("feature_profile")
+
+    return bundle, build_training_state(cars, bundle, profile, state, report), report
+
+
+def build_training_state(cars: List[dict], bundle: ModelBundle, profile: Optional[dict],
+                         previous: dict, report: dict) -> dict:
+    """State for the next run: row fingerprints of `cars` for `bundle`"""
+    return {
+        "fingerprints": {row_key(c): row_fingerprint(c) for c in cars},
+        "feature_profile": profile,
+        "model_version": bundle.version,
+        "history": (previous.get("history", []) + [report])[-HISTORY_LIMIT:],
+    }
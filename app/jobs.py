@@ -0,0 +1,546 @@
+"""
+Asynchronous analysis jobs
+==========================
+Very large /analyze-cars/ batches run as background jobs instead of one
+long request:
+
+    POST /jobs/analyze-cars              body: JSON array of raw cars
+    POST /jobs/analyze-cars?path=...     a local .json / .jsonl file
+        -> 202 {"job_id": ..., "status_url": ..., "results_url": ...}
+    GET  /jobs/{id}                      state + progress
+    GET  /jobs/{id}/results?offset=&limit=   a page of result rows
+    GET  /jobs/{id}/results.jsonl        all rows (HTTP Range supported)
+
+Everything lives in JOBS_DIR/<job id>/ (default data/jobs/):
+
+    upload.json      the posted body, streamed to disk as received
+    input.jsonl      one raw car per line (built once from the source)
+    results.jsonl    one line per input car: its CarAnalysis row (same values
+                     as /analyze-cars/), or {"index", "stage", "error"}
+                     for a car that could not be analyzed
+    job.json         state: rows processed, committed result bytes, and
+                     the byte offset of every chunk (for paging)
+
+A worker pool (JOBS_WORKERS threads, default 1) processes JOBS_CHUNK_SIZE
+cars at a time. A bad car becomes an error line instead of failing the
+job. The pool appends each chunk's rows, fsyncs them and then records
+the new offsets in job.json. After a restart (or a crash),
+unfinished jobs are picked up again: results.jsonl is truncated to the
+last committed chunk and processing continues from there. With several
+uvicorn workers, a flock on the job directory makes sure only one
+process runs a given job.
+
+`?path=` only accepts files under JOBS_INPUT_DIRS (os.pathsep separated,
+default data/ and scrapers/).
+
+JSON array sources are decoded one element at a time, so building
+input.jsonl holds a single car in memory however large the upload is.
+"""
+
+import bisect
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no cross-process job locks (Windows)
+    fcntl = None
+
+from pydantic import ValidationError
+
+from app import fast_json
+from app.ai_calculations import analyze_raw_batch, item_error
+from app.models import CarAnalysis
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(BASE_DIR, "data", "jobs"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "1"))
+JOBS_CHUNK_SIZE = int(os.getenv("JOBS_CHUNK_SIZE", "1000"))
+JOBS_KEEP = int(os.getenv("JOBS_KEEP", "50"))
+JOBS_MAX_UPLOAD_BYTES = int(os.getenv("JOBS_MAX_UPLOAD_BYTES", str(2 * 1024 ** 3)))
+JOBS_INPUT_DIRS = [
+    os.path.realpath(d) for d in os.getenv(
+        "JOBS_INPUT_DIRS",
+        os.pathsep.join([os.path.join(BASE_DIR, "data"), os.path.join(BASE_DIR, "scrapers")]),
+    ).split(os.pathsep) if d
+]
+
+PAGE_LIMIT = 1000
+# Characters read at a time while decoding a JSON array source
+READ_BLOCK_CHARS = 1024 * 1024
+JOB_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+UPLOAD_NAME = "upload.json"
+INPUT_NAME = "input.jsonl"
+RESULTS_NAME = "results.jsonl"
+STATE_NAME = "job.json"
+LOCK_NAME = "lock"
+
+
+class JobInputError(ValueError):
+    """The job's input can't be read as a list of car objects"""
+
+
+def new_job_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def resolve_input_path(path: str, allowed_dirs: List[str] = JOBS_INPUT_DIRS) -> str:
+    """Real path of a local input file, if it is inside an allowed directory"""
+    real = os.path.realpath(path if os.path.isabs(path) else os.path.join(BASE_DIR, path))
+    if not any(real == d or real.startswith(d + os.sep) for d in allowed_dirs):
+        raise JobInputError("path is outside the allowed input directories")
+    if not os.path.isfile(real):
+        raise JobInputError("input file not found")
+    return real
+
+
+# =========================
+# INPUT / OUTPUT
+# =========================
+def _iter_source(path: str) -> Iterator[dict]:
+    """Cars from a JSON-lines file (.jsonl) or a JSON array file"""
+    if path.endswith(".jsonl"):
+        with open(path, "rb") as f:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise JobInputError(f"invalid JSON on line {number}: {e}")
+        return
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        yield from _iter_json_array(f)
+
+
+def _iter_json_array(f, block: int = READ_BLOCK_CHARS) -> Iterator:
+    """Elements of a JSON array read from a text file, decoded one by one"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    consumed = 0  # characters dropped from the front of buf
+    eof = False
+
+    def fill(at_least: int) -> bool:
+        nonlocal buf, pos, consumed, eof
+        if pos:
+            buf, consumed, pos = buf[pos:], consumed + pos, 0
+        data = f.read(max(block, at_least))
+        eof = not data
+        buf += data
+        return not eof
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf) or not fill(block):
+                return buf[pos] if pos < len(buf) else ""
+
+    def invalid(message: str, at: int) -> JobInputError:
+        return JobInputError(f"invalid JSON at character {consumed + at}: {message}")
+
+    if skip_ws() != "[":
+        raise JobInputError("input must be a JSON array of car objects")
+    pos += 1
+
+    if skip_ws() == "]":
+        pos += 1
+    else:
+        while True:
+            skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    at = consumed + e.pos
+                    # Possibly cut at the block boundary: read more and retry
+                    if fill(len(buf)):
+                        continue
+                    raise JobInputError(f"invalid JSON at character {at}: {e.msg}")
+                # A number ending exactly at the buffer end may continue
+                if end == len(buf) and fill(len(buf)):
+                    continue
+                break
+            pos = end
+            yield value
+
+            separator = skip_ws()
+            pos += 1
+            if separator == "]":
+                break
+            if separator != ",":
+                raise invalid("expected ',' or ']'", pos - 1)
+
+    if skip_ws():
+        raise invalid("extra data after the array", pos)
+
+
+def _build_input(source: str, input_path: str) -> int:
+    """Write input.jsonl from the job's source; number of cars"""
+    tmp_path = f"{input_path}.tmp"
+    total = 0
+    with open(tmp_path, "wb") as out:
+        for car in _iter_source(source):
+            if not isinstance(car, dict):
+                raise JobInputError("input must be a JSON array of car objects")
+            out.write(fast_json.dumps(car))
+            out.write(b"\n")
+            total += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, input_path)
+    return total
+
+
+def _count_lines(path: str) -> int:
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_CHARS), b""):
+            count += block.count(b"\n")
+    return count
+
+
+_analysis_rows = fast_json.ModelRows(CarAnalysis)
+
+
+def _encode_chunk(chunk: List[dict], first_index: int) -> Tuple[bytes, int]:
+    """
+    One JSON line per input car, in input order: the row /analyze-cars/
+    returns, or the car's {"index", "stage", "error"} (index counted over
+    the whole job). Returns (lines, number of error lines).
+    """
+    errors, indices = [], []
+    results, _ = analyze_raw_batch(chunk, errors=errors, indices=indices)
+
+    lines = {}
+    try:
+        rows, checked = _analysis_rows.dump(results)
+        for index, row in zip(indices, rows):
+            lines[index] = fast_json.dumps(row, checked=checked)
+    except ValidationError:
+        for index, result in zip(indices, results):
+            try:
+                (row,), checked = _analysis_rows.dump([result])
+            except ValidationError as e:
+                errors.append(item_error(index, "serialize", e))
+                continue
+            lines[index] = fast_json.dumps(row, checked=checked)
+
+    for error in errors:
+        lines[error["index"]] = fast_json.dumps({**error, "index": first_index + error["index"]})
+    return b"".join(lines[i] + b"\n" for i in range(len(chunk))), len(errors)
+
+
+# =========================
+# JOB MANAGER
+# =========================
+class JobManager:
+    """
+    Disk-backed analysis jobs run by a thread pool.
+
+    Usage:
+        jobs = JobManager()
+        jobs.start()                          # resumes unfinished jobs
+        job_id, upload_path = jobs.create()   # caller writes the upload
+        jobs.submit(job_id)
+        jobs.status(job_id)
+        jobs.page(job_id, offset=0, limit=100)
+    """
+
+    def __init__(self, directory: str = JOBS_DIR, workers: int = JOBS_WORKERS,
+                 chunk_size: int = JOBS_CHUNK_SIZE, keep: int = JOBS_KEEP):
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.keep = keep
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._active = set()
+
+    # -------------------------
+    # Paths / state
+    # -------------------------
+    def job_dir(self, job_id: str) -> Optional[str]:
+        if not JOB_ID_PATTERN.match(job_id or ""):
+            return None
+        path = os.path.join(self.directory, job_id)
+        return path if os.path.exists(os.path.join(path, STATE_NAME)) else None
+
+    def _read_state(self, job_dir: str) -> dict:
+        with open(os.path.join(job_dir, STATE_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self, job_dir: str, state: dict) -> None:
+        state["updated_at"] = datetime.now().isoformat()
+        _write_json_atomic(os.path.join(job_dir, STATE_NAME), state)
+
+    # -------------------------
+    # Submission
+    # -------------------------
+    def create(self) -> Tuple[str, str]:
+        """New job directory; (job id, path to write the posted body to)"""
+        job_id = new_job_id()
+        job_dir = os.path.join(self.directory, job_id)
+        os.makedirs(job_dir)
+        return job_id, os.path.join(job_dir, UPLOAD_NAME)
+
+    def submit(self, job_id: str, source_path: Optional[str] = None) -> dict:
+        """Queue a created job; its input is the upload or `source_path`"""
+        job_dir = os.path.join(self.directory, job_id)
+        state = {
+            "job_id": job_id,
+            "state": QUEUED,
+            "source": source_path or UPLOAD_NAME,
+            "total": None,
+            "processed": 0,
+            "failed_rows": 0,
+            "results_bytes": 0,
+            "chunks": [],
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._write_state(job_dir, state)
+        self._prune()
+        self._schedule(job_id)
+        return state
+
+    def submit_path(self, path: str) -> dict:
+        source = resolve_input_path(path)
+        job_id, _ = self.create()
+        return self.submit(job_id, source_path=source)
+
+    def discard(self, job_id: str) -> None:
+        """Remove a job that was created but never submitted"""
+        shutil.rmtree(os.path.join(self.directory, job_id), ignore_errors=True)
+
+    # -------------------------
+    # Worker pool
+    # -------------------------
+    def start(self) -> None:
+        """Start the pool and resume every unfinished job on disk"""
+        self._stop.clear()
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return
+        for job_id in names:
+            job_dir = self.job_dir(job_id)
+            if job_dir is None:
+                continue
+            try:
+                if self._read_state(job_dir)["state"] not in FINISHED:
+                    self._schedule(job_id)
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def stop(self) -> None:
+        """Stop after the current chunks; unfinished jobs resume on next start"""
+        self._stop.set()
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _schedule(self, job_id: str) -> None:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="analysis-job")
+            self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        job_dir = os.path.join(self.directory, job_id)
+        with open(os.path.join(job_dir, LOCK_NAME), "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker process owns this job
+                    return
+
+            state = self._read_state(job_dir)
+            if state["state"] in FINISHED:
+                return
+
+            self._active.add(job_id)
+            try:
+                self._process(job_dir, state)
+            except Exception as e:
+                state.update(state=FAILED, error=f"{type(e).__name__}: {e}",
+                             finished_at=datetime.now().isoformat())
+                self._write_state(job_dir, state)
+            finally:
+                self._active.discard(job_id)
+
+    def _process(self, job_dir: str, state: dict) -> None:
+        state.update(state=RUNNING, started_at=state["started_at"] or datetime.now().isoformat())
+        self._write_state(job_dir, state)
+
+        input_path = os.path.join(job_dir, INPUT_NAME)
+        if not os.path.exists(input_path):
+            source = os.path.join(job_dir, state["source"])
+            state["total"] = _build_input(source, input_path)
+            if state["source"] == UPLOAD_NAME:
+                os.remove(source)
+            self._write_state(job_dir, state)
+        elif state["total"] is None:
+            # Crashed after input.jsonl was built but before its size was recorded
+            state["total"] = _count_lines(input_path)
+            upload_path = os.path.join(job_dir, UPLOAD_NAME)
+            if state["source"] == UPLOAD_NAME and os.path.exists(upload_path):
+                os.remove(upload_path)
+            self._write_state(job_dir, state)
+
+        results_path = os.path.join(job_dir, RESULTS_NAME)
+        with open(input_path, "rb") as cars_in, open(results_path, "ab+") as results_out:
+            # Drop whatever was written after the last committed chunk
+            results_out.truncate(state["results_bytes"])
+
+            for _ in range(state["processed"]):
+                cars_in.readline()
+
+            while not self._stop.is_set():
+                chunk = []
+                for line in cars_in:
+                    chunk.append(json.loads(line))
+                    if len(chunk) >= self.chunk_size:
+                        break
+                if not chunk:
+                    break
+
+                lines, failed = _encode_chunk(chunk, state["processed"])
+                results_out.write(lines)
+                results_out.flush()
+                os.fsync(results_out.fileno())
+
+                state["chunks"].append([state["processed"], state["results_bytes"]])
+                state["processed"] += len(chunk)
+                state["failed_rows"] = state.get("failed_rows", 0) + failed
+                state["results_bytes"] = results_out.tell()
+                self._write_state(job_dir, state)
+
+        if state["processed"] >= state["total"]:
+            state.update(state=DONE, finished_at=datetime.now().isoformat())
+            self._write_state(job_dir, state)
+
+    def _prune(self) -> None:
+        """Delete the oldest finished jobs beyond `keep`"""
+        if self.keep <= 0:
+            return
+        finished = []
+        for job_id in sorted(os.listdir(self.directory)):
+            job_dir = self.job_dir(job_id)
+            if job_dir is None:
+                continue
+            try:
+                if self._read_state(job_dir)["state"] in FINISHED:
+                    finished.append(job_dir)
+            except (OSError, ValueError, KeyError):
+                continue
+        for job_dir in finished[:-self.keep]:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def status(self, job_id: str) -> Optional[dict]:
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        state = self._read_state(job_dir)
+        total = state["total"]
+        if total:
+            progress = round(state["processed"] / total, 4)
+        else:
+            progress = 1.0 if state["state"] == DONE else 0.0
+        return {
+            "job_id": state["job_id"],
+            "state": state["state"],
+            "total": total,
+            "processed": state["processed"],
+            "failed_rows": state.get("failed_rows", 0),
+            "progress": progress,
+            "chunks": len(state["chunks"]),
+            "results_bytes": state["results_bytes"],
+            "error": state["error"],
+            "created_at": state["created_at"],
+            "started_at": state["started_at"],
+            "finished_at": state["finished_at"],
+            "updated_at": state["updated_at"],
+        }
+
+    def results_path(self, job_id: str) -> Optional[str]:
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        return os.path.join(job_dir, RESULTS_NAME)
+
+    def page(self, job_id: str, offset: int = 0, limit: int = 100) -> Optional[bytes]:
+        """
+        JSON page of committed result rows, built from the stored lines
+        without decoding them.
+        """
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        state = self._read_state(job_dir)
+        available = state["processed"]
+        limit = max(0, min(limit, PAGE_LIMIT, available - offset))
+
+        lines: List[bytes] = []
+        if limit:
+            # Start at the chunk containing `offset`
+            starts = [first for first, _ in state["chunks"]]
+            first_row, position = state["chunks"][bisect.bisect_right(starts, offset) - 1]
+            with open(os.path.join(job_dir, RESULTS_NAME), "rb") as f:
+                f.seek(position)
+                for _ in range(offset - first_row):
+                    f.readline()
+                for _ in range(limit):
+                    lines.append(f.readline().rstrip(b"\n"))
+
+        next_offset = offset + len(lines)
+        if state["state"] in FINISHED and next_offset >= available:
+            next_offset = None
+        header = {
+            "job_id": job_id,
+            "state": state["state"],
+            "offset": offset,
+            "limit": len(lines),
+            "available": available,
+            "total": state["total"],
+            "next_offset": next_offset,
+        }
+        return (fast_json.dumps(header)[:-1] + b',"results":['
+                + b",".join(lines) + b"]}")
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "chunk_size": self.chunk_size,
+                "running": sorted(self._active)}
+
+
+job_manager = JobManager()
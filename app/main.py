@@ -1,20 +1,66 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import signal
+import threading
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
-from app.routes import router  
-from app.models import *  
+from app.routes import router
+from app.admission import ADMISSION_ENABLED, AdmissionMiddleware, admission_status
+from app.ai_calculations import live_model, prediction_cache, shadow
+from app.catalog import snapshot_status
+from app.jobs import job_manager
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.profiling import PROFILING_ENABLED, ProfilingMiddleware, authorized, profile_path
+from app.warmup import DEFAULT_STEPS, STARTUP_WARMUP, Readiness
 
 # Load environment variables
 load_dotenv()
 
+# Liveness = the process answers; readiness = startup warm-up finished
+readiness = Readiness()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load + warm the model and the top-deals catalog, then watch the
+    # registry for new versions (see app/warmup.py)
+    if STARTUP_WARMUP == "blocking":
+        readiness.run(DEFAULT_STEPS)
+        live_model.start()
+    elif STARTUP_WARMUP == "off":
+        readiness.mark_ready()
+        live_model.start()
+    else:
+        readiness.start_background(DEFAULT_STEPS, on_done=live_model.start)
+
+    # Resume analysis jobs a previous run left unfinished
+    job_manager.start()
+
+    # `kill -HUP <pid>` checks the registry immediately
+    if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGHUP, lambda *_: live_model.refresh())
+
+    yield
+    job_manager.stop()
+    live_model.stop()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Car Price Analysis API",
     description="API for analyzing car prices and providing buy recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Bounded concurrency + queueing per endpoint class (429 / 503 when full);
+# added first so CORS and metrics wrap the rejections
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +70,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency / status counters and handler stage timers
+app.add_middleware(MetricsMiddleware)
+
+# Opt-in request profiling (X-Profile header / ?profile= / sampling)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 @app.get("/")
 async def root():
     return {
@@ -42,10 +95,49 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
+        "readiness": readiness.status(),
         "openai_key_set": bool(os.getenv("OPENAI_API_KEY")),
-        "thordata_key_set": bool(os.getenv("THORDATA_API_KEY"))
+        "thordata_key_set": bool(os.getenv("THORDATA_API_KEY")),
+        "model": live_model.status(),
+        "catalog": snapshot_status(),
+        "admission": admission_status(),
+        "jobs": job_manager.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "shadow": shadow.stats()
     }
 
-# Import and include routes
-from app.routes import router
-app.include_router(router)
\ No newline at end of file
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition"""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+async def get_profile(
+    profile_id: str,
+    x_profile: str = Header(None),
+    profile: str = Query(None),
+):
+    """Stored request profile (folded stacks or pstats)"""
+    if not PROFILING_ENABLED or not authorized(x_profile or profile):
+        raise HTTPException(404, "Not found")
+
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(404, "Profile not found")
+
+    if path.endswith(".folded"):
+        return FileResponse(path, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream",
+                        filename=os.path.basename(path))
+
+# Include routes
+app.include_router(router)
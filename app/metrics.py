@@ -0,0 +1,360 @@
+"""
+In-process metrics in Prometheus text format
+============================================
+Small, dependency-free counters / histograms / gauges plus an ASGI
+middleware that times every request by route template, and helpers
+handlers use for per-stage timers and batch sizes:
+
+    @timed_handler
+    async def analyze_cars(...):
+        observe_batch(len(cars))
+        with stage("normalize"):
+            ...
+
+Stage times are summed per request and observed once when the request
+finishes, under the matched route. "parse_validate" (request start ->
+handler start) and "serialize" (handler end -> response start) are
+derived by the middleware, so FastAPI's own body parsing and response
+encoding are covered without touching it.
+
+Cost per request is a few perf_counter() calls and dict updates; with
+no request context (scripts, tests) stage() is a no-op.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+# =========================
+# METRIC TYPES
+# =========================
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, *labels: str) -> Optional[dict]:
+        with self._lock:
+            series = self._series.get(labels)
+            series = list(series) if series else None
+        if series is None:
+            return None
+        return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackGauge:
+    """Gauge(s) read at scrape time: fn() -> {label tuple: value}"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], Dict[tuple, float]],
+                 labelnames: Sequence[str] = (), type_name: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self.type_name = type_name
+
+    def samples(self) -> Iterable[str]:
+        try:
+            values = self.fn()
+        except Exception:
+            return
+        for labels, value in sorted(values.items()):
+            if value is None:
+                continue
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, fn, labelnames: Sequence[str] = (),
+                       type_name: str = "gauge") -> CallbackGauge:
+        return self.register(CallbackGauge(name, help_text, fn, labelnames, type_name))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter(
+    "car_api_requests_total", "HTTP requests by route, method and status",
+    ("route", "method", "status"),
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    "car_api_request_duration_seconds", "HTTP request latency by route",
+    ("route", "method"), LATENCY_BUCKETS,
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "car_api_stage_duration_seconds", "Time per request spent in each handler stage",
+    ("route", "stage"), STAGE_BUCKETS,
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "car_api_batch_size", "Cars per request", ("route",), BATCH_BUCKETS,
+)
+CACHE_EVENTS = REGISTRY.counter(
+    "car_api_cache_events_total", "Cache lookups by cache and result (hit / miss / ...)",
+    ("cache", "result"),
+)
+MODEL_LOADS = REGISTRY.counter(
+    "car_api_model_loads_total", "Model loads by kind and result (ok / error)",
+    ("kind", "result"),
+)
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    "car_api_singleflight_calls_total",
+    "Deduplicated computations by flight and role (leader runs it / shared awaits it)",
+    ("flight", "role"),
+)
+ADMISSION_QUEUE_WAIT = REGISTRY.histogram(
+    "car_api_admission_queue_wait_seconds", "Time admitted requests waited for a slot",
+    ("endpoint_class",), LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "car_api_admission_rejections_total",
+    "Requests shed by endpoint class and reason (queue_full -> 429 / deadline -> 503)",
+    ("endpoint_class", "reason"),
+)
+
+_in_flight = {"value": 0}
+REGISTRY.gauge_callback(
+    "car_api_requests_in_flight", "Requests currently being handled",
+    lambda: {(): _in_flight["value"]},
+)
+
+
+# =========================
+# REQUEST CONTEXT
+# =========================
+class RequestMetrics:
+    __slots__ = ("started", "handler_started", "handler_finished", "stages", "batch_size")
+
+    def __init__(self, started: float):
+        self.started = started
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.batch_size: Optional[int] = None
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+class stage:
+    """Accumulate time spent in a named stage of the current request"""
+
+    __slots__ = ("name", "_request", "_started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._request = _current.get()
+        if self._request is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        request = self._request
+        if request is not None:
+            elapsed = time.perf_counter() - self._started
+            request.stages[self.name] = request.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+def observe_batch(size: int) -> None:
+    request = _current.get()
+    if request is not None:
+        request.batch_size = size
+
+
+def record_queue_wait(seconds: float) -> None:
+    """Admission queue wait, reported as the "queue" stage (not parse_validate)"""
+    request = _current.get()
+    if request is not None:
+        request.stages["queue"] = seconds
+
+
+def timed_handler(fn):
+    """Mark handler start / end so parse and serialize time can be derived"""
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        request = _current.get()
+        if request is None:
+            return await fn(*args, **kwargs)
+        # Nested handler calls (/ai/analyze) keep the outer start
+        if request.handler_started is None:
+            request.handler_started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            request.handler_finished = time.perf_counter()
+    return wrapper
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task / body copies)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = RequestMetrics(time.perf_counter())
+        token = _current.set(request)
+        state = {"status": 500, "response_started": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["response_started"] = time.perf_counter()
+            await send(message)
+
+        _in_flight["value"] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight["value"] -= 1
+            _current.reset(token)
+            self._record(scope, request, state)
+
+    @staticmethod
+    def _record(scope, request: RequestMetrics, state: dict) -> None:
+        finished = time.perf_counter()
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_ROUTE
+        method = scope.get("method", "")
+
+        REQUESTS.inc(path, method, str(state["status"]))
+        REQUEST_DURATION.observe(finished - request.started, path, method)
+
+        stages = request.stages
+        if request.handler_started is not None:
+            stages["parse_validate"] = (request.handler_started - request.started
+                                        - stages.get("queue", 0.0))
+            if request.handler_finished is not None and state["response_started"] is not None:
+                # Added to any encoding the handler timed itself
+                stages["serialize"] = (stages.get("serialize", 0.0)
+                                       + state["response_started"] - request.handler_finished)
+        for name, seconds in stages.items():
+            STAGE_DURATION.observe(seconds, path, name)
+
+        if request.batch_size is not None:
+            BATCH_SIZE.observe(request.batch_size, path)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,372 @@
+"""
+Self-contained ML price model bundle
+====================================
+One versioned artifact holding everything needed to go from car
+records to a price: the estimator, the brand / fuel encoders, the
+feature order, the training reference year and the training metrics.
+
+Training (scripts/test_ml_model.py) and serving (predict_car_price_ml)
+both build features through ModelBundle.transform(), so they can never
+drift apart.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import joblib
+import numpy as np
+
+# Bump when the feature pipeline changes in a way old bundles can't serve
+BUNDLE_FORMAT_VERSION = 1
+
+FEATURES = [
+    "brand_encoded",
+    "age",
+    "mileage_numeric",
+    "fuel_encoded",
+    "mileage_per_year",
+]
+
+# Typed technical fields stored at ingest (app.parsing.SPEC_FIELDS), used
+# as-is (missing -> 0). Opt-in (train_model_bundle(technical_features=True)):
+# the API's normalized cars and CarInput records don't carry them, so a
+# model trained on them would see zeros for every served car
+TECHNICAL_FEATURES = [
+    "power_kw",
+    "engine_cc",
+    "weight_kg",
+    "consumption_l_100km",
+    "gears_numeric",
+    "previous_owners_numeric",
+]
+MIN_FEATURE_COVERAGE = 0.5
+
+# Record fields the feature pipeline reads
+INPUT_COLUMNS = ["brand", "year_numeric", "mileage_numeric", "fuel_type"]
+REQUIRED_TRAINING_COLUMNS = INPUT_COLUMNS + ["price_numeric"]
+
+# Code for brands / fuel types never seen during training
+UNKNOWN_CODE = -1
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def records_to_columns(
+    records: Iterable[dict],
+    fields: Sequence[str] = INPUT_COLUMNS + TECHNICAL_FEATURES,
+) -> Dict[str, list]:
+    """Row dicts -> {field: list of values}"""
+    records = list(records)
+    return {field: [r.get(field) for r in records] for field in fields}
+
+
+class _CategoryEncoder:
+    """
+    Vectorized string -> integer code lookup.
+    Keeps the training-time codes; unknown values map to UNKNOWN_CODE.
+    """
+
+    def __init__(self, mapping: Dict[str, int]):
+        self.mapping = dict(mapping)
+        keys = sorted(self.mapping)
+        self._keys = np.array(keys, dtype=object)
+        self._codes = np.array([self.mapping[k] for k in keys], dtype=np.float64)
+
+    def encode(self, values: Sequence) -> np.ndarray:
+        values = np.array(
+            ["" if _is_missing(v) else str(v) for v in values], dtype=object
+        )
+        if not len(self._keys):
+            return np.full(len(values), UNKNOWN_CODE, dtype=np.float64)
+
+        pos = np.searchsorted(self._keys, values)
+        pos = np.clip(pos, 0, len(self._keys) - 1)
+        found = self._keys[pos] == values
+        return np.where(found, self._codes[pos], UNKNOWN_CODE)
+
+    def __getstate__(self):
+        return {"mapping": self.mapping}
+
+    def __setstate__(self, state):
+        self.__init__(state["mapping"])
+
+
+class ModelBundle:
+    """
+    Estimator + feature pipeline, saved and loaded as one joblib file.
+
+    Usage:
+        bundle = train_model_bundle(cars)
+        bundle.save(ML_MODEL_PATH)
+
+        bundle = ModelBundle.load(ML_MODEL_PATH)
+        bundle.predict(records_to_columns(cars))
+    """
+
+    def __init__(
+        self,
+        estimator,
+        brand_map: Dict[str, int],
+        fuel_map: Dict[str, int],
+        reference_year: int,
+        feature_names: Optional[List[str]] = None,
+        metrics: Optional[dict] = None,
+        trained_at: Optional[str] = None,
+        version: Optional[str] = None,
+    ):
+        self.format_version = BUNDLE_FORMAT_VERSION
+        self.estimator = estimator
+        self.brand_map = dict(brand_map)
+        self.fuel_map = dict(fuel_map)
+        self.reference_year = int(reference_year)
+        self.feature_names = list(feature_names or FEATURES)
+        self.metrics = dict(metrics or {})
+        self.trained_at = trained_at or datetime.now().isoformat()
+        self.version = version or self._default_version()
+
+        self._brand_encoder = _CategoryEncoder(self.brand_map)
+        self._fuel_encoder = _CategoryEncoder(self.fuel_map)
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Record fields transform() reads for this bundle's features"""
+        return INPUT_COLUMNS + [f for f in self.feature_names if f in TECHNICAL_FEATURES]
+
+    def _default_version(self) -> str:
+        digest = hashlib.sha1(
+            repr((sorted(self.brand_map.items()), sorted(self.fuel_map.items()),
+                  self.reference_year, self.trained_at)).encode("utf-8")
+        ).hexdigest()[:8]
+        stamp = self.trained_at[:19].replace("-", "").replace(":", "")
+        return f"{stamp}-{digest}"
+
+    # =========================
+    # FEATURES
+    # =========================
+    def transform(self, columns: Dict[str, Sequence]) -> np.ndarray:
+        """
+        Build the feature matrix (rows x feature_names) in one vectorized
+        pass. Missing year -> age 1, missing mileage / technical field -> 0,
+        unknown category -> -1.
+        """
+        years = np.array(
+            [np.nan if _is_missing(y) else float(y) for y in columns["year_numeric"]],
+            dtype=np.float64,
+        )
+        mileage = np.array(
+            [0.0 if _is_missing(m) else float(m) for m in columns["mileage_numeric"]],
+            dtype=np.float64,
+        )
+
+        age = np.where(np.isnan(years), 1.0, self.reference_year - years)
+        age = np.maximum(age, 1.0)
+
+        features = {
+            "brand_encoded": self._brand_encoder.encode(columns["brand"]),
+            "age": age,
+            "mileage_numeric": mileage,
+            "fuel_encoded": self._fuel_encoder.encode(columns["fuel_type"]),
+            "mileage_per_year": mileage / age,
+        }
+        for name in self.feature_names:
+            if name in TECHNICAL_FEATURES:
+                features[name] = np.array(
+                    [0.0 if _is_missing(v) else float(v)
+                     for v in columns.get(name) or [None] * len(years)],
+                    dtype=np.float64,
+                )
+
+        return np.column_stack([features[name] for name in self.feature_names])
+
+    def predict(self, columns: Dict[str, Sequence]) -> np.ndarray:
+        """Predicted prices, never negative"""
+        X = self.transform(columns)
+        if not len(X):
+            return np.zeros(0)
+        return np.maximum(self.estimator.predict(X), 0)
+
+    def extend_encoders(self, cars: Iterable[dict]) -> int:
+        """
+        Give unseen brands / fuel types new codes (existing codes never
+        change, so trees fitted earlier stay valid). Returns how many
+        values were added.
+        """
+        added = 0
+        for car in cars:
+            for field, mapping in (("brand", self.brand_map),
+                                   ("fuel_type", self.fuel_map)):
+                value = car.get(field)
+                if not _is_missing(value) and str(value) not in mapping:
+                    mapping[str(value)] = len(mapping)
+                    added += 1
+
+        if added:
+            self._brand_encoder = _CategoryEncoder(self.brand_map)
+            self._fuel_encoder = _CategoryEncoder(self.fuel_map)
+        return added
+
+    def refresh_version(self) -> None:
+        """New trained_at / version after the estimator was updated"""
+        self.trained_at = datetime.now().isoformat()
+        self.version = self._default_version()
+
+    def metadata(self) -> dict:
+        return {
+            "version": self.version,
+            "format_version": self.format_version,
+            "estimator": type(self.estimator).__name__,
+            "feature_names": self.feature_names,
+            "reference_year": self.reference_year,
+            "trained_at": self.trained_at,
+            "metrics": self.metrics,
+            "n_brands": len(self.brand_map),
+            "n_fuel_types": len(self.fuel_map),
+        }
+
+    # =========================
+    # PERSISTENCE
+    # =========================
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_brand_encoder", None)
+        state.pop("_fuel_encoder", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._brand_encoder = _CategoryEncoder(self.brand_map)
+        self._fuel_encoder = _CategoryEncoder(self.fuel_map)
+
+    def save(self, path: str) -> None:
+        """Write atomically so readers never see a half-written file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ModelBundle":
+        bundle = joblib.load(path)
+
+        if not isinstance(bundle, cls):
+            raise ValueError(
+                f"{path} is not a model bundle; retrain with scripts/test_ml_model.py"
+            )
+        if bundle.format_version != BUNDLE_FORMAT_VERSION:
+            raise ValueError(
+                f"{path} has bundle format {bundle.format_version}, "
+                f"expected {BUNDLE_FORMAT_VERSION}; retrain the model"
+            )
+        return bundle
+
+
+# =========================
+# TRAINING
+# =========================
+def filter_training_records(cars: Iterable[dict]) -> List[dict]:
+    """Rows with every field the model needs"""
+    return [
+        car for car in cars
+        if all(not _is_missing(car.get(f)) for f in REQUIRED_TRAINING_COLUMNS)
+    ]
+
+
+def select_features(cars: Sequence[dict]) -> List[str]:
+    """FEATURES + the technical features at least MIN_FEATURE_COVERAGE of rows have"""
+    selected = list(FEATURES)
+    for name in TECHNICAL_FEATURES:
+        present = sum(1 for car in cars if not _is_missing(car.get(name)))
+        if cars and present / len(cars) >= MIN_FEATURE_COVERAGE:
+            selected.append(name)
+    return selected
+
+
+def build_encoders(cars: Sequence[dict]):
+    """Brand / fuel codes in first-seen order"""
+    brand_map: Dict[str, int] = {}
+    fuel_map: Dict[str, int] = {}
+    for car in cars:
+        brand_map.setdefault(str(car["brand"]), len(brand_map))
+        fuel_map.setdefault(str(car["fuel_type"]), len(fuel_map))
+    return brand_map, fuel_map
+
+
+def evaluate(estimator, X: np.ndarray, y: np.ndarray) -> dict:
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    y_pred = estimator.predict(X)
+    return {
+        "mae": float(mean_absolute_error(y, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y, y_pred))),
+        "r2": float(r2_score(y, y_pred)) if len(y) > 1 else 0.0,
+        "n_test": int(len(y)),
+    }
+
+
+def default_estimator():
+    from sklearn.ensemble import RandomForestRegressor
+
+    return RandomForestRegressor(
+        n_estimators=120,
+        max_depth=10,
+        random_state=42,
+        n_jobs=-1
+    )
+
+
+def train_model_bundle(
+    cars: Iterable[dict],
+    estimator=None,
+    reference_year: Optional[int] = None,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    feature_names: Optional[List[str]] = None,
+    technical_features: bool = False,
+    fit_all: bool = False,
+) -> ModelBundle:
+    """
+    Fit an estimator on clean car records and return it as a bundle.
+    Metrics are computed on a held-out split (the full data for tiny sets);
+    with `fit_all` the saved estimator is then refitted on every row.
+    Features default to FEATURES, or select_features(cars) with
+    `technical_features` (only for models served with ingested records).
+    """
+    from sklearn.model_selection import train_test_split
+
+    cars = filter_training_records(cars)
+    if not cars:
+        raise ValueError("No complete car records to train on")
+
+    brand_map, fuel_map = build_encoders(cars)
+    bundle = ModelBundle(
+        estimator if estimator is not None else default_estimator(),
+        brand_map,
+        fuel_map,
+        reference_year or datetime.now().year,
+        feature_names=feature_names or (
+            select_features(cars) if technical_features else FEATURES
+        ),
+    )
+
+    X = bundle.transform(records_to_columns(cars))
+    y = np.array([float(car["price_numeric"]) for car in cars])
+
+    if len(cars) < 5:
+        X_train, X_test, y_train, y_test = X, X, y, y
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, random_state=random_state
+        )
+
+    bundle.estimator.fit(X_train, y_train)
+    bundle.metrics = {**evaluate(bundle.estimator, X_test, y_test),
+                      "n_train": int(len(y_train))}
+
+    if fit_all and len(y_train) < len(y):
+        bundle.estimator.fit(X, y)
+        bundle.metrics["n_train"] = int(len(y))
+    return bundle
@@ -0,0 +1,324 @@
+"""
+Local versioned model registry with atomic hot swap
+===================================================
+Layout:
+
+    data/ml_models/registry/
+        current.json                 {"version", "previous", "activated_at"}
+        versions/<version>/
+            model.joblib             ModelBundle
+            compiled/                flattened ensemble (if supported)
+            metadata.json
+
+Publishing writes a complete version directory under a temp name and
+renames it into place; activating rewrites current.json atomically.
+
+LiveModel is what the API serves from. A background thread watches
+current.json (or is woken by SIGHUP / refresh()), loads and warms the
+new version off the request path, then swaps one reference. Requests
+always see either the old or the new model, never a half-loaded one.
+The previously active model stays in memory, so rolling back to it is
+a pointer swap.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+
+from app.metrics import MODEL_LOADS
+
+# numpy / joblib / sklearn are imported when a model is actually loaded,
+# so processes that never predict don't pay for them at import time
+if TYPE_CHECKING:
+    from app.model_bundle import ModelBundle
+    from app.tree_ensemble import CompiledEnsemble
+
+# =========================
+# PROJECT PATHS
+# =========================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.path.join(BASE_DIR, "data", "ml_models", "registry")
+
+DEFAULT_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "10"))
+
+# Batches up to this size use the flattened NumPy ensemble when it matches
+# the loaded model; bigger batches are faster through sklearn itself
+COMPILED_MAX_ROWS = 256
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# =========================
+# REGISTRY (ON DISK)
+# =========================
+class ModelRegistry:
+    """
+    Usage:
+        registry = ModelRegistry()
+        version = registry.publish(bundle, activate=True)
+        registry.rollback()
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.pointer_path = os.path.join(root, "current.json")
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def publish(self, bundle: "ModelBundle", activate: bool = False) -> str:
+        """Store the bundle (+ compiled arrays) as a new version"""
+        from app.tree_ensemble import export_ensemble
+
+        version = bundle.version
+        final_dir = self.version_dir(version)
+
+        if not os.path.exists(final_dir):
+            tmp_dir = f"{final_dir}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            bundle.save(os.path.join(tmp_dir, "model.joblib"))
+
+            metadata = {**bundle.metadata(), "published_at": datetime.now().isoformat()}
+            try:
+                export_ensemble(bundle.estimator, os.path.join(tmp_dir, "compiled"),
+                                extra_meta={"model_version": version})
+                metadata["compiled"] = True
+            except ValueError as e:
+                metadata["compiled"] = False
+                metadata["compile_error"] = str(e)
+
+            _write_json_atomic(os.path.join(tmp_dir, "metadata.json"), metadata)
+            os.replace(tmp_dir, final_dir)
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def versions(self) -> List[dict]:
+        """Metadata of every published version, newest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+
+        found = []
+        for name in os.listdir(self.versions_dir):
+            meta_path = os.path.join(self.versions_dir, name, "metadata.json")
+            if name.endswith(".tmp") or not os.path.exists(meta_path):
+                continue
+            with open(meta_path, "r", encoding="utf-8") as f:
+                found.append(json.load(f))
+
+        found.sort(key=lambda m: m.get("published_at", ""), reverse=True)
+        return found
+
+    def pointer(self) -> dict:
+        if not os.path.exists(self.pointer_path):
+            return {}
+        with open(self.pointer_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def current_version(self) -> Optional[str]:
+        return self.pointer().get("version")
+
+    def activate(self, version: str) -> dict:
+        if not os.path.exists(os.path.join(self.version_dir(version), "metadata.json")):
+            raise ValueError(f"Model version {version} is not in the registry")
+
+        pointer = self.pointer()
+        if pointer.get("version") == version:
+            return pointer
+
+        pointer = {
+            "version": version,
+            "previous": pointer.get("version"),
+            "activated_at": datetime.now().isoformat(),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        _write_json_atomic(self.pointer_path, pointer)
+        return pointer
+
+    def rollback(self) -> dict:
+        previous = self.pointer().get("previous")
+        if not previous:
+            raise ValueError("No previous model version to roll back to")
+        return self.activate(previous)
+
+    def load(self, version: str) -> "LoadedModel":
+        from app.model_bundle import ModelBundle
+        from app.tree_ensemble import CompiledEnsemble, resolve_compiled_dir
+
+        path = self.version_dir(version)
+        bundle = ModelBundle.load(os.path.join(path, "model.joblib"))
+
+        compiled = None
+        compiled_dir = os.path.join(path, "compiled")
+        if resolve_compiled_dir(compiled_dir) is not None:
+            compiled = CompiledEnsemble.load(compiled_dir, mmap=True)
+            if compiled.version != bundle.version:
+                compiled = None
+
+        return LoadedModel(bundle, compiled)
+
+
+# =========================
+# SERVING
+# =========================
+class LoadedModel:
+    """A fully loaded, warmed-up model version"""
+
+    def __init__(self, bundle: "ModelBundle", compiled: Optional["CompiledEnsemble"] = None):
+        self.bundle = bundle
+        self.compiled = compiled
+        self.version = bundle.version
+        self.loaded_at = datetime.now().isoformat()
+
+    def predict_features(self, X, compiled_max_rows: int = COMPILED_MAX_ROWS) -> List[float]:
+        """Predictions (never negative) for an already transformed matrix"""
+        if self.compiled is not None and len(X) <= compiled_max_rows:
+            predicted = self.compiled.predict(X)
+        else:
+            predicted = self.bundle.estimator.predict(X)
+
+        return [max(0.0, float(p)) for p in predicted]
+
+    def warm_up(self) -> float:
+        """
+        Run a few predictions so lazy initialisation, page faults on the
+        memory-mapped arrays and first-call overheads happen here instead
+        of in a request. Returns seconds spent.
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        bundle = self.bundle
+        brands = list(bundle.brand_map)[:32] or [None]
+        fuel = next(iter(bundle.fuel_map), None)
+        columns = {
+            "brand": brands,
+            "year_numeric": [bundle.reference_year - 3] * len(brands),
+            "mileage_numeric": [60000] * len(brands),
+            "fuel_type": [fuel] * len(brands),
+        }
+        X = bundle.transform(columns)
+
+        bundle.estimator.predict(X[:1])
+        bundle.estimator.predict(X)
+        if self.compiled is not None:
+            for name in ("feature", "threshold", "left", "right", "value", "missing_left"):
+                np.asarray(getattr(self.compiled, name)).sum()
+            self.compiled.predict(X[:1])
+            self.compiled.predict(X)
+
+        return time.perf_counter() - started
+
+
+class LiveModel:
+    """
+    The model the API is serving right now.
+
+    current() is a plain attribute read; all loading happens in the
+    watcher thread (or once, synchronously, on first use).
+    """
+
+    def __init__(self, registry: Optional[ModelRegistry] = None,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.registry = registry or ModelRegistry()
+        self.poll_seconds = poll_seconds
+
+        self._active: Optional[LoadedModel] = None
+        self._previous: Optional[LoadedModel] = None
+        self._checked = False
+        self._load_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self.last_warm_up_seconds: Optional[float] = None
+
+    def current(self) -> Optional[LoadedModel]:
+        """Active model, or None when the registry has no current version"""
+        if not self._checked:
+            self.sync()
+        return self._active
+
+    def sync(self) -> bool:
+        """Load + swap to the version current.json points at. True if swapped."""
+        with self._load_lock:
+            self._checked = True
+            try:
+                target = self.registry.current_version()
+                active = self._active
+
+                if target is None or (active is not None and active.version == target):
+                    return False
+
+                previous = self._previous
+                if previous is not None and previous.version == target:
+                    # Rollback: already loaded and warm
+                    loaded = previous
+                else:
+                    loaded = self.registry.load(target)
+                    self.last_warm_up_seconds = round(loaded.warm_up(), 4)
+                    MODEL_LOADS.inc("registry", "ok")
+
+                self._previous = active
+                self._active = loaded
+                self.swaps += 1
+                self.last_error = None
+                return True
+            except Exception as e:
+                # Keep serving the model we have
+                MODEL_LOADS.inc("registry", "error")
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+
+    def refresh(self) -> None:
+        """Ask the watcher to check now (safe to call from a signal handler)"""
+        self._wake.set()
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.sync()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> dict:
+        active, previous = self._active, self._previous
+        return {
+            "version": active.version if active else None,
+            "previous": previous.version if previous else None,
+            "compiled": bool(active and active.compiled is not None),
+            "loaded_at": active.loaded_at if active else None,
+            "swaps": self.swaps,
+            "last_warm_up_seconds": self.last_warm_up_seconds,
+            "last_error": self.last_error,
+            "watching": bool(self._thread and self._thread.is_alive()),
+        }
@@ -0,0 +1,274 @@
+"""
+Parallel, time-budgeted model search for the price model
+========================================================
+Cross-validates random forest and histogram gradient boosting configs
+in a process pool (one (config, fold) job per task, all cores, one
+thread per worker), stops
+scheduling when the wall-clock budget runs out, then measures
+single-row prediction latency (p50/p99) and pickled size of each
+finished config.
+
+The selected model is the lowest-MAE config whose p99 single-row
+latency meets the SLO.
+"""
+
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import product
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.model_bundle import (
+    ModelBundle,
+    build_encoders,
+    filter_training_records,
+    records_to_columns,
+)
+
+DEFAULT_BUDGET_SECONDS = 300
+DEFAULT_P99_SLO_MS = 20.0
+DEFAULT_FOLDS = 5
+LATENCY_SAMPLES = 200
+
+
+# =========================
+# SEARCH SPACE
+# =========================
+def candidate_configs() -> List[dict]:
+    """Model family + constructor params. n_jobs=1: parallelism is per job."""
+    configs = []
+
+    for n_estimators, max_depth, min_samples_leaf in product(
+        (60, 120, 240), (6, 10, None), (1, 3)
+    ):
+        configs.append({
+            "family": "random_forest",
+            "params": {
+                "n_estimators": n_estimators,
+                "max_depth": max_depth,
+                "min_samples_leaf": min_samples_leaf,
+                "random_state": 42,
+                "n_jobs": 1,
+            },
+        })
+
+    for max_iter, learning_rate, max_leaf_nodes in product(
+        (100, 300), (0.05, 0.1), (15, 31)
+    ):
+        configs.append({
+            "family": "hist_gradient_boosting",
+            "params": {
+                "max_iter": max_iter,
+                "learning_rate": learning_rate,
+                "max_leaf_nodes": max_leaf_nodes,
+                "random_state": 42,
+            },
+        })
+
+    return configs
+
+
+def build_estimator(config: dict):
+    if config["family"] == "random_forest":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(**config["params"])
+    if config["family"] == "hist_gradient_boosting":
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        return HistGradientBoostingRegressor(**config["params"])
+    raise ValueError(f"Unknown model family: {config['family']}")
+
+
+def config_label(config: dict) -> str:
+    params = ", ".join(
+        f"{k}={v}" for k, v in config["params"].items()
+        if k not in ("random_state", "n_jobs")
+    )
+    return f"{config['family']}({params})"
+
+
+# =========================
+# WORKERS
+# =========================
+# Training data, set once per worker process by the pool initializer
+_worker_data: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    # One job per core already: gradient boosting's OpenMP pool (and BLAS)
+    # would otherwise start a thread per core in every worker and skew the
+    # fold timings. The env var covers spawned workers, threadpoolctl the
+    # runtimes a forked worker inherited already loaded
+    os.environ["OMP_NUM_THREADS"] = "1"
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+
+
+def _run_fold(config_index: int, config: dict, train_idx, test_idx) -> dict:
+    X, y = _worker_data["X"], _worker_data["y"]
+
+    started = time.perf_counter()
+    estimator = build_estimator(config)
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - started
+
+    errors = np.abs(estimator.predict(X[test_idx]) - y[test_idx])
+    return {
+        "config_index": config_index,
+        "abs_error_sum": float(errors.sum()),
+        "n": int(len(test_idx)),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def _fit_full(config_index: int, config: dict) -> dict:
+    estimator = build_estimator(config)
+    estimator.fit(_worker_data["X"], _worker_data["y"])
+    return {"config_index": config_index, "model": pickle.dumps(estimator)}
+
+
+# =========================
+# MEASUREMENT
+# =========================
+def measure_latency(estimator, X: np.ndarray, samples: int = LATENCY_SAMPLES) -> dict:
+    """Single-row predict() latency in milliseconds"""
+    rows = X[np.arange(samples) % len(X)]
+    estimator.predict(rows[:1])  # warm up
+
+    timings = []
+    for i in range(samples):
+        started = time.perf_counter()
+        estimator.predict(rows[i:i + 1])
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p99_ms": round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+# =========================
+# SEARCH
+# =========================
+def prepare_features(cars: List[dict], reference_year: Optional[int] = None):
+    """Feature matrix built by the same pipeline the bundle serves with"""
+    cars = filter_training_records(cars)
+    if len(cars) < 2:
+        raise ValueError("Need at least 2 complete car records to search")
+
+    brand_map, fuel_map = build_encoders(cars)
+    pipeline = ModelBundle(None, brand_map, fuel_map,
+                           reference_year or datetime.now().year)
+    X = pipeline.transform(records_to_columns(cars))
+    y = np.array([float(c["price_numeric"]) for c in cars])
+    return X, y
+
+
+def search(
+    X: np.ndarray,
+    y: np.ndarray,
+    configs: Optional[List[dict]] = None,
+    budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+    p99_slo_ms: float = DEFAULT_P99_SLO_MS,
+    folds: int = DEFAULT_FOLDS,
+    workers: Optional[int] = None,
+) -> dict:
+    """
+    Run the search and return a report:
+    {"results": [...sorted by MAE...], "selected": {...} | None, ...}
+    """
+    from sklearn.model_selection import KFold
+
+    configs = configs if configs is not None else candidate_configs()
+    folds = max(2, min(folds, len(y)))
+    splits = list(KFold(folds, shuffle=True, random_state=42).split(X))
+    started = time.monotonic()
+    # Keep the last 20% of the budget for refitting the finished configs
+    cv_deadline = started + budget_seconds * 0.8
+    deadline = started + budget_seconds
+    workers = workers or os.cpu_count() or 1
+
+    fold_results: Dict[int, List[dict]] = {i: [] for i in range(len(configs))}
+    models: Dict[int, bytes] = {}
+    timed_out = False
+
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(X, y))
+    try:
+        # Config-major order, so early configs complete all their folds first
+        pending = {
+            pool.submit(_run_fold, i, config, train_idx, test_idx)
+            for i, config in enumerate(configs)
+            for train_idx, test_idx in splits
+        }
+
+        while pending:
+            remaining = cv_deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                for future in pending:
+                    future.cancel()
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                fold_results[result["config_index"]].append(result)
+
+        complete = [i for i, r in fold_results.items() if len(r) == len(splits)]
+
+        # Refit every fully cross-validated config on all data
+        refits = {pool.submit(_fit_full, i, configs[i]) for i in complete}
+        while refits:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            done, refits = wait(refits, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                models[result["config_index"]] = result["model"]
+    finally:
+        pool.shutdown(wait=not timed_out, cancel_futures=True)
+
+    results = []
+    for i in complete:
+        folds_done = fold_results[i]
+        entry = {
+            "config": configs[i],
+            "label": config_label(configs[i]),
+            "cv_mae": round(
+                sum(r["abs_error_sum"] for r in folds_done)
+                / sum(r["n"] for r in folds_done), 2
+            ),
+            "fit_seconds": round(sum(r["fit_seconds"] for r in folds_done) / len(folds_done), 3),
+        }
+
+        if i in models:
+            # Measured serially so configs don't compete for CPU
+            estimator = pickle.loads(models[i])
+            entry.update(measure_latency(estimator, X))
+            entry["size_bytes"] = len(models[i])
+            entry["meets_slo"] = entry["p99_ms"] <= p99_slo_ms
+
+        results.append(entry)
+
+    results.sort(key=lambda r: r["cv_mae"])
+    eligible = [r for r in results if r.get("meets_slo")]
+
+    return {
+        "searched_at": datetime.now().isoformat(),
+        "budget_seconds": budget_seconds,
+        "timed_out": timed_out,
+        "p99_slo_ms": p99_slo_ms,
+        "folds": len(splits),
+        "workers": workers,
+        "configs_total": len(configs),
+        "configs_completed": len(results),
+        "results": results,
+        "selected": eligible[0] if eligible else None,
+    }
@@ -114,6 +114,40 @@ class CarAnalysis(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+# =========================================================
+# PER-CAR ISOLATED BATCH RESPONSE (strict=false)
+# =========================================================
+class IndexedCarAnalysis(CarAnalysis):
+    """
+    Analysis row tagged with its position in the request body.
+    """
+
+    index: int
+
+
+class CarItemError(BaseModel):
+    """
+    One input car that failed; stage is "normalize", "analyze" or "serialize".
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    index: int
+    stage: str
+    error: str
+
+
+class CarAnalysisBatch(BaseModel):
+    """
+    /analyze-cars/ response with strict=false: analyzed cars plus per-car errors.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    results: List[IndexedCarAnalysis]
+    errors: List[CarItemError]
+
+
 
 # =========================================================
 # COMPARE MULTIPLE CARS REQUEST
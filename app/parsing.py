@@ -0,0 +1,291 @@
+"""
+Parsing raw scraped fields
+==========================
+One place for turning scraped strings into numbers, shared by the API
+(normalize_scraped_car) and the scripts (convert_scraped_data.py):
+
+    parse_price("€ 12.990,-")         -> 12990
+    parse_mileage("239,000 km")       -> 239000
+    parse_year("11/2015")             -> 2015
+    parse_power_kw("55 kW (75 hp)")   -> 55
+
+Technical fields (Power, Engine_size, Empty_weight, Fuel_consumption,
+Seats, Doors, Gears, Previous_owner) become typed columns once, at
+ingest, through parse_specs / spec_columns (SPEC_FIELDS):
+
+    parse_specs(car)  -> {"power_kw": 55, "power_hp": 75, "engine_cc": 1120,
+                          "weight_kg": 1197, "consumption_l_100km": 3.8,
+                          "seats_numeric": 5, ...}
+
+Parsers return None for anything they can't read ("N/A", "Price on
+request", "", None, ...) instead of raising. Locale variants go through
+parse_number: "12,990" / "12.990" / "12 990" / "12'990" are thousands,
+"12.990,50" / "12,990.50" / "3,8" have decimals.
+
+Batch API for whole columns (one field over many listings):
+
+    column = parse_column(prices, "price")
+    column.values    # float64 array, NaN where invalid
+    column.valid     # bool mask
+
+Scraped fields repeat a lot, so a batch parses each distinct string
+once. The usual scraper formats ("€ 3,950", "239,000 km", "11/2015")
+take a str.translate fast path before the precompiled patterns; it only
+accepts comma groups of exactly three digits, so "€ 12,50" still goes
+through parse_number. numpy is only imported by parse_column.
+"""
+
+import math
+import re
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+# A number as scrapers write it: space / apostrophe grouped thousands,
+# or digits separated by . and , (thousands or decimals, see _to_number)
+_NUMBER = re.compile(r"\d{1,3}(?:[ \u00a0\u202f']\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)*", re.ASCII)
+_SEPARATORS = re.compile(r"[.,]")
+_YEAR = re.compile(r"(?<!\d)(19\d{2}|20\d{2})(?!\d)", re.ASCII)
+_KW = re.compile(r"(\d+(?:[.,]\d+)?)\s*kw\b", re.ASCII | re.IGNORECASE)
+_HP = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:hp|bhp|ps|cv|ch)\b", re.ASCII | re.IGNORECASE)
+# Litres only: "kWh/100 km" (electric) and "kg/100 km" (CNG) don't match
+_LITRES_100KM = re.compile(r"(\d+(?:[.,]\d+)?)\s*l\s*/\s*100\s*km", re.ASCII | re.IGNORECASE)
+
+_GROUPING = str.maketrans("", "", " \u00a0\u202f'")
+_PRICE_NOISE = str.maketrans("", "", "€ \u00a0")
+_MILEAGE_NOISE = str.maketrans("", "", "km \u00a0")
+
+HP_PER_KW = 1.35962
+YEAR_MIN, YEAR_MAX = 1900, 2099
+
+_MISSING = object()
+
+
+# =========================
+# NUMBERS
+# =========================
+def _to_number(token: str) -> float:
+    """Digits with locale separators -> float"""
+    parts = _SEPARATORS.split(token.translate(_GROUPING))
+    if len(parts) == 1:
+        return float(parts[0])
+
+    head, tail = parts[:-1], parts[-1]
+    grouped = all(len(p) == 3 for p in parts[1:]) and 1 <= len(parts[0]) <= 3
+    if grouped and parts[0] != "0":
+        # 12,990 / 12.990 / 1.234.567 -> thousands
+        return float("".join(parts))
+    if len(tail) <= 2 and (len(parts) == 2 or all(len(p) == 3 for p in head[1:])):
+        # 3,8 / 12.990,50 / 12,990.50 -> decimal separator last
+        return float("".join(head) + "." + tail)
+    # Anything else ("5,9991"): the digits, as int(replace(",", "")) read it
+    return float("".join(parts))
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """First number in a scraped value (locale-aware), or None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else None
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER.search(value)
+    if match is None:
+        return None
+    return _to_number(match.group())
+
+
+def _round(number: Optional[float]) -> Optional[int]:
+    return None if number is None else int(round(number))
+
+
+def _grouped_int(digits: str) -> Optional[int]:
+    """
+    "3950" / "3,950" / "1,234,567" -> int; None for anything else, so
+    "12,50" is left to parse_number (a decimal comma, not 1250)
+    """
+    plain = digits.replace(",", "")
+    if not (plain.isdigit() and plain.isascii()):
+        return None
+    commas = len(digits) - len(plain)
+    # Every comma exactly 4, 8, ... characters from the end
+    if commas and digits[-4::-4] != "," * commas:
+        return None
+    return int(plain)
+
+
+# =========================
+# FIELDS
+# =========================
+def parse_price(value: Any) -> Optional[int]:
+    """Euros from "€ 3,950", "€ 12.990,-", "12 990 EUR", ..."""
+    if type(value) is str:
+        number = _grouped_int(value.translate(_PRICE_NOISE))
+        if number is not None:
+            return number
+    return _round(parse_number(value))
+
+
+def parse_mileage(value: Any) -> Optional[int]:
+    """Kilometres from "239,000 km", "239.000 km", ..."""
+    if type(value) is str:
+        number = _grouped_int(value.translate(_MILEAGE_NOISE))
+        if number is not None:
+            return number
+    return _round(parse_number(value))
+
+
+def parse_year(value: Any) -> Optional[int]:
+    """Year from "11/2015", "2015-11", 2015, ..."""
+    if type(value) is str:
+        if len(value) == 7 and value[2] == "/" and value[3:].isdigit() and value.isascii():
+            year = int(value[3:])
+        else:
+            match = _YEAR.search(value)
+            if match is None:
+                return None
+            year = int(match.group(1))
+    elif type(value) is int:
+        year = value
+    else:
+        return None
+    return year if YEAR_MIN <= year <= YEAR_MAX else None
+
+
+def parse_power_kw(value: Any) -> Optional[int]:
+    """kW from "55 kW (75 hp)", or converted from "75 hp" / "75 PS" """
+    if type(value) is not str:
+        return None
+    match = _KW.search(value)
+    if match is not None:
+        return _round(float(match.group(1).replace(",", ".")))
+    match = _HP.search(value)
+    if match is not None:
+        return _round(float(match.group(1).replace(",", ".")) / HP_PER_KW)
+    return None
+
+
+def parse_power_hp(value: Any) -> Optional[int]:
+    """hp from "55 kW (75 hp)", or converted from "55 kW" """
+    if type(value) is not str:
+        return None
+    match = _HP.search(value)
+    if match is not None:
+        return _round(float(match.group(1).replace(",", ".")))
+    match = _KW.search(value)
+    if match is not None:
+        return _round(float(match.group(1).replace(",", ".")) * HP_PER_KW)
+    return None
+
+
+def parse_engine_cc(value: Any) -> Optional[int]:
+    """cm³ from "1,120 cc", "1.598 ccm", or litres ("1.6 l")"""
+    number = parse_number(value)
+    if number is None:
+        return None
+    # Nobody sells a 20 cc car: small values are litres
+    return _round(number * 1000 if number < 20 else number)
+
+
+def parse_weight_kg(value: Any) -> Optional[int]:
+    """kg from "1,197 kg", "1.197 kg", ..."""
+    return _round(parse_number(value))
+
+
+def parse_consumption(value: Any) -> Optional[float]:
+    """l/100 km from "3.8 l/100 km (comb.)", "5,9 l/100km", ..."""
+    if type(value) is str:
+        match = _LITRES_100KM.search(value)
+        return None if match is None else float(match.group(1).replace(",", "."))
+    return parse_number(value)
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """Small counts (seats, doors, gears, previous owners) from "5", 5, ..."""
+    if type(value) is str and value.isdigit() and value.isascii():
+        return int(value)
+    if type(value) is int:
+        return value
+    return _round(parse_number(value))
+
+
+FIELD_PARSERS: Dict[str, Callable[[Any], Optional[float]]] = {
+    "number": parse_number,
+    "price": parse_price,
+    "mileage": parse_mileage,
+    "year": parse_year,
+    "power_kw": parse_power_kw,
+    "power_hp": parse_power_hp,
+    "engine_cc": parse_engine_cc,
+    "weight_kg": parse_weight_kg,
+    "consumption": parse_consumption,
+    "count": parse_count,
+}
+
+
+# =========================
+# TECHNICAL SPECS
+# =========================
+# Typed field -> (scraper section, scraper key, parser kind)
+SPEC_FIELDS: Dict[str, tuple] = {
+    "power_kw": ("Technical_Data", "Power", "power_kw"),
+    "power_hp": ("Technical_Data", "Power", "power_hp"),
+    "engine_cc": ("Technical_Data", "Engine_size", "engine_cc"),
+    "weight_kg": ("Technical_Data", "Empty_weight", "weight_kg"),
+    "consumption_l_100km": ("Energy_Consumption", "Fuel_consumption", "consumption"),
+    "seats_numeric": ("Basic_Data", "Seats", "count"),
+    "doors_numeric": ("Basic_Data", "Doors", "count"),
+    "gears_numeric": ("Technical_Data", "Gears", "count"),
+    "previous_owners_numeric": ("Vehicle_History", "Previous_owner", "count"),
+}
+
+
+def parse_specs(scraped_car: dict) -> Dict[str, Optional[float]]:
+    """Typed technical fields of one raw scraped car (None where unreadable)"""
+    return {
+        name: FIELD_PARSERS[kind]((scraped_car.get(section) or {}).get(key))
+        for name, (section, key, kind) in SPEC_FIELDS.items()
+    }
+
+
+def spec_columns(scraped_cars: List[dict]) -> Dict[str, List[Optional[float]]]:
+    """parse_specs over a batch, as {typed field: column}"""
+    return {
+        name: parse_many(((car.get(section) or {}).get(key) for car in scraped_cars), kind)
+        for name, (section, key, kind) in SPEC_FIELDS.items()
+    }
+
+
+# =========================
+# BATCH API
+# =========================
+class ParsedColumn(NamedTuple):
+    values: Any   # np.ndarray[float64], NaN where invalid
+    valid: Any    # np.ndarray[bool]
+
+
+def parse_many(values: Iterable[Any], kind: str) -> List[Optional[float]]:
+    """Parsed values (None where invalid); each distinct string parsed once"""
+    parser = FIELD_PARSERS[kind]
+    memo: Dict[str, Optional[float]] = {}
+    lookup = memo.get
+    out: List[Optional[float]] = []
+    append = out.append
+
+    for value in values:
+        if type(value) is str:
+            parsed = lookup(value, _MISSING)
+            if parsed is _MISSING:
+                parsed = memo[value] = parser(value)
+        else:
+            parsed = parser(value)
+        append(parsed)
+    return out
+
+
+def parse_column(values: Iterable[Any], kind: str) -> ParsedColumn:
+    """Typed column + validity mask for one field over many records"""
+    import numpy as np
+
+    # None -> NaN in a float64 array; parsers never return NaN themselves
+    column = np.array(parse_many(values, kind), dtype=np.float64)
+    return ParsedColumn(column, ~np.isnan(column))
@@ -0,0 +1,127 @@
+"""
+LRU cache for ML price predictions
+==================================
+Keys are the encoded feature tuples the model actually sees, so two
+listings with the same brand / fuel / age / mileage share one entry.
+Mileage can optionally be quantized (e.g. to 500 km) before encoding,
+so near-identical cars hit the same entry.
+
+Every entry belongs to one model version; when the serving model
+changes the whole cache is dropped. Reads and writes name the version
+they were made for, so a request that computed predictions with the
+old model can neither read nor write the new model's entries.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence
+
+DEFAULT_MAXSIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+DEFAULT_MILEAGE_QUANTUM = float(os.getenv("PREDICTION_CACHE_MILEAGE_QUANTUM", "0"))
+
+
+class PredictionCache:
+    """
+    Thread-safe, bounded LRU of {feature tuple: prediction}.
+
+    Usage:
+        cache.ensure_version(bundle.version)
+        cached = cache.get_many(keys, bundle.version)         # None for misses
+        cache.put_many(missing_keys, values, bundle.version)  # dropped if stale
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        mileage_quantum: float = DEFAULT_MILEAGE_QUANTUM,
+    ):
+        self.maxsize = maxsize
+        self.mileage_quantum = mileage_quantum
+        self.version: Optional[str] = None
+
+        self._data: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def ensure_version(self, version: Optional[str]) -> None:
+        """Drop everything if predictions were made by another model"""
+        with self._lock:
+            if version != self.version:
+                if self._data:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def quantize_columns(self, columns: Dict[str, list]) -> Dict[str, list]:
+        """Round mileage to the configured quantum (no-op when 0)"""
+        q = self.mileage_quantum
+        if not q:
+            return columns
+        return {
+            **columns,
+            "mileage_numeric": [
+                m if m is None else round(float(m) / q) * q
+                for m in columns["mileage_numeric"]
+            ],
+        }
+
+    def get_many(self, keys: Sequence[Hashable],
+                 version: Optional[str]) -> List[Optional[float]]:
+        found = []
+        with self._lock:
+            if version != self.version:
+                # Another model is being served now: nothing here is ours
+                self.misses += len(keys)
+                return [None] * len(keys)
+            for key in keys:
+                value = self._data.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                found.append(value)
+        return found
+
+    def put_many(self, keys: Sequence[Hashable], values: Sequence[float],
+                 version: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if version != self.version:
+                # Predicted by a model that was swapped out meanwhile
+                return
+            for key, value in zip(keys, values):
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "mileage_quantum": self.mileage_quantum,
+                "model_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,322 @@
+"""
+Listing price history store
+===========================
+Tracks how each listing's price and mileage change across scrapes.
+
+Each listing (keyed by the AutoScout24 offer id in details_url) keeps a
+compact int64 array of change events. The first event holds absolute
+values (timestamp, price, mileage); every later event holds deltas from
+the previous one. An event is only written when price or mileage
+actually changed, so storage grows with the number of changes, not with
+the number of scrapes. The latest absolute values are kept per listing
+so appends and "recent drop" queries never decode full histories.
+"""
+
+import os
+import re
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai_calculations import normalize_scraped_car
+
+# =========================
+# PROJECT PATHS
+# =========================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join(BASE_DIR, "data", "history", "price_history.npz")
+
+# Offer UUID at the end of an AutoScout24 details URL
+_OFFER_ID_RE = re.compile(
+    r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/?$",
+    re.IGNORECASE,
+)
+
+# Values per event: (timestamp, price, mileage)
+EVENT_WIDTH = 3
+
+
+def listing_id_from_url(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    match = _OFFER_ID_RE.search(url)
+    return match.group(1).lower() if match else url
+
+
+def _to_timestamp(value) -> int:
+    if value is None:
+        return int(datetime.now().timestamp())
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+class PriceHistoryStore:
+    """
+    Delta-encoded price/mileage time series per listing.
+
+    Usage:
+        store = PriceHistoryStore.load()          # or PriceHistoryStore()
+        store.append_scrape(raw_cars, observed_at=datetime.now())
+        store.price_drops(min_drop_pct=10, window_days=7)
+        store.save()
+    """
+
+    def __init__(self):
+        self.listing_ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._events: List[array] = []
+
+        # Latest absolute state per listing (same order as listing_ids)
+        self._last_ts = array("q")
+        self._last_price = array("q")
+        self._last_mileage = array("q")
+        self._last_seen = array("q")
+
+    def __len__(self) -> int:
+        return len(self.listing_ids)
+
+    @property
+    def event_count(self) -> int:
+        return sum(len(e) for e in self._events) // EVENT_WIDTH
+
+    # =========================
+    # APPEND
+    # =========================
+    def _slot(self, listing_id: str) -> int:
+        slot = self._index.get(listing_id)
+        if slot is None:
+            slot = len(self.listing_ids)
+            self._index[listing_id] = slot
+            self.listing_ids.append(listing_id)
+            self._events.append(array("q"))
+            self._last_ts.append(0)
+            self._last_price.append(0)
+            self._last_mileage.append(0)
+            self._last_seen.append(0)
+        return slot
+
+    def record(
+        self,
+        listing_id: str,
+        ts: int,
+        price: int,
+        mileage: Optional[int] = None,
+    ) -> bool:
+        """
+        Record one observation. Returns True if a change event was stored.
+        Observations older than the latest stored one are ignored.
+        """
+        slot = self._slot(listing_id)
+        events = self._events[slot]
+
+        if not events:
+            events.extend((ts, price, mileage or 0))
+        else:
+            if ts < self._last_ts[slot]:
+                return False
+
+            if mileage is None:
+                mileage = self._last_mileage[slot]
+
+            d_price = price - self._last_price[slot]
+            d_mileage = mileage - self._last_mileage[slot]
+
+            self._last_seen[slot] = max(self._last_seen[slot], ts)
+            if d_price == 0 and d_mileage == 0:
+                return False
+
+            events.extend((ts - self._last_ts[slot], d_price, d_mileage))
+
+        self._last_ts[slot] = ts
+        self._last_price[slot] = price
+        self._last_mileage[slot] = mileage or 0
+        self._last_seen[slot] = max(self._last_seen[slot], ts)
+        return True
+
+    def append_scrape(self, cars: Iterable[dict], observed_at=None) -> int:
+        """
+        Bulk append one scrape. Accepts raw scraper records
+        (details_url, "€ 3,950", ...) or normalized cars
+        (url, price_numeric, mileage_numeric). A record's own
+        scraped_at wins over `observed_at`.
+
+        Returns the number of change events stored.
+        """
+        default_ts = _to_timestamp(observed_at)
+        changes = 0
+
+        for car in cars:
+            if "price_numeric" not in car:
+                try:
+                    car = {**normalize_scraped_car(car),
+                           "scraped_at": car.get("scraped_at")}
+                except ValueError:
+                    continue
+
+            listing_id = listing_id_from_url(car.get("url"))
+            price = car.get("price_numeric")
+            if not listing_id or not price:
+                continue
+
+            mileage = car.get("mileage_numeric")
+            ts = _to_timestamp(car["scraped_at"]) if car.get("scraped_at") else default_ts
+
+            if self.record(
+                listing_id,
+                ts,
+                int(price),
+                int(mileage) if mileage is not None else None,
+            ):
+                changes += 1
+
+        return changes
+
+    # =========================
+    # QUERIES
+    # =========================
+    def history(self, listing_id: str) -> List[Tuple[int, int, int]]:
+        """Decoded (timestamp, price, mileage) change events"""
+        slot = self._index.get(listing_id)
+        if slot is None:
+            return []
+
+        decoded = []
+        ts = price = mileage = 0
+        events = self._events[slot]
+
+        for i in range(0, len(events), EVENT_WIDTH):
+            ts += events[i]
+            price += events[i + 1]
+            mileage += events[i + 2]
+            decoded.append((ts, price, mileage))
+
+        return decoded
+
+    def _state_at(self, slot: int, ts: int) -> Optional[Tuple[int, int, int]]:
+        """
+        (timestamp, price, mileage) in effect at `ts`, walking back from
+        the latest state so only the recent tail is decoded.
+        Returns None if the listing was first seen after `ts`.
+        """
+        events = self._events[slot]
+        cur_ts = self._last_ts[slot]
+        price = self._last_price[slot]
+        mileage = self._last_mileage[slot]
+        i = len(events) - EVENT_WIDTH
+
+        while cur_ts > ts:
+            if i == 0:
+                return None
+            price -= events[i + 1]
+            mileage -= events[i + 2]
+            cur_ts -= events[i]
+            i -= EVENT_WIDTH
+
+        return cur_ts, price, mileage
+
+    def price_drops(
+        self,
+        min_drop_pct: float = 10.0,
+        window_days: float = 7.0,
+        now=None,
+    ) -> List[dict]:
+        """
+        Listings whose current price is at least `min_drop_pct` below the
+        price in effect `window_days` ago (or below their first price if
+        they appeared inside the window). Sorted by largest drop.
+        """
+        now_ts = _to_timestamp(now)
+        since = now_ts - int(window_days * 86400)
+
+        if not self.listing_ids:
+            return []
+
+        # Only listings that changed after the window start can have dropped
+        last_ts = np.frombuffer(self._last_ts, dtype=np.int64)
+        candidates = np.nonzero(last_ts > since)[0]
+
+        drops = []
+        for slot in candidates.tolist():
+            current = self._state_at(slot, now_ts)
+            if current is None or current[0] <= since:
+                continue
+
+            before = self._state_at(slot, since)
+            if before is None:
+                # Appeared inside the window: compare with its first price
+                events = self._events[slot]
+                before = (events[0], events[1], events[2])
+
+            before_price = before[1]
+            now_price = current[1]
+            if before_price <= 0 or now_price >= before_price:
+                continue
+
+            drop_pct = (before_price - now_price) / before_price * 100
+            if drop_pct < min_drop_pct:
+                continue
+
+            drops.append({
+                "listing_id": self.listing_ids[slot],
+                "price_before": before_price,
+                "price_now": now_price,
+                "drop_pct": round(drop_pct, 2),
+                "changed_at": datetime.fromtimestamp(current[0]).isoformat(),
+            })
+
+        return sorted(drops, key=lambda d: d["drop_pct"], reverse=True)
+
+    # =========================
+    # PERSISTENCE
+    # =========================
+    def save(self, path: str = HISTORY_PATH) -> None:
+        """Write the store atomically as a compressed .npz file"""
+        lengths = np.array([len(e) for e in self._events], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        events = (
+            np.concatenate([np.frombuffer(e, dtype=np.int64) for e in self._events])
+            if self._events else np.zeros(0, dtype=np.int64)
+        )
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            listing_ids=np.array(self.listing_ids, dtype=str),
+            offsets=offsets,
+            events=events,
+            last_seen=np.frombuffer(self._last_seen, dtype=np.int64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = HISTORY_PATH) -> "PriceHistoryStore":
+        """Load a saved store (an empty store if the file does not exist)"""
+        store = cls()
+        if not os.path.exists(path):
+            return store
+
+        with np.load(path) as data:
+            listing_ids = data["listing_ids"].tolist()
+            offsets = data["offsets"]
+            events = data["events"]
+            last_seen = data["last_seen"]
+
+        for slot, listing_id in enumerate(listing_ids):
+            chunk = events[offsets[slot]:offsets[slot + 1]]
+            sums = chunk.reshape(-1, EVENT_WIDTH).sum(axis=0)
+
+            store._index[listing_id] = slot
+            store.listing_ids.append(listing_id)
+            store._events.append(array("q", chunk.tobytes()))
+            store._last_ts.append(int(sums[0]))
+            store._last_price.append(int(sums[1]))
+            store._last_mileage.append(int(sums[2]))
+            store._last_seen.append(int(last_seen[slot]))
+
+        return store
@@ -0,0 +1,378 @@
+"""
+On-demand request profiling
+===========================
+Off unless PROFILING_ENABLED=1 and PROFILING_TOKEN is set; enabling it
+without a token logs an error and leaves profiling off. When enabled, a
+request is profiled if
+
+- it sends `X-Profile: <PROFILING_TOKEN>` or `?profile=<PROFILING_TOKEN>`, or
+- it is picked by PROFILING_SAMPLE_RATE (0..1, default 0).
+
+Two modes (PROFILING_MODE, or `X-Profile-Mode` / `?profile_mode=`):
+
+    sample      a thread samples the request's stacks every
+                PROFILING_INTERVAL_MS and writes folded stacks
+                ("thread;a;b;c 12"), the input of flamegraph.pl / speedscope
+    cprofile    deterministic cProfile of the request, written as a
+                pstats file (snakeviz, flameprof, `python -m pstats`)
+
+Profiles are stored in PROFILING_DIR (default data/profiles/) and the
+response carries `X-Profile-Id`; GET /debug/profiles/{id} returns it.
+
+Handlers are async and share the event loop thread, so a profile covers
+that thread while the request was running, including any other request
+interleaved with it. Work the handler hands to a worker thread is
+followed when the callable is wrapped with follow_request() (the route
+thread-pool calls and SingleFlight.do_async are): the profile session
+travels in a contextvar, and the wrapper attaches the worker thread to
+it for the duration of the call. Untriggered requests pay one header
+scan, and wrapped calls one contextvar lookup.
+"""
+
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import random
+import re
+import secrets
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+from urllib.parse import parse_qs
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_MODE = os.getenv("PROFILING_MODE", "sample")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "1"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "data", "profiles"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "200"))
+
+# Profiles expose code paths and timings, so they are never served unauthenticated
+if PROFILING_ENABLED and not PROFILING_TOKEN:
+    logging.getLogger(__name__).error(
+        "PROFILING_ENABLED is set without PROFILING_TOKEN; profiling stays disabled"
+    )
+    PROFILING_ENABLED = False
+
+DOWNLOAD_PREFIX = "/debug/profiles/"
+MODES = {"sample": ".folded", "cprofile": ".pstats"}
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+# =========================
+# PROFILERS
+# =========================
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples a set of threads' Python stacks on a background thread.
+    Threads may be added to / removed from `thread_ids` while it runs.
+
+    Usage:
+        sampler = StackSampler({threading.get_ident()})
+        sampler.start()
+        ...
+        sampler.stop()
+        sampler.folded()   # "thread;root;child;leaf count" lines
+    """
+
+    def __init__(self, thread_ids: Set[int], interval: float = PROFILING_INTERVAL_MS / 1000):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels = {}
+        self._thread_names = {}
+
+    def _thread_name(self, thread_id: int) -> str:
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            self._thread_names = {t.ident: t.name.replace(";", ":")
+                                  for t in threading.enumerate()}
+            name = self._thread_names.get(thread_id, str(thread_id))
+        return name
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(frame).replace(";", ":")
+        return label
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.thread_ids):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame))
+                    frame = frame.f_back
+                if stack:
+                    stack.append(self._thread_name(thread_id))
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """
+    One profiled request: the threads its work runs on (sample mode) or
+    the per-thread profilers (cprofile mode). Worker threads join it
+    through follow_request().
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.thread_ids: Set[int] = {threading.get_ident()}
+        self.profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def attach(self):
+        """Include the calling thread in the profile while the block runs"""
+        if self.mode == "sample":
+            thread_id = threading.get_ident()
+            if thread_id in self.thread_ids:
+                yield
+                return
+            self.thread_ids.add(thread_id)
+            try:
+                yield
+            finally:
+                self.thread_ids.discard(thread_id)
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # This thread is profiled already
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self.profilers.append(profiler)
+
+
+# Profile of the request the current context belongs to
+_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+def follow_request(fn: Callable) -> Callable:
+    """
+    Wrap a callable handed to a worker thread so the calling request's
+    profile (if any) covers it. The thread must run it in a copy of the
+    request's context, as run_in_threadpool and SingleFlight do.
+    """
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return fn(*args, **kwargs)
+        with session.attach():
+            return fn(*args, **kwargs)
+
+    return call
+
+
+# =========================
+# STORAGE
+# =========================
+def new_profile_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def profile_path(profile_id: str, directory: str = PROFILING_DIR) -> Optional[str]:
+    """Stored file for an id (either mode), or None"""
+    if not PROFILE_ID_PATTERN.match(profile_id or ""):
+        return None
+    for suffix in MODES.values():
+        path = os.path.join(directory, profile_id + suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def authorized(value: Optional[str], token: str = PROFILING_TOKEN) -> bool:
+    """Trigger / download check against the configured token"""
+    if not value or not token:
+        return False
+    return secrets.compare_digest(value.encode(), token.encode())
+
+
+def _prune(directory: str, keep: int) -> None:
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(tuple(MODES.values())))
+    except FileNotFoundError:
+        return
+    for name in names[:-keep] if keep > 0 else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+def _write_atomic(path: str, write) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware; only installed when PROFILING_ENABLED is set.
+    One profile runs at a time, other triggered requests run normally.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: str = PROFILING_TOKEN,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        mode: str = PROFILING_MODE,
+        directory: str = PROFILING_DIR,
+        keep: int = PROFILING_KEEP,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.directory = directory
+        self.keep = keep
+        self._busy = threading.Lock()
+
+    def _trigger(self, scope) -> Optional[str]:
+        """Profiling mode for this request, or None"""
+        requested = None
+        mode = None
+
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                requested = value.decode("latin-1")
+            elif name == b"x-profile-mode":
+                mode = value.decode("latin-1")
+
+        query = scope.get("query_string", b"")
+        if requested is None and b"profile" in query:
+            params = parse_qs(query.decode("latin-1"))
+            requested = (params.get("profile") or [None])[0]
+            mode = mode or (params.get("profile_mode") or [None])[0]
+
+        if requested is not None:
+            if not authorized(requested, self.token):
+                return None
+        elif not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+
+        return mode if mode in MODES else self.mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path", "").startswith(DOWNLOAD_PREFIX):
+            return await self.app(scope, receive, send)
+
+        mode = self._trigger(scope)
+        if mode is None or not self._busy.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        profile_id = new_profile_id()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if mode == "cprofile":
+                await self._run_cprofile(scope, receive, send_wrapper, profile_id)
+            else:
+                await self._run_sampled(scope, receive, send_wrapper, profile_id)
+        finally:
+            self._busy.release()
+
+    async def _run_sampled(self, scope, receive, send, profile_id: str) -> None:
+        session = ProfileSession("sample")
+        sampler = StackSampler(session.thread_ids)
+        sampler.start()
+        token = _session.set(session)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _session.reset(token)
+            sampler.stop()
+            folded = sampler.folded()
+
+            def write(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(folded)
+
+            self._store(profile_id, "sample", write)
+
+    async def _run_cprofile(self, scope, receive, send, profile_id: str) -> None:
+        session = ProfileSession("cprofile")
+        profiler = cProfile.Profile()
+        profiler.enable()
+        token = _session.set(session)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _session.reset(token)
+            profiler.disable()
+
+            def write(path):
+                # Event loop thread + every worker thread the request used
+                stats = pstats.Stats(profiler)
+                for worker in session.profilers:
+                    stats.add(worker)
+                stats.dump_stats(path)
+
+            self._store(profile_id, "cprofile", write)
+
+    def _store(self, profile_id: str, mode: str, write) -> None:
+        path = os.path.join(self.directory, profile_id + MODES[mode])
+        try:
+            _write_atomic(path, write)
+            _prune(self.directory, self.keep)
+        except OSError:
+            # Profiling must never fail the request
+            pass
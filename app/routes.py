@@ -1,18 +1,32 @@
 # =========================================================
 # FastAPI router & error handling
 # =========================================================
-from fastapi import APIRouter, HTTPException, Body, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from typing import Any, List, Union
 import json
 import os
+from contextlib import ExitStack
 
 # =========================================================
 # Core business logic
 # =========================================================
 from app.ai_calculations import (
-    normalize_scraped_car,
+    analyze_raw_batch,
     calculate_profit_and_recommendation,
+    item_error,
     rank_cars_by_investment_quality,
+    shadow,
+)
+
+# =========================================================
+# Serving catalog (cached ranked dataset)
+# =========================================================
+from app.catalog import (
+    SOURCE_PATH as CATALOG_SOURCE_PATH,
+    file_signature,
+    catalog_snapshot,
 )
 
 # =========================================================
@@ -23,15 +37,42 @@ from app.car_recommendation_engine import (
     get_user_context_from_request,
 )
 
+# =========================================================
+# Instrumentation (see /metrics)
+# =========================================================
+from app.metrics import observe_batch, stage, timed_handler
+from app.profiling import follow_request
+
+# =========================================================
+# Bulk response encoding
+# =========================================================
+from app.fast_json import FastJSONResponse, ModelRows
+
+# =========================================================
+# Bulk request validation
+# =========================================================
+from app.bulk_validation import BulkValidator
+
+# =========================================================
+# Request coalescing
+# =========================================================
+from app.singleflight import SingleFlight
+
+# =========================================================
+# Background analysis jobs
+# =========================================================
+from app.jobs import JOBS_MAX_UPLOAD_BYTES, PAGE_LIMIT, JobInputError, job_manager
+
 # =========================================================
 # Schemas
 # =========================================================
 from app.models import (
     CarInput,
     CarAnalysis,
+    CarAnalysisBatch,
 )
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import Optional
 
 router = APIRouter()
@@ -39,15 +80,23 @@ router = APIRouter()
 # Initialize recommendation engine
 recommendation_engine = CarRecommendationEngine()
 
+# Builds /analyze-cars/ output without per-row pydantic validation
+car_analysis_rows = ModelRows(CarAnalysis)
+
+# Deduplicates concurrent identical /cars/top-deals queries
+top_deals_flight = SingleFlight("top_deals")
+
 
 # =========================================================
 # MAIN ANALYSIS ENDPOINT (RAW SCRAPER INPUT)
 # =========================================================
 @router.post(
     "/analyze-cars/",
-    response_model=List[CarAnalysis],
+    # strict=true returns the list, strict=false the {"results", "errors"} batch
+    response_model=Union[List[CarAnalysis], CarAnalysisBatch],
     summary="Analyze cars from RAW scraped data",
 )
+@timed_handler
 async def analyze_cars(
     cars: List[dict] = Body(
         ...,
@@ -64,26 +113,73 @@ async def analyze_cars(
                 "Technical_Data": {"Gearbox": "Manual"}
             }
         ],
-    )
+    ),
+    strict: bool = Query(
+        True,
+        description="Fail the whole batch on the first bad car (500). With strict=false "
+                    "the response is {\"results\": [{index, ...}], \"errors\": [{index, stage, error}]} "
+                    "and every other car is still analyzed.",
+    ),
 ):
     try:
-        results = []
+        observe_batch(len(cars))
 
-        for raw_car in cars:
-            clean_car = normalize_scraped_car(raw_car)
-            analysis = calculate_profit_and_recommendation(clean_car)
+        # Off the event loop, so /health and light queries keep being
+        # served while a big batch runs (see app/admission.py)
+        if strict:
+            return await run_in_threadpool(follow_request(_analyze_raw_cars), cars)
+        return await run_in_threadpool(follow_request(_analyze_raw_cars_isolated), cars)
 
-            # Production safety guard
-            if analysis["profit"] < 0:
-                analysis["profit"] = 0
-                analysis["profit_label"] = "NO_PROFIT"
+    except Exception as e:
+        raise HTTPException(500, f"Analysis error: {str(e)}")
 
-            results.append({**clean_car, **analysis})
 
-        return results
+def _analyze_raw_cars(cars: List[dict]):
+    results, clean_cars = analyze_raw_batch(cars)
 
-    except Exception as e:
-        raise HTTPException(500, f"Analysis error: {str(e)}")
+    # Sampled copy of the request for the candidate model, if any
+    shadow.submit(clean_cars)
+
+    # Same bytes as response_model validation + JSONResponse
+    with stage("serialize"):
+        return car_analysis_rows.response(results)
+
+
+def _analyze_raw_cars_isolated(cars: List[dict]):
+    errors, indices = [], []
+    results, clean_cars = analyze_raw_batch(cars, errors=errors, indices=indices)
+
+    shadow.submit(clean_cars)
+
+    with stage("serialize"):
+        rows, safe = _dump_isolated(results, indices, errors)
+        # Error entries are ints and strings, which orjson encodes like the stdlib
+        return FastJSONResponse({"results": rows, "errors": errors}, orjson_safe=safe)
+
+
+def _dump_isolated(results: List[dict], indices: List[int], errors: List[dict]):
+    """
+    Response rows tagged with their input index. A row that fails
+    CarAnalysis validation becomes a "serialize" error instead of
+    failing the batch.
+    """
+    prepared = car_analysis_rows.prepare(results)
+    if prepared is not None:
+        rows, safe = prepared
+        return [{"index": i, **row} for i, row in zip(indices, rows)], safe
+
+    rows, safe = [], True
+    for index, result in zip(indices, results):
+        try:
+            (row,), row_safe = car_analysis_rows.dump([result])
+        except ValidationError as e:
+            errors.append(item_error(index, "serialize", e))
+            continue
+        rows.append({"index": index, **row})
+        safe = safe and row_safe
+
+    errors.sort(key=lambda error: error["index"])
+    return rows, safe
 
 
 # =========================================================
@@ -94,8 +190,9 @@ async def analyze_cars(
     response_model=List[CarAnalysis],
     summary="Deprecated - Analyze cars",
 )
+@timed_handler
 async def ai_analyze_legacy(cars: List[dict]):
-    return await analyze_cars(cars)
+    return await analyze_cars(cars, strict=True)
 
 
 # =========================================================
@@ -105,6 +202,7 @@ async def ai_analyze_legacy(cars: List[dict]):
     "/cars/top-deals",
     summary="Get top car investment opportunities",
 )
+@timed_handler
 async def get_top_deals(
     mode: str = Query("strict", enum=["strict", "relaxed"]),
     limit: int = Query(10, ge=1, le=50),
@@ -112,54 +210,60 @@ async def get_top_deals(
     max_risk: float = Query(6, ge=0, le=10),
 ):
     try:
-        path = os.path.join("scrapers", "output.json")
-        if not os.path.exists(path):
+        source_sig = file_signature(CATALOG_SOURCE_PATH)
+        if source_sig is None:
             raise HTTPException(404, "scrapers/output.json not found")
 
-        with open(path, "r", encoding="utf-8") as f:
-            raw_cars = json.load(f)
-
-        analyzed = []
-
-        for raw in raw_cars:
-            clean = normalize_scraped_car(raw)
-            analysis = calculate_profit_and_recommendation(clean)
-            analyzed.append({**clean, **analysis})
-
-        ranked = rank_cars_by_investment_quality(analyzed)
-
-        strong = [
-            car for car in ranked
-            if car["investment_score"] > 0
-        ][:limit]
-
-        near_miss = []
-        if mode == "relaxed":
-            near_miss = [
-                {
-                    **c,
-                    "note": "Positive profit but weak risk-adjusted score"
-                }
-                for c in ranked
-                if c["investment_score"] <= 0
-                and c["profit"] >= min_profit
-                and c["risk_score"] <= max_risk
-            ][:limit]
+        # Identical concurrent queries on the same dataset share one computation
+        body = await top_deals_flight.do_async(
+            (tuple(source_sig), mode, limit, min_profit, max_risk),
+            lambda: _top_deals_body(mode, limit, min_profit, max_risk),
+        )
 
-        return {
-            "mode": mode,
-            "summary": {
-                "strong_opportunities": len(strong),
-                "near_miss_opportunities": len(near_miss),
-            },
-            "strong_opportunities": strong,
-            "near_miss_opportunities": near_miss,
-        }
+        with stage("serialize"):
+            return FastJSONResponse(body)
 
     except Exception as e:
         raise HTTPException(500, f"Top deals error: {str(e)}")
 
 
+def _top_deals_body(mode: str, limit: int, min_profit: float, max_risk: float) -> dict:
+    # Ranked once per dataset and mapped by every worker; see app/catalog.py.
+    # The lease keeps the mapping open if a newer snapshot replaces it meanwhile
+    with ExitStack() as lease:
+        with stage("catalog"):
+            catalog = lease.enter_context(catalog_snapshot())
+
+        with stage("rank"):
+            investment_score = catalog.numeric("investment_score")
+            strong = catalog.rows_where(investment_score > 0, limit)
+
+            near_miss = []
+            if mode == "relaxed":
+                near_miss = [
+                    {
+                        **c,
+                        "note": "Positive profit but weak risk-adjusted score"
+                    }
+                    for c in catalog.rows_where(
+                        (investment_score <= 0)
+                        & (catalog.numeric("profit") >= min_profit)
+                        & (catalog.numeric("risk_score") <= max_risk),
+                        limit,
+                    )
+                ]
+
+    return {
+        "mode": mode,
+        "summary": {
+            "strong_opportunities": len(strong),
+            "near_miss_opportunities": len(near_miss),
+        },
+        "strong_opportunities": strong,
+        "near_miss_opportunities": near_miss,
+    }
+
+
 # =========================================================
 # USER CONTEXT REQUEST MODEL
 # =========================================================
@@ -175,21 +279,30 @@ class UserContextCompareRequest(BaseModel):
     cars: List[CarInput]
 
 
+# Validates `cars` straight into columns (no CarInput object per car)
+user_context_compare_validator = BulkValidator(UserContextCompareRequest, "cars")
+
+
 # =========================================================
 # USER CONTEXT BASED COMPARISON
 # =========================================================
 @router.post(
     "/cars/compare-user-context",
     summary="Compare cars based on user preferences",
+    openapi_extra=user_context_compare_validator.openapi_extra(),
 )
-async def compare_cars_user_context(payload: UserContextCompareRequest):
+@timed_handler
+async def compare_cars_user_context(payload: Any = Body(...)):
+    with stage("validate"):
+        request, columns = user_context_compare_validator.validate(payload)
+
     try:
         analyzed = []
-        ctx = payload.user_context
-
-        for car in payload.cars:
-            car_dict = car.model_dump()
+        ctx = request.user_context
+        cars = user_context_compare_validator.rows(columns)
+        observe_batch(len(cars))
 
+        for car_dict in cars:
             score = 0
             reasons = []
 
@@ -236,36 +349,46 @@ class InvestmentCompareRequest(BaseModel):
     cars: List[CarInput]
 
 
+investment_compare_validator = BulkValidator(InvestmentCompareRequest, "cars")
+
+
 @router.post(
     "/cars/compare-investment",
     summary="Compare cars using investment logic",
+    openapi_extra=investment_compare_validator.openapi_extra(),
 )
-async def compare_cars_investment(payload: InvestmentCompareRequest):
+@timed_handler
+async def compare_cars_investment(payload: Any = Body(...)):
+    with stage("validate"):
+        _, columns = investment_compare_validator.validate(payload)
+
     try:
         analyzed = []
+        cars = investment_compare_validator.rows(columns)
+        observe_batch(len(cars))
 
-        for car in payload.cars:
-            car_dict = car.model_dump()
-
-            analysis = calculate_profit_and_recommendation(car_dict)
+        with stage("analyze"):
+            for car_dict in cars:
+                analysis = calculate_profit_and_recommendation(car_dict)
 
-            if analysis["profit"] < 0:
-                analysis["profit"] = 0
-                analysis["profit_label"] = "NO_PROFIT"
+                if analysis["profit"] < 0:
+                    analysis["profit"] = 0
+                    analysis["profit_label"] = "NO_PROFIT"
 
-            full_car = {**car_dict, **analysis}
+                full_car = {**car_dict, **analysis}
 
-            investment_score = (
-                full_car["profit"] - (full_car["risk_score"] * 500)
-            )
+                investment_score = (
+                    full_car["profit"] - (full_car["risk_score"] * 500)
+                )
 
-            full_car["investment_score"] = round(investment_score, 2)
+                full_car["investment_score"] = round(investment_score, 2)
 
-            analyzed.append(full_car)
+                analyzed.append(full_car)
 
-        best_by_profit = max(analyzed, key=lambda x: x["profit"])
-        best_by_risk = min(analyzed, key=lambda x: x["risk_score"])
-        best_overall = max(analyzed, key=lambda x: x["investment_score"])
+        with stage("rank"):
+            best_by_profit = max(analyzed, key=lambda x: x["profit"])
+            best_by_risk = min(analyzed, key=lambda x: x["risk_score"])
+            best_overall = max(analyzed, key=lambda x: x["investment_score"])
 
         return {
             "all_cars": analyzed,
@@ -276,3 +399,115 @@ async def compare_cars_investment(payload: InvestmentCompareRequest):
 
     except Exception as e:
         raise HTTPException(500, f"Comparison error: {str(e)}")
+
+
+# =========================================================
+# ASYNC ANALYSIS JOBS (VERY LARGE BATCHES)
+# =========================================================
+def _job_links(job_id: str) -> dict:
+    return {
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "results_url": f"/jobs/{job_id}/results",
+    }
+
+
+@router.post(
+    "/jobs/analyze-cars",
+    status_code=202,
+    summary="Analyze a very large batch of RAW scraped cars in the background",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"type": "object"}},
+                }
+            },
+            "required": False,
+        }
+    },
+)
+@timed_handler
+async def submit_analysis_job(
+    request: Request,
+    path: Optional[str] = Query(None, description="Local .json / .jsonl file instead of a body"),
+):
+    try:
+        if path is not None:
+            state = await run_in_threadpool(follow_request(job_manager.submit_path), path)
+            return {**_job_links(state["job_id"]), "state": state["state"]}
+
+        # Stream the body to disk; it is parsed by the job worker
+        job_id, upload_path = job_manager.create()
+        size = 0
+        try:
+            with open(upload_path, "wb") as f:
+                async for chunk in request.stream():
+                    size += len(chunk)
+                    if size > JOBS_MAX_UPLOAD_BYTES:
+                        raise HTTPException(413, "Batch too large")
+                    f.write(chunk)
+            if size == 0:
+                raise HTTPException(400, "Send a JSON array of cars or ?path=")
+        except BaseException:
+            job_manager.discard(job_id)
+            raise
+
+        state = await run_in_threadpool(follow_request(job_manager.submit), job_id)
+        return {**_job_links(job_id), "state": state["state"]}
+
+    except HTTPException:
+        raise
+    except JobInputError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Job submission error: {str(e)}")
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Analysis job state and progress",
+)
+@timed_handler
+async def get_analysis_job(job_id: str):
+    status = job_manager.status(job_id)
+    if status is None:
+        raise HTTPException(404, "Job not found")
+    return {**status, **_job_links(job_id)}
+
+
+@router.get(
+    "/jobs/{job_id}/results",
+    summary="Page of analysis job results",
+)
+@timed_handler
+async def get_analysis_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=PAGE_LIMIT),
+):
+    page = await run_in_threadpool(follow_request(job_manager.page), job_id, offset, limit)
+    if page is None:
+        raise HTTPException(404, "Job not found")
+    return Response(page, media_type="application/json")
+
+
+@router.get(
+    "/jobs/{job_id}/results.jsonl",
+    summary="All analysis job results as JSON lines (supports Range)",
+)
+@timed_handler
+async def download_analysis_job_results(job_id: str):
+    path = job_manager.results_path(job_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(404, "Job results not found")
+    status = job_manager.status(job_id)
+    return FileResponse(
+        path,
+        media_type="application/x-ndjson",
+        headers={
+            "X-Job-State": status["state"],
+            # Bytes after this belong to a chunk still being written
+            "X-Job-Committed-Bytes": str(status["results_bytes"]),
+        },
+    )
@@ -0,0 +1,228 @@
+"""
+Shadow evaluation of a candidate price model
+============================================
+A sampled fraction of live request batches (normalized car records) is
+queued and scored by both the serving model and a candidate registry
+version on a background thread, after the response has been sent.
+Per row we record the candidate's difference to the serving model; per
+batch the wall and CPU time of both models, i.e. the extra cost of
+switching. CPU time is time.process_time, so work a model hands to its
+own threads (n_jobs, BLAS) counts; it also counts whatever other threads
+of the process ran meanwhile, so under request load it is an upper bound
+and wall time is the steadier comparison.
+
+Enable with:
+    SHADOW_MODEL_VERSION=<registry version>
+    SHADOW_SAMPLE_RATE=0.1                       (default 0.05)
+    SHADOW_CAPTURE_PATH=data/shadow/requests.jsonl  (optional request log)
+
+Captured batches can be replayed offline with scripts/replay_shadow.py.
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.model_registry import LoadedModel, ModelRegistry
+from app.streaming_stats import QuantileSketch, RunningStats
+
+DEFAULT_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.05"))
+DEFAULT_QUEUE_SIZE = 64
+
+
+class ShadowEvaluator:
+    """
+    Usage:
+        shadow = ShadowEvaluator(serving_model)   # callable -> LoadedModel
+        shadow.submit(cars)                       # cheap, never blocks
+        shadow.stats()
+    """
+
+    def __init__(
+        self,
+        serving_model: Callable[[], LoadedModel],
+        registry: Optional[ModelRegistry] = None,
+        candidate_version: Optional[str] = None,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        capture_path: Optional[str] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.serving_model = serving_model
+        self.registry = registry or ModelRegistry()
+        self.candidate_version = candidate_version or os.getenv("SHADOW_MODEL_VERSION")
+        self.sample_rate = sample_rate
+        self.capture_path = capture_path or os.getenv("SHADOW_CAPTURE_PATH")
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._candidate: Optional[LoadedModel] = None
+
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self.batches = 0
+        self.rows = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.abs_delta = RunningStats()
+        self.abs_delta_quantiles = QuantileSketch()
+        self.pct_delta = RunningStats()
+        self.served_cpu_ms = RunningStats()
+        self.candidate_cpu_ms = RunningStats()
+        self.served_wall_ms = RunningStats()
+        self.candidate_wall_ms = RunningStats()
+        self.served_versions: dict = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.candidate_version) and self.sample_rate > 0
+
+    def configure(self, candidate_version: Optional[str], sample_rate: Optional[float] = None) -> None:
+        """Switch candidate (stats restart)"""
+        with self._stats_lock:
+            self.candidate_version = candidate_version
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self._candidate = None
+            self._reset_stats()
+
+    # =========================
+    # REQUEST PATH
+    # =========================
+    def submit(self, cars: List[dict]) -> bool:
+        """Queue a batch for shadow scoring if sampled. Returns True if queued."""
+        if not self.enabled or not cars or random.random() >= self.sample_rate:
+            return False
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(list(cars))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="shadow-model", daemon=True)
+                self._thread.start()
+
+    # =========================
+    # WORKER
+    # =========================
+    def _load_candidate(self) -> LoadedModel:
+        if self._candidate is None or self._candidate.version != self.candidate_version:
+            candidate = self.registry.load(self.candidate_version)
+            candidate.warm_up()
+            self._candidate = candidate
+        return self._candidate
+
+    def _work(self) -> None:
+        while True:
+            cars = self._queue.get()
+            try:
+                self.score(cars)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _timed_predict(model: LoadedModel, cars: List[dict]):
+        """(predictions, CPU ms, wall ms) including feature building"""
+        from app.model_bundle import records_to_columns
+
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        X = model.bundle.transform(records_to_columns(cars, model.bundle.input_columns))
+        predicted = model.predict_features(X)
+        return (predicted, (time.process_time() - cpu_started) * 1000,
+                (time.perf_counter() - wall_started) * 1000)
+
+    def score(self, cars: List[dict]) -> None:
+        served_model = self.serving_model()
+        candidate = self._load_candidate()
+
+        served, served_ms, served_wall_ms = self._timed_predict(served_model, cars)
+        predicted, candidate_ms, candidate_wall_ms = self._timed_predict(candidate, cars)
+
+        with self._stats_lock:
+            self.batches += 1
+            self.rows += len(cars)
+            version = served_model.version
+            self.served_versions[version] = self.served_versions.get(version, 0) + 1
+            self.served_cpu_ms.add(served_ms / len(cars))
+            self.candidate_cpu_ms.add(candidate_ms / len(cars))
+            self.served_wall_ms.add(served_wall_ms / len(cars))
+            self.candidate_wall_ms.add(candidate_wall_ms / len(cars))
+            for s, p in zip(served, predicted):
+                delta = abs(p - s)
+                self.abs_delta.add(delta)
+                self.abs_delta_quantiles.add(delta)
+                if s > 0:
+                    self.pct_delta.add((p - s) / s * 100)
+
+        if self.capture_path:
+            self._capture(cars, served_model.version)
+
+    def _capture(self, cars: List[dict], served_version: str) -> None:
+        os.makedirs(os.path.dirname(self.capture_path) or ".", exist_ok=True)
+        line = json.dumps({
+            "at": datetime.now().isoformat(),
+            "served_version": served_version,
+            "cars": cars,
+        }, default=str)
+        with open(self.capture_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def drain(self, timeout: float = 5.0) -> None:
+        """Wait until queued batches are scored (scripts / shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            def rounded(value):
+                return round(value, 2) if value is not None else None
+
+            return {
+                "enabled": self.enabled,
+                "candidate_version": self.candidate_version,
+                "sample_rate": self.sample_rate,
+                "batches": self.batches,
+                "rows": self.rows,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "served_versions": dict(self.served_versions),
+                "mean_abs_delta": rounded(self.abs_delta.mean) if self.abs_delta.count else None,
+                "p50_abs_delta": rounded(self.abs_delta_quantiles.quantile(0.5)),
+                "p95_abs_delta": rounded(self.abs_delta_quantiles.quantile(0.95)),
+                "max_abs_delta": rounded(self.abs_delta.max),
+                "mean_pct_delta": rounded(self.pct_delta.mean) if self.pct_delta.count else None,
+                "served_cpu_ms_per_row": (
+                    round(self.served_cpu_ms.mean, 4) if self.served_cpu_ms.count else None
+                ),
+                "candidate_cpu_ms_per_row": (
+                    round(self.candidate_cpu_ms.mean, 4) if self.candidate_cpu_ms.count else None
+                ),
+                "served_wall_ms_per_row": (
+                    round(self.served_wall_ms.mean, 4) if self.served_wall_ms.count else None
+                ),
+                "candidate_wall_ms_per_row": (
+                    round(self.candidate_wall_ms.mean, 4) if self.candidate_wall_ms.count else None
+                ),
+            }
@@ -0,0 +1,96 @@
+"""
+Single-flight call deduplication
+================================
+When a dataset refresh lands, many clients ask for the same expensive
+result at once (a catalog rebuild, the same /cars/top-deals query, a
+model load). A SingleFlight runs one computation per key at a time;
+callers that arrive while it runs wait for that result instead of
+starting their own:
+
+    catalog_flight = SingleFlight("catalog")
+
+    # threads (warm-up, watchers, sync helpers)
+    cars = catalog_flight.do(("rebuild", source_sig), rebuild)
+
+    # async handlers: the work runs in a worker thread, the event loop
+    # stays free and every caller awaits the same future
+    result = await catalog_flight.do_async(key, compute)
+
+Nothing is cached: once the leader finishes, the key is released and
+the next call computes again. Exceptions are shared with every waiter
+of that flight, the same way results are.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.metrics import SINGLEFLIGHT_CALLS
+from app.profiling import follow_request
+
+
+class SingleFlight:
+    """
+    Per-key deduplication of concurrent calls, shared by threads and
+    asyncio handlers.
+
+    Usage:
+        flight = SingleFlight("top_deals")
+        body = await flight.do_async((generation, mode, limit), build_body)
+        flight.in_flight()
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """(future for key, True if the caller must run the computation)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                SINGLEFLIGHT_CALLS.inc(self.name, "shared")
+                return future, False
+
+            future = Future()
+            # A running future can't be cancelled, so a waiter that goes
+            # away (client disconnect) doesn't cancel it for the others
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            SINGLEFLIGHT_CALLS.inc(self.name, "leader")
+            return future, True
+
+    def _run(self, key: Hashable, future: Future, fn: Callable[[], Any]) -> None:
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn() once for concurrent callers with the same key (blocking)"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn() once for concurrent callers with the same key, in a worker thread"""
+        future, leader = self._join(key)
+        if leader:
+            # The leader's context (request metrics stages, profile) follows the work
+            context = contextvars.copy_context()
+            asyncio.get_running_loop().run_in_executor(
+                None, context.run, self._run, key, future, follow_request(fn))
+        return await asyncio.wrap_future(future)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
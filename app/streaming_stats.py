@@ -0,0 +1,467 @@
+"""
+Streaming dataset statistics
+============================
+One-pass, constant-memory statistics over car records:
+
+- counts and field completeness
+- min / max / mean (Welford)
+- approximate quantiles (DDSketch-style log buckets, ~1% relative error)
+- heavy-hitter categories such as brands (Misra-Gries)
+
+Every accumulator can be merged, so stats computed per shard or per run
+can be combined, and serialized with to_dict() / from_dict().
+"""
+
+import json
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+NUMERIC_FIELDS = ("price_numeric", "mileage_numeric", "year_numeric")
+CATEGORICAL_FIELDS = ("brand",)
+COMPLETENESS_FIELDS = (
+    "brand",
+    "year_numeric",
+    "mileage_numeric",
+    "price_numeric",
+    "fuel_type",
+)
+FLAG_FIELDS = ("needs_manual_review",)
+
+
+def is_missing(value) -> bool:
+    """Missing in the pandas sense: None or NaN"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_number(value) -> Optional[float]:
+    if is_missing(value) or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) or math.isinf(number) else number
+
+
+# =========================
+# MIN / MAX / MEAN
+# =========================
+class RunningStats:
+    """Count, min, max, mean and variance in one pass (mergeable)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls()
+        stats.count = data["count"]
+        stats.mean = data["mean"]
+        stats.m2 = data["m2"]
+        stats.min = data["min"]
+        stats.max = data["max"]
+        return stats
+
+
+# =========================
+# QUANTILE SKETCH
+# =========================
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch).
+
+    Every value lands in bucket ceil(log_gamma(|x|)), so any quantile is
+    returned within `relative_accuracy` of the true value. The number of
+    buckets is capped by collapsing the smallest ones, which keeps memory
+    constant and only affects the extreme low tail.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, x: float) -> int:
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Midpoint of the bucket, in relative terms
+        return 2 * self.gamma ** key / (1 + self.gamma)
+
+    def add(self, x: float, weight: int = 1) -> None:
+        self.count += weight
+        if x > 0:
+            store = self.positive
+        elif x < 0:
+            store, x = self.negative, -x
+        else:
+            self.zero_count += weight
+            return
+        key = self._key(x)
+        store[key] = store.get(key, 0) + weight
+        if len(store) > self.max_buckets:
+            self._collapse(store)
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        keys = sorted(store)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            store[target] += store.pop(key)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for mine, theirs in ((self.positive, other.positive),
+                             (self.negative, other.negative)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+            if len(mine) > self.max_buckets:
+                self._collapse(mine)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+
+        rank = q * (self.count - 1)
+        seen = 0
+
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        return sketch
+
+
+# =========================
+# HEAVY HITTERS
+# =========================
+class HeavyHitters:
+    """
+    Misra-Gries frequent items with at most `capacity` counters.
+
+    Counts are exact while there are fewer distinct values than
+    `capacity`; otherwise each count is low by at most n / (capacity + 1).
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counters: Dict[str, int] = {}
+        self.total = 0
+
+    def add(self, item: str, weight: int = 1) -> None:
+        self.total += weight
+        if item in self.counters:
+            self.counters[item] += weight
+            return
+        self.counters[item] = weight
+        if len(self.counters) > self.capacity:
+            self._shrink()
+
+    def _shrink(self) -> None:
+        # Subtract the (capacity + 1)-th largest count from everyone
+        cut = sorted(self.counters.values(), reverse=True)[self.capacity]
+        self.counters = {k: v - cut for k, v in self.counters.items() if v > cut}
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        for item, n in other.counters.items():
+            self.counters[item] = self.counters.get(item, 0) + n
+        self.total += other.total
+        if len(self.counters) > self.capacity:
+            self._shrink()
+        return self
+
+    def top(self, n: int = 5) -> List[Tuple[str, int]]:
+        return sorted(self.counters.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "counters": self.counters,
+                "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HeavyHitters":
+        hh = cls(data["capacity"])
+        hh.counters = dict(data["counters"])
+        hh.total = data["total"]
+        return hh
+
+
+# =========================
+# DATASET STATS
+# =========================
+class DatasetStats:
+    """
+    All statistics for a stream of car records.
+
+    Usage:
+        stats = DatasetStats()
+        stats.update_many(iter_records("data/raw/cars_data.json"))
+        stats.merge(DatasetStats.from_dict(previous_run))
+    """
+
+    def __init__(
+        self,
+        numeric_fields: Iterable[str] = NUMERIC_FIELDS,
+        categorical_fields: Iterable[str] = CATEGORICAL_FIELDS,
+        completeness_fields: Iterable[str] = COMPLETENESS_FIELDS,
+        flag_fields: Iterable[str] = FLAG_FIELDS,
+        relative_accuracy: float = 0.01,
+        heavy_hitter_capacity: int = 64,
+    ):
+        self.count = 0
+        self.present = {f: 0 for f in completeness_fields}
+        self.numeric = {f: RunningStats() for f in numeric_fields}
+        self.sketches = {f: QuantileSketch(relative_accuracy) for f in numeric_fields}
+        self.categories = {f: HeavyHitters(heavy_hitter_capacity)
+                           for f in categorical_fields}
+        # field -> [records having the field, records where it is truthy]
+        self.flags = {f: [0, 0] for f in flag_fields}
+
+    def update(self, record: dict) -> None:
+        self.count += 1
+
+        for field in self.present:
+            if not is_missing(record.get(field)):
+                self.present[field] += 1
+
+        for field, stats in self.numeric.items():
+            x = _to_number(record.get(field))
+            if x is not None:
+                stats.add(x)
+                self.sketches[field].add(x)
+
+        for field, hh in self.categories.items():
+            value = record.get(field)
+            if not is_missing(value):
+                hh.add(str(value))
+
+        for field, counts in self.flags.items():
+            if field in record:
+                counts[0] += 1
+                if record[field] and not is_missing(record[field]):
+                    counts[1] += 1
+
+    def update_many(self, records: Iterable[dict]) -> "DatasetStats":
+        for record in records:
+            self.update(record)
+        return self
+
+    def merge(self, other: "DatasetStats") -> "DatasetStats":
+        self.count += other.count
+        for field, n in other.present.items():
+            self.present[field] = self.present.get(field, 0) + n
+        for field, stats in other.numeric.items():
+            self.numeric.setdefault(field, RunningStats()).merge(stats)
+        for field, sketch in other.sketches.items():
+            self.sketches.setdefault(
+                field, QuantileSketch(sketch.relative_accuracy)
+            ).merge(sketch)
+        for field, hh in other.categories.items():
+            self.categories.setdefault(field, HeavyHitters(hh.capacity)).merge(hh)
+        for field, (seen, truthy) in other.flags.items():
+            counts = self.flags.setdefault(field, [0, 0])
+            counts[0] += seen
+            counts[1] += truthy
+        return self
+
+    def completeness(self, field: str) -> float:
+        return self.present.get(field, 0) / self.count if self.count else 0.0
+
+    def quantile(self, field: str, q: float) -> Optional[float]:
+        value = self.sketches[field].quantile(q)
+        if value is None:
+            return None
+        # Bucket midpoints can fall just outside the observed range
+        stats = self.numeric[field]
+        return min(max(value, stats.min), stats.max)
+
+    def summary(self, top_n: int = 5) -> dict:
+        return {
+            "count": self.count,
+            "completeness": {f: round(self.completeness(f), 4) for f in self.present},
+            "numeric": {
+                f: {
+                    "count": s.count,
+                    "min": s.min,
+                    "max": s.max,
+                    "mean": round(s.mean, 2) if s.count else None,
+                    "p50": self.quantile(f, 0.5),
+                    "p90": self.quantile(f, 0.9),
+                    "p99": self.quantile(f, 0.99),
+                }
+                for f, s in self.numeric.items()
+            },
+            "top": {f: hh.top(top_n) for f, hh in self.categories.items()},
+            "flags": {f: c[1] for f, c in self.flags.items() if c[0]},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "present": self.present,
+            "numeric": {f: s.to_dict() for f, s in self.numeric.items()},
+            "sketches": {f: s.to_dict() for f, s in self.sketches.items()},
+            "categories": {f: h.to_dict() for f, h in self.categories.items()},
+            "flags": self.flags,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DatasetStats":
+        stats = cls(numeric_fields=(), categorical_fields=(),
+                    completeness_fields=(), flag_fields=())
+        stats.count = data["count"]
+        stats.present = dict(data["present"])
+        stats.numeric = {f: RunningStats.from_dict(d) for f, d in data["numeric"].items()}
+        stats.sketches = {f: QuantileSketch.from_dict(d) for f, d in data["sketches"].items()}
+        stats.categories = {f: HeavyHitters.from_dict(d) for f, d in data["categories"].items()}
+        stats.flags = {f: list(c) for f, c in data["flags"].items()}
+        return stats
+
+
+# =========================
+# STREAMING READERS
+# =========================
+def iter_jsonl_records(path: str) -> Iterator[dict]:
+    """One JSON object per line; blank lines are ignored"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_json_array_records(path: str, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    Yield the items of a top-level JSON array without loading the file.
+    Only one item (plus one read chunk) is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        started = False
+
+        while True:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= len(buf):
+                    break
+                if not started:
+                    if buf[pos] != "[":
+                        raise ValueError(f"{path}: expected a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                if buf[pos] == "]":
+                    return
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise
+                    break  # item spans the chunk boundary, read more
+                pos = end
+                yield item
+
+            if eof:
+                if started:
+                    raise ValueError(f"{path}: unterminated JSON array")
+                return
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """Stream records from a .jsonl file or a JSON array file"""
+    if path.endswith((".jsonl", ".ndjson")):
+        return iter_jsonl_records(path)
+    return iter_json_array_records(path)
+
+
+def stats_for_files(paths: Iterable[str], **kwargs) -> DatasetStats:
+    """Stats per file, merged (each file is one shard)"""
+    total = DatasetStats(**kwargs)
+    for path in paths:
+        total.merge(DatasetStats(**kwargs).update_many(iter_records(path)))
+    return total
@@ -0,0 +1,329 @@
+"""
+Flattened tree ensembles for low-latency inference
+==================================================
+Exports a fitted RandomForestRegressor or HistGradientBoostingRegressor
+into contiguous NumPy arrays (feature, threshold, left, right, value,
+missing_left) plus one root index per tree, and evaluates them with a
+pure-NumPy batch traversal that reproduces sklearn's predictions.
+
+The arrays are written as plain .npy files so every uvicorn worker can
+np.load(..., mmap_mode="r") them and share one copy of the pages
+through the OS page cache instead of unpickling its own estimator.
+
+Leaves point to themselves, so traversal is a fixed number of
+vectorized steps (the ensemble's max depth) with no per-row branching.
+
+Each export is written to its own versions/<id>/ directory and made
+current by atomically replacing current.json, so a reader never sees a
+half-swapped set of arrays. Older versions are garbage-collected; the
+previous one is kept for readers that resolved the pointer just before
+the flip.
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+# =========================
+# PROJECT PATHS
+# =========================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILED_MODEL_DIR = os.path.join(BASE_DIR, "data", "ml_models", "ml_model_compiled")
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "missing_left", "roots")
+
+POINTER_NAME = "current.json"
+VERSIONS_DIR_NAME = "versions"
+# Exported versions kept on disk (current + previous)
+KEEP_VERSIONS = 2
+
+# Rows evaluated per step; bounds the (rows x trees) index matrix
+DEFAULT_CHUNK_ROWS = 4096
+
+
+# =========================
+# EXPORT
+# =========================
+def _forest_trees(estimator):
+    """Per-tree node arrays of a RandomForestRegressor"""
+    for tree in estimator.estimators_:
+        t = tree.tree_
+        yield {
+            "feature": t.feature,
+            "threshold": t.threshold,
+            "left": t.children_left,
+            "right": t.children_right,
+            "value": t.value[:, 0, 0],
+            "missing_left": (
+                t.missing_go_to_left.astype(bool)
+                if hasattr(t, "missing_go_to_left")
+                else np.ones(t.node_count, dtype=bool)
+            ),
+            "is_leaf": t.children_left == -1,
+        }
+
+
+def _hgb_trees(estimator):
+    """Per-tree node arrays of a HistGradientBoostingRegressor"""
+    for predictors in estimator._predictors:
+        nodes = predictors[0].nodes
+        if nodes["is_categorical"].any():
+            raise ValueError("Categorical splits are not supported")
+        yield {
+            "feature": nodes["feature_idx"],
+            "threshold": nodes["num_threshold"],
+            "left": nodes["left"],
+            "right": nodes["right"],
+            "value": nodes["value"],
+            "missing_left": nodes["missing_go_to_left"].astype(bool),
+            "is_leaf": nodes["is_leaf"].astype(bool),
+        }
+
+
+def flatten_ensemble(estimator) -> dict:
+    """
+    Flatten a fitted ensemble into global node arrays.
+    Returns {"arrays": {...}, "meta": {...}}.
+    """
+    name = type(estimator).__name__
+
+    if name == "RandomForestRegressor":
+        trees = list(_forest_trees(estimator))
+        # sklearn trees compare float32 inputs against their thresholds
+        meta = {"aggregation": "mean", "baseline": 0.0, "input_dtype": "float32"}
+    elif name == "HistGradientBoostingRegressor":
+        if type(estimator._loss).__name__ != "HalfSquaredError":
+            raise ValueError("Only squared-error gradient boosting is supported")
+        trees = list(_hgb_trees(estimator))
+        meta = {
+            "aggregation": "sum",
+            "baseline": float(np.ravel(estimator._baseline_prediction)[0]),
+            "input_dtype": "float64",
+        }
+    else:
+        raise ValueError(f"Unsupported estimator: {name}")
+
+    if not trees:
+        raise ValueError("Ensemble has no trees")
+
+    feature, threshold, left, right, value, missing_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for tree in trees:
+        n = len(tree["feature"])
+        idx = np.arange(n)
+        is_leaf = tree["is_leaf"]
+
+        # Global indices; leaves loop onto themselves
+        left.append(np.where(is_leaf, idx, tree["left"]) + offset)
+        right.append(np.where(is_leaf, idx, tree["right"]) + offset)
+        feature.append(np.where(is_leaf, 0, tree["feature"]))
+        threshold.append(np.where(is_leaf, np.inf, tree["threshold"]))
+        value.append(tree["value"])
+        missing_left.append(tree["missing_left"])
+        roots.append(offset)
+
+        max_depth = max(max_depth, _tree_depth(tree["left"], tree["right"], is_leaf))
+        offset += n
+
+    arrays = {
+        "feature": np.ascontiguousarray(np.concatenate(feature), dtype=np.int32),
+        "threshold": np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+        "left": np.ascontiguousarray(np.concatenate(left), dtype=np.int32),
+        "right": np.ascontiguousarray(np.concatenate(right), dtype=np.int32),
+        "value": np.ascontiguousarray(np.concatenate(value), dtype=np.float64),
+        "missing_left": np.ascontiguousarray(np.concatenate(missing_left), dtype=bool),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+
+    meta.update({
+        "estimator": name,
+        "n_trees": len(trees),
+        "n_nodes": offset,
+        "max_depth": max_depth,
+        "n_features": int(estimator.n_features_in_),
+    })
+    return {"arrays": arrays, "meta": meta}
+
+
+def _tree_depth(left, right, is_leaf) -> int:
+    depth = 0
+    frontier = [0]
+    while frontier:
+        nxt = []
+        for node in frontier:
+            if not is_leaf[node]:
+                nxt.extend((left[node], right[node]))
+        if not nxt:
+            break
+        depth += 1
+        frontier = nxt
+    return depth
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def export_ensemble(estimator, out_dir: str = COMPILED_MODEL_DIR,
+                    extra_meta: Optional[dict] = None,
+                    keep_versions: int = KEEP_VERSIONS) -> dict:
+    """
+    Write the flattened ensemble as .npy files + meta.json into a new
+    out_dir/versions/<id>/ and point out_dir/current.json at it.
+    """
+    flat = flatten_ensemble(estimator)
+    meta = {**flat["meta"], **(extra_meta or {})}
+
+    versions_dir = os.path.join(out_dir, VERSIONS_DIR_NAME)
+    export_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+    final_dir = os.path.join(versions_dir, export_id)
+
+    tmp_dir = f"{final_dir}.tmp"
+    os.makedirs(tmp_dir)
+    for name, array in flat["arrays"].items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_dir, final_dir)
+
+    _write_json_atomic(os.path.join(out_dir, POINTER_NAME), {"version": export_id})
+
+    _drop_flat_layout(out_dir)
+    _collect_versions(versions_dir, export_id, keep_versions)
+    return meta
+
+
+def _drop_flat_layout(out_dir: str) -> None:
+    """Arrays of an export made before versioned directories existed"""
+    for filename in [f"{name}.npy" for name in ARRAY_NAMES] + ["meta.json"]:
+        try:
+            os.remove(os.path.join(out_dir, filename))
+        except FileNotFoundError:
+            pass
+
+
+def _collect_versions(versions_dir: str, current: str, keep: int) -> None:
+    """Remove all but the newest `keep` exports (never the current one)"""
+    # Export ids start with their timestamp, so names sort oldest first;
+    # *.tmp directories may belong to an export still in progress
+    older = sorted(
+        name for name in os.listdir(versions_dir)
+        if name != current and not name.endswith(".tmp")
+    )
+    for name in older[:max(0, len(older) - (keep - 1))]:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def resolve_compiled_dir(path: str = COMPILED_MODEL_DIR) -> Optional[str]:
+    """
+    Directory holding the current arrays: the version current.json points
+    to, or `path` itself for a flat (pre-versioning) export. None if
+    nothing has been exported.
+    """
+    pointer_path = os.path.join(path, POINTER_NAME)
+    if os.path.exists(pointer_path):
+        with open(pointer_path, "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+        return os.path.join(path, VERSIONS_DIR_NAME, version)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+    return None
+
+
+# =========================
+# EVALUATION
+# =========================
+class CompiledEnsemble:
+    """
+    Pure-NumPy evaluator over flattened tree arrays.
+
+    Usage:
+        ensemble = CompiledEnsemble.load(COMPILED_MODEL_DIR)   # memory-mapped
+        ensemble.predict(X)
+    """
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.meta = meta
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.missing_left = arrays["missing_left"]
+        self.roots = arrays["roots"]
+
+        self.max_depth = int(meta["max_depth"])
+        self.n_features = int(meta["n_features"])
+        self.baseline = float(meta.get("baseline", 0.0))
+        self._mean = meta["aggregation"] == "mean"
+        self._float32 = meta.get("input_dtype") == "float32"
+
+    @classmethod
+    def from_estimator(cls, estimator) -> "CompiledEnsemble":
+        flat = flatten_ensemble(estimator)
+        return cls(flat["arrays"], flat["meta"])
+
+    @classmethod
+    def load(cls, path: str = COMPILED_MODEL_DIR, mmap: bool = True) -> "CompiledEnsemble":
+        resolved = resolve_compiled_dir(path)
+        if resolved is None:
+            raise FileNotFoundError(f"No compiled ensemble in {path}")
+        path = resolved
+
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"),
+                          mmap_mode="r" if mmap else None)
+            for name in ARRAY_NAMES
+        }
+        return cls(arrays, meta)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.meta.get("model_version")
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n = len(X)
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            nan = np.isnan(x)
+            go_left = np.where(nan, self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        leaf_values = self.value[node]
+        if self._mean:
+            return leaf_values.mean(axis=1)
+        return leaf_values.sum(axis=1) + self.baseline
+
+    def predict(self, X, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected shape (n, {self.n_features}), got {X.shape}"
+            )
+        if self._float32:
+            X = X.astype(np.float32).astype(np.float64)
+
+        if len(X) <= chunk_rows:
+            return self._predict_chunk(X)
+
+        return np.concatenate([
+            self._predict_chunk(X[i:i + chunk_rows])
+            for i in range(0, len(X), chunk_rows)
+        ])
@@ -0,0 +1,123 @@
+"""
+Startup warm-up and readiness
+=============================
+Importing the app stays cheap (the model stack is imported lazily); the
+expensive parts run here, once, when the server starts:
+
+    model      load + warm the registry model (or the plain
+               ML_MODEL_PATH artifact when nothing is published)
+    catalog    map the shared /cars/top-deals catalog snapshot
+
+STARTUP_WARMUP picks how:
+
+    background (default)  serve immediately, report not-ready until done
+    blocking              finish warm-up before accepting connections
+    off                   everything loads lazily on first use
+
+The process is live as soon as it answers /health; it is ready once the
+warm-up finished. A failed step is reported but does not keep the
+process unready, because every step also works lazily per request.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "background").lower()
+
+
+class Readiness:
+    """
+    Warm-up state shared by the lifespan hook and /health.
+
+    Usage:
+        readiness = Readiness()
+        readiness.run([("model", warm_model), ("catalog", warm_catalog)])
+        readiness.status()
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self.steps: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+
+    def run(self, steps: List[Tuple[str, Callable[[], Optional[dict]]]]) -> None:
+        """Run warm-up steps in order; each returns optional details"""
+        started = time.perf_counter()
+        self.started_at = datetime.now().isoformat()
+
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                details = step() or {}
+                result = {"status": details.pop("status", "ok"), **details}
+            except Exception as e:
+                result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            result["seconds"] = round(time.perf_counter() - step_started, 4)
+            with self._lock:
+                self.steps[name] = result
+
+        self.seconds = round(time.perf_counter() - started, 4)
+        self.finished_at = datetime.now().isoformat()
+        self.mark_ready()
+
+    def start_background(self, steps, on_done: Optional[Callable[[], None]] = None) -> threading.Thread:
+        def target():
+            self.run(steps)
+            if on_done is not None:
+                on_done()
+
+        thread = threading.Thread(target=target, name="startup-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "mode": STARTUP_WARMUP,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "seconds": self.seconds,
+                "steps": {name: dict(step) for name, step in self.steps.items()},
+            }
+
+
+# =========================
+# STEPS
+# =========================
+def warm_model() -> dict:
+    from app.ai_calculations import _serving_model, live_model
+
+    loaded = live_model.current()
+    if loaded is not None:
+        return {"version": loaded.version, "source": "registry"}
+
+    try:
+        model = _serving_model()
+    except FileNotFoundError:
+        # The analysis endpoints don't need the ML model
+        return {"status": "skipped", "reason": "no model artifact"}
+    model.warm_up()
+    return {"version": model.version, "source": "ml_model_path"}
+
+
+def warm_catalog() -> dict:
+    from app.catalog import SOURCE_PATH, load_catalog_snapshot
+
+    if not os.path.exists(SOURCE_PATH):
+        return {"status": "skipped", "reason": "scrapers/output.json not found"}
+    snapshot = load_catalog_snapshot()
+    return {"cars": len(snapshot), "generation": snapshot.generation}
+
+
+DEFAULT_STEPS = [("model", warm_model), ("catalog", warm_catalog)]
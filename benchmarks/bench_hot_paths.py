@@ -0,0 +1,296 @@
+"""
+Benchmarks for the analysis hot paths
+=====================================
+Times the functions every request goes through on synthetic listings
+(benchmarks/synthetic_listings.py) at several dataset sizes:
+
+    normalize            normalize_scraped_car            (raw listing)
+    profit               calculate_profit_and_recommendation (clean car)
+    rank                 rank_cars_by_investment_quality  (one call on all cars)
+    engine_analyze       CarRecommendationEngine.analyze_car_for_user
+    engine_ingested      the same on cars passed through ingest_car first
+    engine_compare       CarRecommendationEngine.compare_two_cars
+    predict_single       predict_car_price_ml             (one car per call)
+    predict_batch        predict_car_prices_ml            (1,000 cars per call)
+
+Each (benchmark, size) runs in a fresh process so its peak RSS is its
+own. Input generation is not timed. Latency percentiles come from a
+streaming sketch, so 1M calls don't keep 1M timings.
+
+    python benchmarks/bench_hot_paths.py                          # 1k, 100k, 1M
+    python benchmarks/bench_hot_paths.py --sizes 1000 --only profit rank
+    python benchmarks/bench_hot_paths.py --baseline data/benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_listings import DEFAULT_SEED, ListingGenerator, load_profile
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+INPUT_CHUNK = 10_000
+PREDICT_BATCH = 1_000
+DEFAULT_TOLERANCE = 0.10
+
+USER_CONTEXT = {
+    "max_budget": 15000,
+    "min_seats": 5,
+    "preferred_gearbox": "Manual",
+    "preferred_fuel": "Diesel",
+    "wanted_features": [],
+    "usage_type": "daily",
+    "priority": "balanced",
+}
+
+
+def _rss_mb() -> float:
+    """Peak resident set size of this process so far (MB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# =========================
+# CASES
+# =========================
+# Each case: (input shape, callable(inputs chunk) -> per-call latencies)
+def _per_call(fn: Callable) -> Callable[[list], List[float]]:
+    def run(items: list) -> List[float]:
+        timings = []
+        clock = time.perf_counter
+        for item in items:
+            started = clock()
+            fn(item)
+            timings.append(clock() - started)
+        return timings
+    return run
+
+
+def _cases() -> Dict[str, dict]:
+    from app.ai_calculations import (
+        calculate_profit_and_recommendation,
+        normalize_scraped_car,
+        predict_car_price_ml,
+        predict_car_prices_ml,
+        rank_cars_by_investment_quality,
+    )
+    from app.car_recommendation_engine import CarRecommendationEngine, ingest_car
+
+    engine = CarRecommendationEngine()
+
+    def analyzed(cars):
+        return [{**car, **calculate_profit_and_recommendation(car)} for car in cars]
+
+    def pairs(cars):
+        return list(zip(cars[0::2], cars[1::2]))
+
+    def predict_batches(items: list) -> List[float]:
+        timings = []
+        for i in range(0, len(items), PREDICT_BATCH):
+            started = time.perf_counter()
+            predict_car_prices_ml(items[i:i + PREDICT_BATCH])
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def rank(items: list) -> List[float]:
+        started = time.perf_counter()
+        rank_cars_by_investment_quality(items)
+        return [time.perf_counter() - started]
+
+    return {
+        "normalize": {"shape": "raw", "run": _per_call(normalize_scraped_car)},
+        "profit": {"shape": "clean", "run": _per_call(calculate_profit_and_recommendation)},
+        "rank": {"shape": "clean", "prepare": analyzed, "run": rank, "whole": True},
+        "engine_analyze": {
+            "shape": "raw",
+            "run": _per_call(lambda car: engine.analyze_car_for_user(car, USER_CONTEXT)),
+        },
+        "engine_ingested": {
+            "shape": "raw",
+            "prepare": lambda cars: [ingest_car(car) for car in cars],
+            "run": _per_call(lambda car: engine.analyze_car_for_user(car, USER_CONTEXT)),
+        },
+        "engine_compare": {
+            "shape": "raw",
+            "prepare": pairs,
+            "run": _per_call(lambda pair: engine.compare_two_cars(pair[0], pair[1], USER_CONTEXT)),
+        },
+        "predict_single": {"shape": "clean", "run": _per_call(predict_car_price_ml)},
+        "predict_batch": {"shape": "clean", "run": predict_batches},
+    }
+
+
+def _inputs(generator: ListingGenerator, size: int, shape: str,
+            chunk: int) -> Iterator[list]:
+    batch = []
+    for car in generator.generate(size, shape):
+        batch.append(car)
+        if len(batch) == chunk:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_case(name: str, size: int, seed: int = DEFAULT_SEED) -> dict:
+    """Run one benchmark at one size (called in a fresh process)"""
+    from app.streaming_stats import QuantileSketch
+
+    case = _cases()[name]
+    generator = ListingGenerator(load_profile(), seed=seed)
+    prepare = case.get("prepare", lambda items: items)
+
+    # Warm-up: model loading, first-call overheads
+    case["run"](prepare(list(generator.generate(min(size, 50), case["shape"]))))
+    baseline_rss = _rss_mb()
+
+    chunk = size if case.get("whole") else INPUT_CHUNK
+    sketch = QuantileSketch()
+    total = 0.0
+    calls = 0
+
+    for items in _inputs(generator, size, case["shape"], chunk):
+        for seconds in case["run"](prepare(items)):
+            sketch.add(seconds * 1e6)
+            total += seconds
+            calls += 1
+
+    return {
+        "benchmark": name,
+        "size": size,
+        "calls": calls,
+        "seconds": round(total, 4),
+        "cars_per_second": round(size / total, 1) if total else None,
+        "p50_us": round(sketch.quantile(0.5), 2),
+        "p99_us": round(sketch.quantile(0.99), 2),
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(_rss_mb(), 1),
+    }
+
+
+# =========================
+# REPORTING
+# =========================
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    import numpy
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": _git_commit(),
+    }
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[dict]:
+    """
+    Throughput / p99 change vs a stored run. A throughput drop beyond
+    `tolerance` is a regression; p99 is reported but noisier, so not gated.
+    """
+    previous = {(r["benchmark"], r["size"]): r for r in baseline.get("results", [])}
+    rows = []
+    for r in results:
+        old = previous.get((r["benchmark"], r["size"]))
+        if not old or not old.get("cars_per_second") or not r.get("cars_per_second"):
+            continue
+        throughput = r["cars_per_second"] / old["cars_per_second"] - 1
+        p99 = r["p99_us"] / old["p99_us"] - 1 if old["p99_us"] else 0.0
+        rows.append({
+            "benchmark": r["benchmark"],
+            "size": r["size"],
+            "throughput_change": round(throughput, 4),
+            "p99_change": round(p99, 4),
+            "regression": throughput < -tolerance,
+        })
+    return rows
+
+
+def main():
+    cases = list(_cases())
+
+    parser = argparse.ArgumentParser(description="Hot path benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--only", nargs="+", choices=cases, default=cases)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="result JSON (default data/benchmarks/hot_paths_<time>.json)")
+    parser.add_argument("--baseline", help="earlier result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    print("=" * 90)
+    print("⏱️  HOT PATH BENCHMARKS")
+    print("=" * 90)
+    print(f"{'benchmark':<16} {'size':>10} {'cars/s':>12} {'p50 µs':>10} {'p99 µs':>10} "
+          f"{'peak MB':>9} {'seconds':>9}")
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name in args.only:
+        for size in args.sizes:
+            # Fresh process per case: clean caches and a per-case peak RSS
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                r = pool.submit(run_case, name, size, args.seed).result()
+            results.append(r)
+            print(f"{name:<16} {size:>10,} {r['cars_per_second']:>12,.0f} {r['p50_us']:>10,.1f} "
+                  f"{r['p99_us']:>10,.1f} {r['peak_rss_mb']:>9,.0f} {r['seconds']:>9.2f}")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "seed": args.seed,
+        "environment": environment(),
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(results, json.load(f), args.tolerance)
+
+        print(f"\nvs {args.baseline}:")
+        for row in report["comparison"]:
+            flag = "❌ REGRESSION" if row["regression"] else ""
+            print(f"  {row['benchmark']:<16} {row['size']:>10,}  throughput "
+                  f"{row['throughput_change']:+.1%}  p99 {row['p99_change']:+.1%}  {flag}")
+        regressions = [row for row in report["comparison"] if row["regression"]]
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"hot_paths_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 {out}")
+
+    if regressions:
+        sys.exit(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
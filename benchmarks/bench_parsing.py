@@ -0,0 +1,285 @@
+"""
+Scraped field parsing benchmark
+===============================
+Parses the price / mileage / first registration / power strings of
+synthetic raw listings (benchmarks/synthetic_listings.py), with a share
+of them rewritten into other locale formats ("€ 12.990,-", "239.000 km",
+"N/A", "2015-11", ...), through:
+
+    api-legacy     the replace()/int() chain normalize_scraped_car used
+                   (failures counted as None instead of raising; the API
+                   never parsed power, so that column uses the script regex)
+    script-legacy  the regex extract_* helpers convert_scraped_data.py had
+    scalar         app.parsing parse_* per record
+    batch          app.parsing.parse_many per column
+    column         app.parsing.parse_column per column (float64 + mask)
+
+On the unmodified scraper formats the new parsers are checked against
+the legacy API chain.
+
+    python benchmarks/bench_parsing.py
+    python benchmarks/bench_parsing.py --sizes 10000 1000000 --variants 0.2
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app.parsing import (
+    parse_column,
+    parse_many,
+    parse_mileage,
+    parse_power_kw,
+    parse_price,
+    parse_year,
+)
+from synthetic_listings import DEFAULT_SEED, ListingGenerator, load_profile
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 3
+DEFAULT_VARIANTS = 0.1
+
+KINDS = ("price", "mileage", "year", "power_kw")
+
+
+# =========================
+# LEGACY PARSERS (as they were)
+# =========================
+def _api_price(raw):
+    if not raw:
+        return 0
+    return int(raw.replace("€", "").replace(",", "").strip())
+
+
+def _api_mileage(raw):
+    if not raw:
+        return 0
+    return int(raw.replace("km", "").replace(",", "").strip())
+
+
+def _api_year(raw):
+    if raw and "/" in raw:
+        return int(raw.split("/")[-1])
+    return None
+
+
+def _api_or_none(fn, raw):
+    try:
+        return fn(raw)
+    except ValueError:
+        return None
+
+
+def _script_price(price_str):
+    if not price_str:
+        return None
+    numbers = re.findall(r'\d+', price_str.replace(',', '').replace('.', ''))
+    return int(numbers[0]) if numbers else None
+
+
+def _script_mileage(mileage_str):
+    if not mileage_str:
+        return None
+    numbers = re.findall(r'\d+', mileage_str.replace(',', '').replace('.', ''))
+    if not numbers:
+        return None
+    km = int(numbers[0])
+    return km * 1000 if km < 1000 else km
+
+
+def _script_year(registration_str):
+    if not registration_str:
+        return None
+    match = re.search(r'(20\d{2}|19\d{2})', registration_str)
+    return int(match.group(1)) if match else None
+
+
+def _script_power(power_str):
+    if not power_str:
+        return None
+    match = re.search(r'(\d+)\s*kW', power_str)
+    return int(match.group(1)) if match else None
+
+
+# =========================
+# INPUT
+# =========================
+def _variant(kind: str, value: str, choice: int) -> str:
+    """The same field as another locale / scraper would write it"""
+    if kind == "price":
+        digits = value.replace("€", "").replace(",", "").strip()
+        grouped = f"{int(digits):,}"
+        return [
+            f"€ {grouped.replace(',', '.')},-",
+            f"{grouped.replace(',', chr(0xa0))} €",
+            f"€ {grouped}.00",
+            "Price on request",
+        ][choice % 4]
+    if kind == "mileage":
+        digits = value.replace("km", "").replace(",", "").strip()
+        grouped = f"{int(digits):,}"
+        return [
+            f"{grouped.replace(',', '.')} km",
+            f"{grouped.replace(',', ' ')} km",
+            "N/A",
+            "",
+        ][choice % 4]
+    if kind == "year":
+        month, _, year = value.partition("/")
+        return [f"{year}-{month}", year, "", "new"][choice % 4]
+    return [value, value.split("(")[-1].rstrip(")"), "", "n/a"][choice % 4]
+
+
+def build_columns(size: int, variants: float, seed: int):
+    """{kind: [str, ...]} plus a mask of the rows left in scraper format"""
+    generator = ListingGenerator(load_profile(), seed=seed)
+    columns = {kind: [] for kind in KINDS}
+    for car in generator.generate(size, "raw"):
+        history = car["Vehicle_History"]
+        columns["price"].append(car["price"])
+        columns["mileage"].append(history.get("Mileage", ""))
+        columns["year"].append(history.get("First_registration", ""))
+        columns["power_kw"].append(car["Technical_Data"].get("Power", ""))
+
+    rng = np.random.default_rng(seed)
+    rewritten = rng.random(size) < variants
+    choices = rng.integers(0, 4, size)
+    for kind, values in columns.items():
+        for i in np.flatnonzero(rewritten):
+            values[i] = _variant(kind, values[i] or "", int(choices[i]))
+    return columns, ~rewritten
+
+
+# =========================
+# PATHS
+# =========================
+def api_legacy(columns):
+    return {
+        "price": [_api_or_none(_api_price, v) for v in columns["price"]],
+        "mileage": [_api_or_none(_api_mileage, v) for v in columns["mileage"]],
+        "year": [_api_or_none(_api_year, v) for v in columns["year"]],
+        "power_kw": [_script_power(v) for v in columns["power_kw"]],
+    }
+
+
+def script_legacy(columns):
+    return {
+        "price": [_script_price(v) for v in columns["price"]],
+        "mileage": [_script_mileage(v) for v in columns["mileage"]],
+        "year": [_script_year(v) for v in columns["year"]],
+        "power_kw": [_script_power(v) for v in columns["power_kw"]],
+    }
+
+
+def scalar(columns):
+    return {
+        "price": [parse_price(v) for v in columns["price"]],
+        "mileage": [parse_mileage(v) for v in columns["mileage"]],
+        "year": [parse_year(v) for v in columns["year"]],
+        "power_kw": [parse_power_kw(v) for v in columns["power_kw"]],
+    }
+
+
+def batch(columns):
+    return {kind: parse_many(values, kind) for kind, values in columns.items()}
+
+
+def column(columns):
+    return {kind: parse_column(values, kind) for kind, values in columns.items()}
+
+
+def _best_of(fn, repeat: int):
+    best = None
+    output = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def _check(expected, actual, standard, name, size):
+    for kind in ("price", "mileage", "year"):
+        legacy = expected[kind]
+        values = actual[kind]
+        for i in np.flatnonzero(standard):
+            if legacy[i] is not None and values[i] != legacy[i]:
+                sys.exit(f"❌ {name} {kind} differs from the legacy parser at row {i} "
+                         f"of {size}: {legacy[i]!r} != {values[i]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraped field parsing benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--variants", type=float, default=DEFAULT_VARIANTS,
+                        help="share of rows rewritten into other formats")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="result JSON (default data/benchmarks/parsing_<time>.json)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"🔢 SCRAPED FIELD PARSING  ({len(KINDS)} fields, {args.variants:.0%} locale variants)")
+    print("=" * 70)
+    print(f"{'records':>10} {'path':<14} {'ms':>10} {'records/s':>14} {'speedup':>8}")
+
+    results = []
+    for size in args.sizes:
+        columns, standard = build_columns(size, args.variants, args.seed)
+
+        baseline_seconds, expected = _best_of(lambda: api_legacy(columns), args.repeat)
+        cases = [
+            ("api-legacy", baseline_seconds, None),
+            ("script-legacy", *_best_of(lambda: script_legacy(columns), args.repeat)),
+            ("scalar", *_best_of(lambda: scalar(columns), args.repeat)),
+            ("batch", *_best_of(lambda: batch(columns), args.repeat)),
+            ("column", *_best_of(lambda: column(columns), args.repeat)),
+        ]
+
+        for name, seconds, output in cases:
+            if name in ("scalar", "batch"):
+                _check(expected, output, standard, name, size)
+            elif name == "column":
+                as_ints = {kind: [None if np.isnan(v) else int(v) for v in parsed.values]
+                           for kind, parsed in output.items()}
+                _check(expected, as_ints, standard, name, size)
+            r = {
+                "records": size,
+                "path": name,
+                "ms": round(seconds * 1000, 3),
+                "records_per_second": round(size / seconds, 1),
+                "speedup": round(baseline_seconds / seconds, 2),
+            }
+            results.append(r)
+            print(f"{size:>10,} {name:<14} {r['ms']:>10.2f} {r['records_per_second']:>14,.0f} "
+                  f"{r['speedup']:>7.1f}x")
+
+        valid = {kind: int(parsed.valid.sum()) for kind, parsed in cases[-1][2].items()}
+        print(f"{'':>10} valid: " + ", ".join(f"{k} {v:,}" for k, v in valid.items()))
+
+    print("\n✅ new parsers match the legacy API chain on scraper-format rows")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"parsing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(), "variants": args.variants,
+                   "results": results}, f, indent=2)
+    print(f"💾 {out}")
+
+
+if __name__ == "__main__":
+    main()
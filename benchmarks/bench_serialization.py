@@ -0,0 +1,154 @@
+"""
+Response serialization benchmark
+================================
+Compares, on synthetic listings, how long it takes to turn analysis
+results into response bytes:
+
+    validated     what FastAPI does for response_model=List[CarAnalysis]:
+                  pydantic validate + dump(mode="json") + stdlib json
+    fast          app.fast_json: ModelRows.prepare + orjson (if installed)
+    fast_stdlib   ModelRows.prepare + stdlib json (no orjson)
+    deals_*       the /cars/top-deals dict: jsonable_encoder + stdlib json
+                  vs fast_json.dumps
+
+Every fast path's bytes are checked against the current path's.
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --sizes 1000 100000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import fast_json
+from app.ai_calculations import calculate_profit_and_recommendation, normalize_scraped_car
+from app.models import CarAnalysis
+from synthetic_listings import DEFAULT_SEED, ListingGenerator, load_profile
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+DEFAULT_REPEAT = 5
+DEALS_ROWS = 50
+
+
+def analysis_results(raw_cars: List[dict]) -> List[dict]:
+    """Rows exactly as /analyze-cars/ builds them"""
+    results = []
+    for raw in raw_cars:
+        clean = normalize_scraped_car(raw)
+        analysis = calculate_profit_and_recommendation(clean)
+        if analysis["profit"] < 0:
+            analysis["profit"] = 0
+            analysis["profit_label"] = "NO_PROFIT"
+        results.append({**clean, **analysis})
+    return results
+
+
+def _best_of(fn, repeat: int):
+    best = None
+    output = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="result JSON (default data/benchmarks/serialization_<time>.json)")
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[CarAnalysis])
+    rows_builder = fast_json.ModelRows(CarAnalysis)
+    generator = ListingGenerator(load_profile(), seed=args.seed)
+
+    def validated(rows):
+        return fast_json.stdlib_dumps(adapter.dump_python(adapter.validate_python(rows), mode="json"))
+
+    def fast(rows):
+        prepared, safe = rows_builder.prepare(rows)
+        return fast_json.dumps(prepared, checked=safe)
+
+    def fast_stdlib(rows):
+        prepared, _ = rows_builder.prepare(rows)
+        return fast_json.stdlib_dumps(prepared)
+
+    def deals(rows):
+        return {
+            "mode": "relaxed",
+            "summary": {"strong_opportunities": len(rows), "near_miss_opportunities": 0},
+            "strong_opportunities": rows,
+            "near_miss_opportunities": [],
+        }
+
+    print("=" * 78)
+    print(f"🧾 RESPONSE SERIALIZATION  (orjson: {'yes' if fast_json.orjson else 'no'})")
+    print("=" * 78)
+    print(f"{'rows':>8} {'path':<14} {'ms':>10} {'rows/s':>14} {'speedup':>8} {'MB':>7}")
+
+    results = []
+    for size in args.sizes:
+        rows = analysis_results(list(generator.generate(size, "raw")))
+        deal_rows = rows[:DEALS_ROWS]
+
+        baseline_seconds, expected = _best_of(lambda: validated(rows), args.repeat)
+        deals_seconds, deals_expected = _best_of(
+            lambda: fast_json.stdlib_dumps(jsonable_encoder(deals(deal_rows))), args.repeat)
+
+        cases = [
+            ("validated", baseline_seconds, expected, expected, baseline_seconds),
+            ("fast", *_best_of(lambda: fast(rows), args.repeat), expected, baseline_seconds),
+            ("fast_stdlib", *_best_of(lambda: fast_stdlib(rows), args.repeat), expected,
+             baseline_seconds),
+            ("deals_current", deals_seconds, deals_expected, deals_expected, deals_seconds),
+            ("deals_fast", *_best_of(lambda: fast_json.dumps(deals(deal_rows)), args.repeat),
+             deals_expected, deals_seconds),
+        ]
+
+        for name, seconds, output, reference, base in cases:
+            if output != reference:
+                sys.exit(f"❌ {name} output differs from the current path at {size} rows")
+            count = DEALS_ROWS if name.startswith("deals") else size
+            r = {
+                "rows": size,
+                "path": name,
+                "ms": round(seconds * 1000, 3),
+                "rows_per_second": round(min(count, size) / seconds, 1),
+                "speedup": round(base / seconds, 2),
+                "bytes": len(output),
+            }
+            results.append(r)
+            print(f"{size:>8,} {name:<14} {r['ms']:>10.2f} {r['rows_per_second']:>14,.0f} "
+                  f"{r['speedup']:>7.1f}x {len(output) / 1e6:>7.2f}")
+
+    print("\n✅ all fast paths byte-identical to the current responses")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"serialization_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(),
+                   "orjson": bool(fast_json.orjson), "results": results}, f, indent=2)
+    print(f"💾 {out}")
+
+
+if __name__ == "__main__":
+    main()
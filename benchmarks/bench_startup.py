@@ -0,0 +1,153 @@
+"""
+Cold start benchmark
+====================
+Measures how long a fresh API process takes to become useful:
+
+    import     `import app.main` in a fresh interpreter (and which heavy
+               modules that pulls in)
+    live       uvicorn launched -> /health/live answers
+    ready      uvicorn launched -> /health/ready answers 200 (model and
+               catalog warmed, see app/warmup.py)
+
+Each measurement is repeated in new processes; the median ready time is
+checked against --target so autoscaled workers keep starting quickly.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --target 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import _free_port, start_server, stop_server
+
+DEFAULT_RUNS = 5
+DEFAULT_TARGET_SECONDS = 5.0
+POLL_SECONDS = 0.02
+STARTUP_TIMEOUT = 60
+HEAVY_MODULES = ("numpy", "joblib", "sklearn", "pandas", "scipy")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds,
+                  "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import() -> dict:
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=BASE_DIR,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    total = time.perf_counter() - started
+    probe = json.loads(out.strip().splitlines()[-1])
+    return {
+        "import_seconds": round(probe["seconds"], 4),
+        "process_seconds": round(total, 4),
+        "heavy_modules": probe["heavy"],
+    }
+
+
+def _wait_for(url: str, server: subprocess.Popen, started: float) -> float:
+    while time.perf_counter() - started < STARTUP_TIMEOUT:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(POLL_SECONDS)
+    raise RuntimeError(f"{url} not OK after {STARTUP_TIMEOUT}s")
+
+
+def measure_server() -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = start_server(1, port)
+    try:
+        live = _wait_for(f"{base_url}/health/live", server, started)
+        ready = _wait_for(f"{base_url}/health/ready", server, started)
+        steps = httpx.get(f"{base_url}/health/ready", timeout=5).json().get("steps", {})
+    finally:
+        stop_server(server)
+    return {
+        "live_seconds": round(live, 4),
+        "ready_seconds": round(ready, 4),
+        "warm_up_steps": {name: step.get("seconds") for name, step in steps.items()},
+    }
+
+
+def _summary(values):
+    return {
+        "median": round(statistics.median(values), 4),
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET_SECONDS,
+                        help="max median seconds from launch to ready")
+    parser.add_argument("--out", help="result JSON (default data/benchmarks/startup_<time>.json)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🚀 COLD START BENCHMARK")
+    print("=" * 70)
+    print(f"{'run':>4} {'import s':>10} {'live s':>10} {'ready s':>10}  heavy modules on import")
+
+    runs = []
+    for i in range(args.runs):
+        r = {**measure_import(), **measure_server()}
+        runs.append(r)
+        print(f"{i + 1:>4} {r['import_seconds']:>10.3f} {r['live_seconds']:>10.3f} "
+              f"{r['ready_seconds']:>10.3f}  {', '.join(r['heavy_modules']) or '-'}")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "target_seconds": args.target,
+        "import": _summary([r["import_seconds"] for r in runs]),
+        "live": _summary([r["live_seconds"] for r in runs]),
+        "ready": _summary([r["ready_seconds"] for r in runs]),
+        "runs": runs,
+    }
+
+    print(f"\nmedian: import {report['import']['median']:.3f}s, "
+          f"live {report['live']['median']:.3f}s, ready {report['ready']['median']:.3f}s "
+          f"(target {args.target:g}s)")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 {out}")
+
+    if report["ready"]["median"] > args.target:
+        sys.exit(f"❌ median ready time {report['ready']['median']:.2f}s exceeds {args.target:g}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Bulk request validation benchmark
+=================================
+Compares, on synthetic clean listings, how long the comparison endpoints
+spend turning a decoded `{"cars": [...]}` body into per-car dicts:
+
+    pydantic   what FastAPI does for `payload: InvestmentCompareRequest`:
+               validate one CarInput per car, then model_dump() each
+    columns    app.bulk_validation: BulkValidator.validate (columns only)
+    rows       BulkValidator.validate + rows() (what the endpoints use)
+
+The dicts from both paths are checked for equality.
+
+    python benchmarks/bench_validation.py
+    python benchmarks/bench_validation.py --sizes 1000 100000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import TypeAdapter
+
+from app.routes import InvestmentCompareRequest, investment_compare_validator
+from synthetic_listings import DEFAULT_SEED, ListingGenerator, load_profile
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+DEFAULT_REPEAT = 5
+
+
+def _best_of(fn, repeat: int):
+    best = None
+    output = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk request validation benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", help="result JSON (default data/benchmarks/validation_<time>.json)")
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(InvestmentCompareRequest)
+    validator = investment_compare_validator
+    generator = ListingGenerator(load_profile(), seed=args.seed)
+
+    def pydantic_rows(body):
+        return [car.model_dump() for car in adapter.validate_python(body).cars]
+
+    def columns(body):
+        return validator.validate(body)[1]
+
+    def rows(body):
+        return validator.rows(validator.validate(body)[1])
+
+    print("=" * 70)
+    print("🧮 BULK REQUEST VALIDATION  (/cars/compare-investment body)")
+    print("=" * 70)
+    print(f"{'cars':>8} {'path':<10} {'ms':>10} {'cars/s':>14} {'speedup':>8}")
+
+    results = []
+    for size in args.sizes:
+        body = {"cars": list(generator.generate(size, "clean"))}
+
+        baseline_seconds, expected = _best_of(lambda: pydantic_rows(body), args.repeat)
+        cases = [
+            ("pydantic", baseline_seconds, expected),
+            ("columns", *_best_of(lambda: columns(body), args.repeat)),
+            ("rows", *_best_of(lambda: rows(body), args.repeat)),
+        ]
+
+        for name, seconds, output in cases:
+            if name == "columns":
+                output = validator.rows(output)
+            if output != expected:
+                sys.exit(f"❌ {name} differs from pydantic validation at {size} cars")
+            r = {
+                "cars": size,
+                "path": name,
+                "ms": round(seconds * 1000, 3),
+                "cars_per_second": round(size / seconds, 1),
+                "speedup": round(baseline_seconds / seconds, 2),
+            }
+            results.append(r)
+            print(f"{size:>8,} {name:<10} {r['ms']:>10.2f} {r['cars_per_second']:>14,.0f} "
+                  f"{r['speedup']:>7.1f}x")
+
+    print("\n✅ column validation matches pydantic on every size")
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"validation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(), "results": results}, f, indent=2)
+    print(f"💾 {out}")
+
+
+if __name__ == "__main__":
+    main()
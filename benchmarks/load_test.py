@@ -0,0 +1,404 @@
+"""
+Local HTTP load test for the API
+================================
+Starts the app under uvicorn with N workers, drives a weighted mix of
+requests at one or more concurrency levels (closed loop: each virtual
+client sends its next request as soon as the previous one finished)
+and samples server CPU / RSS from /proc once a second.
+
+Payloads are pre-built from synthetic listings
+(benchmarks/synthetic_listings.py) with realistic batch sizes, so the
+client spends its time sending, not serializing.
+
+    python benchmarks/load_test.py --workers 2 --concurrency 1 8 32 --duration 20
+    python benchmarks/load_test.py --mix analyze=1 --analyze-sizes 100 --out data/benchmarks/analyze.json
+
+Client and server share the machine; on few cores the client's own
+CPU use lowers the measured ceiling.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "benchmarks")
+sys.path.append(BASE_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_listings import DEFAULT_SEED, ListingGenerator, load_profile
+
+DEFAULT_MIX = "analyze=40,top_deals=30,compare_investment=15,compare_user_context=15"
+PAYLOADS_PER_ENDPOINT = 200
+SAMPLE_SECONDS = 1.0
+STARTUP_TIMEOUT = 60
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+# =========================
+# PAYLOADS
+# =========================
+def _sizes(spec: str) -> List[int]:
+    return [int(s) for s in spec.split(",") if s]
+
+
+def build_requests(args) -> Dict[str, List[dict]]:
+    """Pre-serialized requests per endpoint"""
+    rng = random.Random(args.seed)
+    generator = ListingGenerator(load_profile(), seed=args.seed)
+    pool_size = max(PAYLOADS_PER_ENDPOINT * max(_sizes(args.analyze_sizes)), 1000)
+    raw = list(generator.generate(pool_size, "raw"))
+    clean = list(generator.generate(pool_size, "clean"))
+
+    def sample(pool, sizes):
+        size = rng.choice(sizes)
+        start = rng.randrange(0, len(pool) - size + 1)
+        return pool[start:start + size]
+
+    def body(payload) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+
+    requests = {
+        "analyze": [
+            {"method": "POST", "url": "/analyze-cars/",
+             "content": body(sample(raw, _sizes(args.analyze_sizes)))}
+            for _ in range(PAYLOADS_PER_ENDPOINT)
+        ],
+        "top_deals": [
+            {"method": "GET",
+             "url": f"/cars/top-deals?mode={rng.choice(['strict', 'relaxed'])}"
+                    f"&limit={rng.choice([5, 10, 20, 50])}",
+             "content": None}
+            for _ in range(PAYLOADS_PER_ENDPOINT)
+        ],
+        "compare_investment": [
+            {"method": "POST", "url": "/cars/compare-investment",
+             "content": body({"cars": sample(clean, _sizes(args.compare_sizes))})}
+            for _ in range(PAYLOADS_PER_ENDPOINT)
+        ],
+        "compare_user_context": [
+            {"method": "POST", "url": "/cars/compare-user-context",
+             "content": body({
+                 "user_context": {
+                     "max_budget": rng.choice([5000, 10000, 20000, None]),
+                     "min_seats": rng.choice([4, 5, None]),
+                     "preferred_gearbox": rng.choice(["Manual", "Automatic", None]),
+                     "preferred_fuel_type": rng.choice(["Diesel", "Gasoline", None]),
+                 },
+                 "cars": sample(clean, _sizes(args.compare_sizes)),
+             })}
+            for _ in range(PAYLOADS_PER_ENDPOINT)
+        ],
+    }
+    return requests
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# =========================
+# SERVER
+# =========================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BASE_DIR,
+        start_new_session=True,
+    )
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen) -> float:
+    started = time.monotonic()
+    while time.monotonic() - started < STARTUP_TIMEOUT:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health/ready", timeout=1).status_code == 200:
+                return time.monotonic() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {STARTUP_TIMEOUT}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+def _process_tree(root: int) -> List[int]:
+    """root + all descendants, from /proc"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _cpu_and_rss(pids: List[int]):
+    """(CPU seconds, RSS bytes) summed over pids"""
+    cpu = rss = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLK_TCK
+            with open(f"/proc/{pid}/statm", "r") as f:
+                rss += int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    return cpu, rss
+
+
+async def sample_server(root_pid: Optional[int], samples: list, stop: asyncio.Event,
+                        started: float):
+    if root_pid is None or not os.path.isdir("/proc"):
+        return
+    last_cpu, _ = _cpu_and_rss(_process_tree(root_pid))
+    last_t = time.monotonic()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        cpu, rss = _cpu_and_rss(_process_tree(root_pid))
+        now = time.monotonic()
+        samples.append({
+            "t": round(now - started, 2),
+            "cpu_percent": round((cpu - last_cpu) / (now - last_t) * 100, 1),
+            "rss_mb": round(rss / 1024 / 1024, 1),
+        })
+        last_cpu, last_t = cpu, now
+
+
+# =========================
+# LOAD
+# =========================
+async def run_step(base_url: str, requests: Dict[str, List[dict]], mix: Dict[str, float],
+                   concurrency: int, duration: float, seed: int,
+                   server_pid: Optional[int]) -> dict:
+    names = [n for n in mix if n in requests]
+    weights = [mix[n] for n in names]
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, Dict[str, int]] = {n: {} for n in names}
+    samples: list = []
+    stop_sampling = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60,
+                                 headers={"content-type": "application/json"}) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        sampler = asyncio.create_task(sample_server(server_pid, samples, stop_sampling, started))
+
+        async def virtual_client(index: int):
+            rng = random.Random(seed * 1000 + index)
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                req = rng.choice(requests[name])
+                t0 = time.perf_counter()
+                try:
+                    response = await client.request(req["method"], req["url"],
+                                                    content=req["content"])
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - t0
+
+                if status == 200:
+                    latencies[name].append(elapsed)
+                else:
+                    errors[name][str(status)] = errors[name].get(str(status), 0) + 1
+
+        await asyncio.gather(*(virtual_client(i) for i in range(concurrency)))
+        wall = time.monotonic() - started
+        stop_sampling.set()
+        await sampler
+
+    return summarize(concurrency, wall, latencies, errors, samples)
+
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.array(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p90_ms": round(float(np.percentile(ms, 90)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def summarize(concurrency, wall, latencies, errors, samples) -> dict:
+    ok = sum(len(v) for v in latencies.values())
+    failed = sum(sum(e.values()) for e in errors.values())
+    total = ok + failed
+
+    endpoints = {}
+    for name in latencies:
+        n_err = sum(errors[name].values())
+        n = len(latencies[name]) + n_err
+        endpoints[name] = {
+            "requests": n,
+            "rps": round(len(latencies[name]) / wall, 1),
+            "error_rate": round(n_err / n, 4) if n else 0.0,
+            "errors": errors[name],
+            **_percentiles(latencies[name]),
+        }
+
+    cpu = [s["cpu_percent"] for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(wall, 2),
+        "requests": total,
+        "rps": round(ok / wall, 1),
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        **_percentiles([x for v in latencies.values() for x in v]),
+        "server": {
+            "cpu_percent_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "cpu_percent_max": max(cpu) if cpu else None,
+            "rss_mb_max": max(rss) if rss else None,
+            "samples": samples,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test for the API")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="virtual clients per step")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per step")
+    parser.add_argument("--warmup", type=float, default=3, help="untimed seconds before step 1")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,...")
+    parser.add_argument("--analyze-sizes", default="1,10,50", help="cars per /analyze-cars/ request")
+    parser.add_argument("--compare-sizes", default="2,5,10", help="cars per compare request")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--out", help="report JSON (default data/benchmarks/load_<time>.json)")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    requests = build_requests(args)
+    unknown = set(mix) - set(requests)
+    if unknown:
+        sys.exit(f"❌ Unknown endpoints in --mix: {', '.join(sorted(unknown))} "
+                 f"(choose from {', '.join(requests)})")
+
+    server = None
+    server_pid = None
+    startup_seconds = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(args.workers, port)
+        server_pid = server.pid
+
+    print("=" * 90)
+    print(f"🚦 LOAD TEST {base_url} (workers={args.workers if server else '?'}, mix={args.mix})")
+    print("=" * 90)
+
+    steps = []
+    try:
+        if server:
+            startup_seconds = round(wait_until_ready(base_url, server), 2)
+            print(f"Server ready in {startup_seconds}s")
+        if args.warmup:
+            asyncio.run(run_step(base_url, requests, mix, 1, args.warmup, args.seed,
+                                 server_pid))
+
+        print(f"{'conc':>5} {'rps':>9} {'err%':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+              f"{'cpu%':>7} {'rss MB':>8}")
+        for concurrency in args.concurrency:
+            step = asyncio.run(run_step(base_url, requests, mix, concurrency, args.duration,
+                                        args.seed, server_pid))
+            steps.append(step)
+            server_stats = step["server"]
+            print(f"{concurrency:>5} {step['rps']:>9,.1f} {step['error_rate'] * 100:>6.2f}% "
+                  f"{step['p50_ms'] or 0:>9,.1f} {step['p90_ms'] or 0:>9,.1f} "
+                  f"{step['p99_ms'] or 0:>9,.1f} "
+                  f"{server_stats['cpu_percent_mean'] or 0:>7,.0f} {server_stats['rss_mb_max'] or 0:>8,.0f}")
+    finally:
+        if server:
+            stop_server(server)
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "config": {
+            "url": base_url if args.url else None,
+            "workers": args.workers if server else None,
+            "mix": mix,
+            "duration": args.duration,
+            "analyze_sizes": _sizes(args.analyze_sizes),
+            "compare_sizes": _sizes(args.compare_sizes),
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "startup_seconds": startup_seconds,
+        "peak_rps": max((s["rps"] for s in steps), default=None),
+        "steps": steps,
+    }
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Deterministic synthetic AutoScout24 listings
+============================================
+Generates any number of listings shaped like scrapers/output.json
+("raw") or like the clean CarInput records the API accepts ("clean"),
+with distributions fitted from the real scraped data:
+
+- every listing starts from a uniformly drawn real "donor" listing (so
+  brands keep their real frequencies); model and technical data are copied from it (so
+  power, fuel, consumption and seats stay consistent)
+- registration year: donor year +-1, mileage: donor km per year with
+  log-normal jitter (keeps the joint year / mileage distribution)
+- price: donor price moved along a log-linear fit of price on age and
+  log(mileage) for the new year / mileage, plus log-normal noise
+- images, seller: real counts / sellers, fresh listing UUIDs
+
+The same seed always produces the same records, and both shapes of
+record i describe the same car. Records are generated in chunks and
+written as a stream, so 10M listings never sit in memory.
+
+    python benchmarks/synthetic_listings.py --count 1000000 --out data/synthetic/raw_1m.jsonl
+    python benchmarks/synthetic_listings.py --count 100000 --shape clean --format json \\
+        --out data/synthetic/clean_100k.json
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.path.join(BASE_DIR, "scrapers", "output.json")
+sys.path.append(BASE_DIR)
+
+from app.ai_calculations import normalize_scraped_car
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 10_000
+IMAGE_URL = "https://prod.pictures.autoscout24.net/listing-images/{listing}_{image}.jpg/1280x960.webp"
+
+# Log-normal sigma of the per-listing noise on mileage and price
+MILEAGE_JITTER = 0.2
+PRICE_JITTER = 0.1
+
+
+# =========================
+# FITTING
+# =========================
+def _int_or_none(value) -> Optional[int]:
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def fit_profile(raw_cars: List[dict]) -> dict:
+    """Distributions the generator samples from"""
+    donors = []
+    for car in raw_cars:
+        clean = normalize_scraped_car(car)
+        if not (clean["brand"] and clean["year_numeric"] and clean["price_numeric"]):
+            continue
+        donors.append((car, clean))
+
+    if len(donors) < 2:
+        raise ValueError("Need at least 2 parseable listings to fit a profile")
+
+    reference_year = max(clean["year_numeric"] for _, clean in donors)
+    years = np.array([clean["year_numeric"] for _, clean in donors], dtype=np.float64)
+    ages = np.maximum(reference_year - years + 0.5, 0.5)
+    mileage = np.array([clean["mileage_numeric"] or 0 for _, clean in donors], dtype=np.float64)
+    prices = np.array([clean["price_numeric"] for _, clean in donors], dtype=np.float64)
+
+    # log(price) ~ a + b * age + c * log1p(mileage), used to move a donor's
+    # price to the generated age / mileage
+    A = np.column_stack([np.ones(len(donors)), ages, np.log1p(mileage)])
+    coef, *_ = np.linalg.lstsq(A, np.log(prices), rcond=None)
+
+    image_counts = Counter(len(car.get("all_images") or []) for car, _ in donors)
+
+    return {
+        "reference_year": int(reference_year),
+        "donors": [car for car, _ in donors],
+        "donor_years": years.astype(int).tolist(),
+        "brands": sorted({clean["brand"] for _, clean in donors}),
+        "donor_mileage": mileage.tolist(),
+        "donor_prices": prices.tolist(),
+        "price_coef": coef.tolist(),
+        "image_counts": sorted(image_counts),
+        "image_weights": [image_counts[k] / len(donors) for k in sorted(image_counts)],
+    }
+
+
+def load_profile(path: str = SOURCE_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return fit_profile(json.load(f))
+
+
+# =========================
+# GENERATION
+# =========================
+def _format_price(price: int) -> str:
+    return f"€ {price:,}"
+
+
+def _url_prefix(url: str) -> str:
+    """Donor details_url without its trailing listing UUID"""
+    if url and len(url) > 37 and url[-37] == "-":
+        return url[:-36]
+    return "https://www.autoscout24.com/offers/listing-"
+
+
+class ListingGenerator:
+    """
+    Usage:
+        gen = ListingGenerator(load_profile(), seed=42)
+        for car in gen.generate(1_000_000, shape="raw"):
+            ...
+    """
+
+    def __init__(self, profile: dict, seed: int = DEFAULT_SEED,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.profile = profile
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        self._image_counts = np.array(profile["image_counts"])
+        self._image_weights = np.array(profile["image_weights"])
+        self._donor_years = np.array(profile["donor_years"], dtype=np.float64)
+        self._donor_mileage = np.array(profile["donor_mileage"])
+        self._donor_prices = np.array(profile["donor_prices"])
+        self._url_prefixes = [_url_prefix(d.get("details_url", "")) for d in profile["donors"]]
+
+    def _draw(self, rng: np.random.Generator, n: int) -> dict:
+        """Vectorized random draws for one chunk"""
+        p = self.profile
+        donor_idx = rng.integers(0, len(p["donors"]), n)
+
+        # Donor year +-1, never in the future
+        donor_years = self._donor_years[donor_idx]
+        years = np.minimum(donor_years + rng.integers(-1, 2, n), p["reference_year"])
+        months = rng.integers(1, 13, n)
+        donor_ages = np.maximum(p["reference_year"] - donor_years + 0.5, 0.5)
+        ages = np.maximum(p["reference_year"] - years + 0.5, 0.5)
+
+        # Donor km per year, jittered
+        donor_mileage = self._donor_mileage[donor_idx]
+        mileage = donor_mileage / donor_ages * ages * np.exp(rng.normal(0, MILEAGE_JITTER, n))
+        mileage = np.round(mileage, -2).astype(np.int64)
+
+        _, b, c = p["price_coef"]
+        log_price = (np.log(self._donor_prices[donor_idx])
+                     + b * (ages - donor_ages)
+                     + c * (np.log1p(mileage) - np.log1p(donor_mileage))
+                     + rng.normal(0, PRICE_JITTER, n))
+        prices = np.maximum(np.round(np.exp(log_price), -1), 500).astype(np.int64)
+        # Dealer-style x,x99 prices for part of the listings
+        prices -= (rng.random(n) < 0.3).astype(np.int64)
+
+        image_counts = rng.choice(self._image_counts, size=n, p=self._image_weights)
+        uuid_bytes = rng.bytes(16 * int(n + image_counts.sum()))
+
+        return {
+            "donor": donor_idx.tolist(),
+            "year": years.astype(np.int64).tolist(),
+            "month": months.tolist(),
+            "mileage": mileage.tolist(),
+            "price": prices.tolist(),
+            "images": image_counts.tolist(),
+            "uuid_bytes": uuid_bytes,
+        }
+
+    def _chunk(self, chunk_index: int, n: int, shape: str) -> Iterator[dict]:
+        # One independent stream per chunk: output doesn't depend on how
+        # far a consumer reads, only on (seed, chunk_size)
+        rng = np.random.default_rng([self.seed, chunk_index])
+        draws = self._draw(rng, n)
+        donors = self.profile["donors"]
+        raw_uuids = draws["uuid_bytes"]
+        offset = 0
+
+        def next_uuid() -> str:
+            nonlocal offset
+            value = uuid.UUID(bytes=raw_uuids[offset:offset + 16], version=4)
+            offset += 16
+            return str(value)
+
+        for i in range(n):
+            donor = donors[draws["donor"][i]]
+            listing_id = next_uuid()
+            url = self._url_prefixes[draws["donor"][i]] + listing_id
+            images = [IMAGE_URL.format(listing=listing_id, image=next_uuid())
+                      for _ in range(draws["images"][i])]
+
+            if shape == "clean":
+                title = donor.get("car_title", "")
+                yield {
+                    "title": title,
+                    "brand": title.split(" ")[0] if title else "",
+                    "year_numeric": draws["year"][i],
+                    "mileage_numeric": draws["mileage"][i],
+                    "price_numeric": draws["price"][i],
+                    "fuel_type": donor.get("Energy_Consumption", {}).get("Fuel_type"),
+                    "transmission": donor.get("Technical_Data", {}).get("Gearbox"),
+                    "seats": _seats(donor),
+                    "url": url,
+                }
+                continue
+
+            history = dict(donor.get("Vehicle_History", {}))
+            history["Mileage"] = f"{draws['mileage'][i]:,} km"
+            history["First_registration"] = f"{draws['month'][i]:02d}/{draws['year'][i]}"
+
+            yield {
+                "car_title": donor.get("car_title", ""),
+                "car_subtitle": donor.get("car_subtitle", ""),
+                "details_url": url,
+                "price": _format_price(draws["price"][i]),
+                "all_images": images,
+                "Basic_Data": dict(donor.get("Basic_Data", {})),
+                "Vehicle_History": history,
+                "Technical_Data": dict(donor.get("Technical_Data", {})),
+                "Energy_Consumption": dict(donor.get("Energy_Consumption", {})),
+                "Colour_and_Upholstery": dict(donor.get("Colour_and_Upholstery", {})),
+                "seller_info": dict(donor.get("seller_info", {})),
+            }
+
+    def generate(self, count: int, shape: str = "raw") -> Iterator[dict]:
+        if shape not in ("raw", "clean"):
+            raise ValueError(f"Unknown shape: {shape}")
+
+        chunks = math.ceil(count / self.chunk_size)
+        for chunk_index in range(chunks):
+            n = min(self.chunk_size, count - chunk_index * self.chunk_size)
+            yield from self._chunk(chunk_index, n, shape)
+
+
+def _seats(car: dict) -> Optional[int]:
+    seats = _int_or_none(car.get("Basic_Data", {}).get("Seats"))
+    return seats if seats is not None and 1 <= seats <= 9 else None
+
+
+def generate_listings(count: int, shape: str = "raw", seed: int = DEFAULT_SEED,
+                      profile: Optional[dict] = None) -> List[dict]:
+    """Small in-memory batches for benchmarks / load tests"""
+    generator = ListingGenerator(profile or load_profile(), seed=seed)
+    return list(generator.generate(count, shape))
+
+
+# =========================
+# OUTPUT
+# =========================
+def _open_output(path: str, compress: bool):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def write_records(records, path: str, fmt: str = "jsonl") -> int:
+    """Stream records to JSONL or a JSON array; returns the count"""
+    written = 0
+    tmp_path = f"{path}.tmp"
+    # Compression follows the final name, not the .tmp one
+    with _open_output(tmp_path, compress=path.endswith(".gz")) as f:
+        if fmt == "json":
+            f.write("[\n")
+        for record in records:
+            if fmt == "json" and written:
+                f.write(",\n")
+            f.write(json.dumps(record, ensure_ascii=False))
+            if fmt == "jsonl":
+                f.write("\n")
+            written += 1
+        if fmt == "json":
+            f.write("\n]\n")
+    os.replace(tmp_path, path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic scraped car listings")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--shape", choices=("raw", "clean"), default="raw")
+    parser.add_argument("--format", choices=("jsonl", "json"), default="jsonl")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--source", default=SOURCE_PATH, help="real listings to fit on")
+    parser.add_argument("--out", required=True, help="output path (.gz to compress)")
+    args = parser.parse_args()
+
+    profile = load_profile(args.source)
+    generator = ListingGenerator(profile, seed=args.seed)
+
+    started = time.perf_counter()
+    written = write_records(generator.generate(args.count, args.shape), args.out, args.format)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ {written:,} {args.shape} listings -> {args.out} "
+          f"({elapsed:.1f}s, {written / elapsed:,.0f}/s, {len(profile['brands'])} brands, "
+          f"{len(profile['donors'])} source listings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+Rebuild the serving cache used by /cars/top-deals
+
+Input: scrapers/output.json
+Output: data/serving/catalog.json, data/serving/catalog.snapshot
+"""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from app.catalog import SOURCE_PATH, SERVING_CACHE_PATH, SNAPSHOT_PATH, write_serving_cache
+
+
+if __name__ == "__main__":
+    count = write_serving_cache(SOURCE_PATH, SERVING_CACHE_PATH, SNAPSHOT_PATH)
+    print(f"✅ Serving cache rebuilt: {count} cars -> {SERVING_CACHE_PATH}, {SNAPSHOT_PATH}")
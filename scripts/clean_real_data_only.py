@@ -8,6 +8,16 @@ import json
 import pandas as pd
 from datetime import datetime
 import os
+import sys
+
+# ============================================================
+# Setup paths (independent of the working directory)
+# ============================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+sys.path.append(BASE_DIR)
+
+from app.streaming_stats import DatasetStats
 
 def load_real_scraped_data_only():
     """Load ONLY real scraped data, exclude sample data"""
@@ -17,7 +27,7 @@ def load_real_scraped_data_only():
     
     # 1. JSON scraped data
     try:
-        with open('../data/raw/cars_data.json', 'r', encoding='utf-8') as f:
+        with open(os.path.join(RAW_DIR, 'cars_data.json'), 'r', encoding='utf-8') as f:
             json_data = json.load(f)
             for car in json_data:
                 car['data_source'] = 'real_scraped_2dehands'
@@ -28,7 +38,7 @@ def load_real_scraped_data_only():
     
     # 2. CSV scraped data
     try:
-        csv_data = pd.read_csv('../data/raw/cars_data.csv', encoding='utf-8')
+        csv_data = pd.read_csv(os.path.join(RAW_DIR, 'cars_data.csv'), encoding='utf-8')
         csv_cars = csv_data.to_dict('records')
         for car in csv_cars:
             car['data_source'] = 'real_scraped_csv'
@@ -212,43 +222,45 @@ def calculate_derived_fields(car):
     return car
 
 def generate_stats(cars):
-    """Show statistics"""
+    """Show statistics (single streaming pass, no DataFrame)"""
     print("\n" + "="*70)
     print("📊 REAL SCRAPED DATA STATISTICS")
     print("="*70 + "\n")
     
-    df = pd.DataFrame(cars)
+    stats = DatasetStats().update_many(cars)
     
-    print(f"Total Real Cars: {len(df)}")
+    print(f"Total Real Cars: {stats.count}")
     
     # Completeness
     print(f"\nData Completeness:")
     for field in ['brand', 'year_numeric', 'mileage_numeric', 'price_numeric', 'fuel_type']:
-        complete = df[field].notna().sum()
-        pct = (complete / len(df)) * 100
-        print(f"  - {field:20s}: {complete:3d}/{len(df)} ({pct:.1f}%)")
+        complete = stats.present[field]
+        pct = stats.completeness(field) * 100
+        print(f"  - {field:20s}: {complete:3d}/{stats.count} ({pct:.1f}%)")
     
     # Needs review
-    if 'needs_manual_review' in df.columns:
-        review = df['needs_manual_review'].sum()
+    seen, review = stats.flags['needs_manual_review']
+    if seen:
         print(f"\n⚠️  Needs manual review: {review} cars")
     
     # Price stats
-    valid_prices = df['price_numeric'].dropna()
-    if len(valid_prices) > 0:
+    prices = stats.numeric['price_numeric']
+    if prices.count > 0:
         print(f"\n💰 Price Range:")
-        print(f"  - Min: €{valid_prices.min():,.0f}")
-        print(f"  - Max: €{valid_prices.max():,.0f}")
-        print(f"  - Avg: €{valid_prices.mean():,.0f}")
+        print(f"  - Min: €{prices.min:,.0f}")
+        print(f"  - Max: €{prices.max:,.0f}")
+        print(f"  - Avg: €{prices.mean:,.0f}")
+        print(f"  - Median (approx.): €{stats.quantile('price_numeric', 0.5):,.0f}")
     
     # Brand distribution
-    if 'brand' in df.columns:
-        brands = df['brand'].value_counts()
+    if stats.categories['brand'].total:
         print(f"\n🏷️  Top Brands:")
-        for brand, count in brands.head(5).items():
+        for brand, count in stats.categories['brand'].top(5):
             print(f"  - {brand}: {count} cars")
     
     print("\n" + "="*70 + "\n")
+    
+    return stats
 
 def main():
     print("\n" + "="*70)
@@ -282,7 +294,7 @@ def main():
     print("💾 Saving files...")
     
     # 1. Real data only (all)
-    with open('../data/raw/cars_data_real_all.json', 'w', encoding='utf-8') as f:
+    with open(os.path.join(RAW_DIR, 'cars_data_real_all.json'), 'w', encoding='utf-8') as f:
         json.dump(final, f, indent=2, ensure_ascii=False)
     print("✓ cars_data_real_all.json (all real cars)")
     
@@ -296,7 +308,7 @@ def main():
            not car.get('needs_manual_review')
     ]
     
-    with open('../data/raw/cars_data_real_api_ready.json', 'w', encoding='utf-8') as f:
+    with open(os.path.join(RAW_DIR, 'cars_data_real_api_ready.json'), 'w', encoding='utf-8') as f:
         json.dump(api_ready, f, indent=2, ensure_ascii=False)
     print(f"✓ cars_data_real_api_ready.json ({len(api_ready)} clean cars)")
     
@@ -304,13 +316,13 @@ def main():
     needs_review = [car for car in final if car.get('needs_manual_review')]
     
     if needs_review:
-        with open('../data/raw/cars_data_real_needs_review.json', 'w', encoding='utf-8') as f:
+        with open(os.path.join(RAW_DIR, 'cars_data_real_needs_review.json'), 'w', encoding='utf-8') as f:
             json.dump(needs_review, f, indent=2, ensure_ascii=False)
         print(f"⚠️  cars_data_real_needs_review.json ({len(needs_review)} cars)")
     
     # 4. CSV
     df = pd.DataFrame(api_ready)
-    df.to_csv('../data/raw/cars_data_real_api_ready.csv', index=False, encoding='utf-8')
+    df.to_csv(os.path.join(RAW_DIR, 'cars_data_real_api_ready.csv'), index=False, encoding='utf-8')
     print("✓ cars_data_real_api_ready.csv")
     
     print("\n" + "="*70)
@@ -330,7 +342,7 @@ def main():
 
 🎯 Next step:
    Update ai_calculations.py to use:
-   '../data/raw/cars_data_real_api_ready.json'
+   'data/raw/cars_data_real_api_ready.json'
 """)
     print("="*70 + "\n")
 
@@ -8,71 +8,33 @@ Output: data/raw/cars_data.json (API-compatible)
 
 import json
 import os
-import re
+import sys
 from datetime import datetime
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+# Same field parsers as the API (normalize_scraped_car)
+from app.parsing import parse_mileage, parse_price, parse_specs, parse_year
+
 
 def extract_price(price_str):
     """Extract numeric price from string like '€ 3,950'"""
-    if not price_str:
-        return None
-    
-    try:
-        # Remove all non-digits
-        numbers = re.findall(r'\d+', price_str.replace(',', '').replace('.', ''))
-        if numbers:
-            return int(numbers[0])
-        return None
-    except:
-        return None
+    return parse_price(price_str)
 
 
 def extract_mileage(mileage_str):
     """Extract numeric mileage from '239,000 km'"""
-    if not mileage_str:
-        return None
-    
-    try:
-        numbers = re.findall(r'\d+', mileage_str.replace(',', '').replace('.', ''))
-        if numbers:
-            km = int(numbers[0])
-            # If mileage is in range 1-999, it's likely in thousands
-            if km < 1000:
-                km *= 1000
-            return km
-        return None
-    except:
-        return None
+    km = parse_mileage(mileage_str)
+    # If mileage is in range 1-999, it's likely in thousands
+    if km is not None and km < 1000:
+        km *= 1000
+    return km
 
 
 def extract_year(registration_str):
     """Extract year from '11/2015'"""
-    if not registration_str:
-        return None
-    
-    try:
-        # Match 4-digit year
-        match = re.search(r'(20\d{2}|19\d{2})', registration_str)
-        if match:
-            return int(match.group(1))
-        return None
-    except:
-        return None
-
-
-def extract_power(power_str):
-    """Extract power in kW from '55 kW (75 hp)'"""
-    if not power_str:
-        return None
-    
-    try:
-        # Extract kW value
-        match = re.search(r'(\d+)\s*kW', power_str)
-        if match:
-            return int(match.group(1))
-        return None
-    except:
-        return None
+    return parse_year(registration_str)
 
 
 def extract_brand(title):
@@ -154,7 +116,10 @@ def convert_scraped_car(scraped_car):
         "price_numeric": extract_price(scraped_car.get('price')),
         "mileage_numeric": extract_mileage(history.get('Mileage')),
         "year_numeric": extract_year(history.get('First_registration')),
-        "power_kw": extract_power(technical.get('Power')),
+        
+        # Typed technical fields: power_kw, power_hp, engine_cc, weight_kg,
+        # consumption_l_100km, seats/doors/gears/previous_owners_numeric
+        **parse_specs(scraped_car),
         
         # Brand & fuel (CRITICAL for recommendations)
         "brand": extract_brand(scraped_car.get('car_title')),
@@ -185,7 +150,7 @@ def convert_scraped_car(scraped_car):
         # Metadata
         "scraped_at": scraped_car.get('scraped_at') or datetime.now().isoformat(),
         "source": "autoscout24_working_scraper",
-        "data_version": "2.0"
+        "data_version": "2.1"
     }
     
     return api_car
@@ -0,0 +1,55 @@
+"""
+Export ml_model.joblib as flattened NumPy arrays for fast inference
+
+Input: data/ml_models/ml_model.joblib
+Output: data/ml_models/ml_model_compiled/versions/<id>/ (*.npy + meta.json),
+        made current through data/ml_models/ml_model_compiled/current.json
+
+The API memory-maps these arrays, so all uvicorn workers share one copy.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "cars_data.json")
+sys.path.append(BASE_DIR)
+
+from app.ai_calculations import COMPILED_MODEL_DIR, ML_MODEL_PATH
+from app.model_bundle import ModelBundle, records_to_columns
+from app.tree_ensemble import CompiledEnsemble, export_ensemble
+
+
+if __name__ == "__main__":
+    bundle = ModelBundle.load(ML_MODEL_PATH)
+    meta = export_ensemble(
+        bundle.estimator,
+        COMPILED_MODEL_DIR,
+        extra_meta={"model_version": bundle.version},
+    )
+
+    print(f"✅ Exported {meta['estimator']} {bundle.version}: "
+          f"{meta['n_trees']} trees, {meta['n_nodes']:,} nodes, depth {meta['max_depth']}")
+
+    # Verify against sklearn on the training data
+    if os.path.exists(DATA_PATH):
+        with open(DATA_PATH, "r", encoding="utf-8") as f:
+            X = bundle.transform(records_to_columns(json.load(f)))
+
+        compiled = CompiledEnsemble.load(COMPILED_MODEL_DIR)
+        diff = np.abs(compiled.predict(X) - bundle.estimator.predict(X)).max()
+
+        started = time.perf_counter()
+        for i in range(min(200, len(X))):
+            compiled.predict(X[i:i + 1])
+        per_row = (time.perf_counter() - started) / min(200, len(X)) * 1000
+
+        print(f"   Max abs difference vs sklearn: {diff:.2e}")
+        print(f"   Single-row latency: {per_row:.3f} ms")
+
+        if diff > 1e-6:
+            sys.exit("❌ Compiled predictions do not match the model")
@@ -0,0 +1,77 @@
+"""
+Manage the local model registry (data/ml_models/registry)
+
+    python scripts/model_registry.py publish [--path ml_model.joblib] [--activate]
+    python scripts/model_registry.py list
+    python scripts/model_registry.py activate <version>
+    python scripts/model_registry.py rollback
+
+A running API picks up the new current version within
+MODEL_POLL_SECONDS, or immediately after `kill -HUP <pid>`.
+"""
+
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "data", "ml_models", "ml_model.joblib")
+sys.path.append(BASE_DIR)
+
+from app.model_bundle import ModelBundle
+from app.model_registry import ModelRegistry
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Versioned price model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    publish = sub.add_parser("publish", help="add a model bundle as a new version")
+    publish.add_argument("--path", default=MODEL_PATH)
+    publish.add_argument("--activate", action="store_true", help="make it current")
+
+    sub.add_parser("list", help="show published versions")
+
+    activate = sub.add_parser("activate", help="point current at a version")
+    activate.add_argument("version")
+
+    sub.add_parser("rollback", help="switch back to the previous version")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    registry = ModelRegistry()
+
+    try:
+        if args.command == "publish":
+            version = registry.publish(ModelBundle.load(args.path), activate=args.activate)
+            state = "active" if args.activate else "published"
+            print(f"✅ {version} {state}")
+
+        elif args.command == "list":
+            current = registry.current_version()
+            versions = registry.versions()
+            if not versions:
+                print("Registry is empty")
+            for meta in versions:
+                marker = "*" if meta["version"] == current else " "
+                mae = meta.get("metrics", {}).get("mae")
+                mae = f"{mae:,.0f}" if mae is not None else "-"
+                print(f"{marker} {meta['version']}  {meta['estimator']:<32} "
+                      f"MAE {mae:>8}  published {meta.get('published_at', '')[:19]}")
+
+        elif args.command == "activate":
+            pointer = registry.activate(args.version)
+            print(f"✅ Current: {pointer['version']} (previous: {pointer['previous']})")
+
+        elif args.command == "rollback":
+            pointer = registry.rollback()
+            print(f"↩️  Rolled back to {pointer['version']}")
+
+    except (ValueError, FileNotFoundError) as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Replay a captured request log through two price models
+
+    python scripts/replay_shadow.py data/shadow/requests.jsonl --candidate <version>
+    python scripts/replay_shadow.py requests.jsonl --baseline <version> --candidate path/to/model.joblib
+
+Each JSONL line may be a list of cars (an /analyze-cars/ body), an
+object with a "cars" list (SHADOW_CAPTURE_PATH format) or a single car.
+Raw scraped cars are normalized first. Lines without car records are
+skipped.
+
+Reports, per model, throughput and MAE against the listed price where
+present, plus how far the candidate's predictions are from the baseline.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from app.ai_calculations import ML_MODEL_PATH, normalize_scraped_car
+from app.model_bundle import ModelBundle, records_to_columns
+from app.model_registry import LoadedModel, ModelRegistry
+
+RAW_MARKERS = ("car_title", "Vehicle_History", "details_url")
+
+
+def resolve_model(spec: str, registry: ModelRegistry) -> LoadedModel:
+    """'current', a registry version, or a path to a bundle"""
+    if spec == "current":
+        version = registry.current_version()
+        if version is None:
+            return LoadedModel(ModelBundle.load(ML_MODEL_PATH))
+        spec = version
+
+    if os.path.exists(spec):
+        return LoadedModel(ModelBundle.load(spec))
+    return registry.load(spec)
+
+
+def _records(payload):
+    if isinstance(payload, list):
+        return [car for item in payload for car in _records(item)]
+    if not isinstance(payload, dict):
+        return []
+    if "cars" in payload:
+        return _records(payload["cars"])
+    if any(key in payload for key in RAW_MARKERS):
+        return [normalize_scraped_car(payload)]
+    if "brand" in payload or "year_numeric" in payload:
+        return [payload]
+    return []
+
+
+def read_batches(path: str, limit: int = 0):
+    """(batches of normalized cars, line counts)"""
+    stats = {"lines": 0, "skipped": 0}
+    batches = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            stats["lines"] += 1
+            try:
+                cars = _records(json.loads(line))
+            except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+                cars = []
+            if cars:
+                batches.append(cars)
+            else:
+                stats["skipped"] += 1
+            if limit and len(batches) >= limit:
+                break
+    return batches, stats
+
+
+def replay(model: LoadedModel, batches):
+    """(predictions per row, seconds spent)"""
+    predictions = []
+    started = time.perf_counter()
+    for cars in batches:
+        X = model.bundle.transform(records_to_columns(cars))
+        predictions.extend(model.predict_features(X))
+    return np.array(predictions), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline shadow comparison of two models")
+    parser.add_argument("log", help="JSONL request log")
+    parser.add_argument("--baseline", default="current")
+    parser.add_argument("--candidate", required=True)
+    parser.add_argument("--limit", type=int, default=0, help="max batches")
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    try:
+        models = {
+            "baseline": resolve_model(args.baseline, registry),
+            "candidate": resolve_model(args.candidate, registry),
+        }
+    except (ValueError, FileNotFoundError) as e:
+        sys.exit(f"❌ {e}")
+
+    batches, read_stats = read_batches(args.log, args.limit)
+    if not batches:
+        sys.exit(f"❌ No car records in {args.log} ({read_stats['skipped']} lines skipped)")
+
+    cars = [car for batch in batches for car in batch]
+    prices = np.array([
+        float(c["price_numeric"]) if c.get("price_numeric") else np.nan for c in cars
+    ])
+    labeled = ~np.isnan(prices)
+
+    report = {
+        "log": args.log,
+        "batches": len(batches),
+        "rows": len(cars),
+        "labeled_rows": int(labeled.sum()),
+        "skipped_lines": read_stats["skipped"],
+        "models": {},
+    }
+
+    predictions = {}
+    for name, model in models.items():
+        model.warm_up()
+        predicted, seconds = replay(model, batches)
+        predictions[name] = predicted
+        report["models"][name] = {
+            "version": model.version,
+            "compiled": model.compiled is not None,
+            "seconds": round(seconds, 4),
+            "rows_per_second": round(len(cars) / seconds, 1) if seconds else None,
+            "mae": (
+                round(float(np.abs(predicted[labeled] - prices[labeled]).mean()), 2)
+                if labeled.any() else None
+            ),
+        }
+
+    delta = predictions["candidate"] - predictions["baseline"]
+    base = predictions["baseline"]
+    report["delta"] = {
+        "mean_abs": round(float(np.abs(delta).mean()), 2),
+        "p95_abs": round(float(np.percentile(np.abs(delta), 95)), 2),
+        "max_abs": round(float(np.abs(delta).max()), 2),
+        "mean_pct": (
+            round(float((delta[base > 0] / base[base > 0]).mean() * 100), 2)
+            if (base > 0).any() else None
+        ),
+    }
+
+    print("=" * 70)
+    print("🔁 SHADOW REPLAY")
+    print("=" * 70)
+    print(f"{report['batches']} batches, {report['rows']} rows "
+          f"({report['labeled_rows']} with a listed price, {report['skipped_lines']} lines skipped)\n")
+    for name, m in report["models"].items():
+        mae = f"{m['mae']:,.0f}" if m["mae"] is not None else "-"
+        print(f"{name:<10} {m['version']:<26} MAE {mae:>8}   "
+              f"{m['rows_per_second']:>10,.0f} rows/s  ({m['seconds']:.3f}s)")
+    d = report["delta"]
+    print(f"\nCandidate vs baseline: mean |Δ| {d['mean_abs']:,.0f}, p95 |Δ| {d['p95_abs']:,.0f}, "
+          f"max |Δ| {d['max_abs']:,.0f}, mean Δ% {d['mean_pct']}")
+    print("=" * 70)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
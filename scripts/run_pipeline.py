@@ -0,0 +1,363 @@
+"""
+Cached pipeline runner: scrape -> convert -> clean -> train -> serve
+====================================================================
+Each stage declares its input and output files. Inputs (including the
+stage script itself) are hashed and a stage is skipped when its input
+hash matches the last successful run and its outputs are untouched.
+Stages whose inputs do not depend on each other run concurrently.
+
+Usage:
+    python scripts/run_pipeline.py                 # run what changed
+    python scripts/run_pipeline.py --only serve    # refresh serving cache only
+    python scripts/run_pipeline.py --with-scrape   # include the live scraper
+    python scripts/run_pipeline.py --force --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# ============================================================
+# Setup paths
+# ============================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_PATH = os.path.join(BASE_DIR, "data", "pipeline_state.json")
+
+
+@dataclass
+class Stage:
+    name: str
+    command: List[str]
+    inputs: List[str]
+    outputs: List[str]
+    cwd: str = "."
+    # Manual stages (the live scraper) only run when explicitly asked for
+    manual: bool = False
+    depends_on: List[str] = field(default_factory=list)
+
+
+STAGES = [
+    Stage(
+        name="scrape",
+        command=["scrapers/autoscout24_working_scraper_fixed.py"],
+        inputs=["scrapers/autoscout24_working_scraper_fixed.py"],
+        outputs=["scrapers/output.json"],
+        cwd="scrapers",
+        manual=True,
+    ),
+    Stage(
+        name="convert",
+        command=["scripts/convert_scraped_data.py"],
+        inputs=["scripts/convert_scraped_data.py", "app/parsing.py", "scrapers/output.json"],
+        outputs=["data/raw/cars_data.json"],
+    ),
+    Stage(
+        name="clean",
+        command=["scripts/clean_real_data_only.py"],
+        inputs=[
+            "scripts/clean_real_data_only.py",
+            "data/raw/cars_data.json",
+            "data/raw/cars_data.csv",
+        ],
+        outputs=[
+            "data/raw/cars_data_real_all.json",
+            "data/raw/cars_data_real_api_ready.json",
+            "data/raw/cars_data_real_api_ready.csv",
+        ],
+    ),
+    Stage(
+        name="train",
+        # Adds trees for new/changed rows; full refit on drift or first run.
+        # Trains on the clean stage's API-ready export
+        command=["scripts/train_incremental.py"],
+        inputs=[
+            "scripts/train_incremental.py",
+            "app/incremental_training.py",
+            "app/model_bundle.py",
+            "data/raw/cars_data_real_api_ready.json",
+        ],
+        outputs=[
+            "data/ml_models/ml_model.joblib",
+            "data/ml_models/training_state.json",
+        ],
+    ),
+    Stage(
+        name="compile",
+        command=["scripts/export_compiled_model.py"],
+        inputs=[
+            "scripts/export_compiled_model.py",
+            "app/tree_ensemble.py",
+            "data/ml_models/ml_model.joblib",
+        ],
+        outputs=["data/ml_models/ml_model_compiled/current.json"],
+    ),
+    Stage(
+        name="publish",
+        command=["scripts/model_registry.py", "publish", "--activate"],
+        inputs=[
+            "scripts/model_registry.py",
+            "app/model_registry.py",
+            "data/ml_models/ml_model.joblib",
+        ],
+        outputs=["data/ml_models/registry/current.json"],
+    ),
+    Stage(
+        name="history",
+        command=["scripts/update_price_history.py"],
+        inputs=["scripts/update_price_history.py", "scrapers/output.json"],
+        outputs=["data/history/price_history.npz"],
+    ),
+    Stage(
+        name="serve",
+        command=["scripts/build_serving_cache.py"],
+        inputs=[
+            "scripts/build_serving_cache.py",
+            "app/catalog.py",
+            "app/catalog_snapshot.py",
+            "app/ai_calculations.py",
+            "app/parsing.py",
+            "scrapers/output.json",
+        ],
+        outputs=["data/serving/catalog.json", "data/serving/catalog.snapshot"],
+    ),
+]
+
+
+# ============================================================
+# Hashing
+# ============================================================
+def hash_file(path: str) -> Optional[str]:
+    """sha256 of a file, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_inputs(stage: Stage) -> str:
+    """Content address of all stage inputs (missing files included)"""
+    digest = hashlib.sha256()
+    for rel in sorted(stage.inputs):
+        file_hash = hash_file(os.path.join(BASE_DIR, rel)) or "missing"
+        digest.update(f"{rel}\0{file_hash}\n".encode("utf-8"))
+    digest.update(json.dumps(stage.command).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_hashes(stage: Stage) -> Dict[str, Optional[str]]:
+    return {rel: hash_file(os.path.join(BASE_DIR, rel)) for rel in stage.outputs}
+
+
+# ============================================================
+# State
+# ============================================================
+def load_state() -> dict:
+    if not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_state(state: dict) -> None:
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = f"{STATE_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def is_up_to_date(stage: Stage, state: dict) -> bool:
+    previous = state.get(stage.name)
+    if not previous or previous.get("input_hash") != hash_inputs(stage):
+        return False
+
+    # Every declared output must exist and still be the one this stage produced
+    current = output_hashes(stage)
+    recorded = previous.get("outputs", {})
+    return bool(current) and all(
+        file_hash is not None and file_hash == recorded.get(rel)
+        for rel, file_hash in current.items()
+    )
+
+
+# ============================================================
+# Graph
+# ============================================================
+def resolve_dependencies(stages: List[Stage]) -> None:
+    """A stage depends on every stage that produces one of its inputs"""
+    producers = {out: s.name for s in stages for out in s.outputs}
+
+    for stage in stages:
+        stage.depends_on = sorted({
+            producers[rel]
+            for rel in stage.inputs
+            if rel in producers and producers[rel] != stage.name
+        })
+
+
+def select_stages(only: Optional[List[str]], with_scrape: bool) -> List[Stage]:
+    resolve_dependencies(STAGES)
+
+    if only:
+        unknown = set(only) - {s.name for s in STAGES}
+        if unknown:
+            raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+        selected = [s for s in STAGES if s.name in only]
+    else:
+        selected = [s for s in STAGES if with_scrape or not s.manual]
+
+    # Dependencies outside the selection are treated as satisfied
+    names = {s.name for s in selected}
+    for stage in selected:
+        stage.depends_on = [d for d in stage.depends_on if d in names]
+
+    return selected
+
+
+# ============================================================
+# Execution
+# ============================================================
+def stage_argv(stage: Stage) -> List[str]:
+    """python <script> [args...]: only the script path is relative to BASE_DIR"""
+    script, *args = stage.command
+    return [sys.executable, os.path.join(BASE_DIR, script), *args]
+
+
+def run_stage(stage: Stage) -> dict:
+    started = time.perf_counter()
+
+    proc = subprocess.run(
+        stage_argv(stage),
+        cwd=os.path.join(BASE_DIR, stage.cwd),
+        capture_output=True,
+        text=True,
+    )
+
+    return {
+        "returncode": proc.returncode,
+        "stdout": proc.stdout,
+        "stderr": proc.stderr,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def run_pipeline(
+    stages: List[Stage],
+    force: bool = False,
+    dry_run: bool = False,
+    max_workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Run stages in dependency order, skipping up-to-date ones.
+    Returns {stage_name: "ran" | "skipped" | "failed" | "blocked" | "planned"}.
+    """
+    state = load_state()
+    status: Dict[str, str] = {}
+    pending = {s.name: s for s in stages}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            # Start every stage whose dependencies have finished
+            waiting = len(pending)
+            for name, stage in list(pending.items()):
+                deps = [status.get(d) for d in stage.depends_on]
+                if any(d is None for d in deps):
+                    continue
+
+                del pending[name]
+
+                if any(d in ("failed", "blocked") for d in deps):
+                    status[name] = "blocked"
+                    print(f"⛔ {name}: blocked by failed dependency")
+                    continue
+
+                # Upstream reruns change our inputs, so re-check after they finish
+                upstream_planned = "planned" in deps
+                if not force and not upstream_planned and is_up_to_date(stage, state):
+                    status[name] = "skipped"
+                    print(f"⏭️  {name}: inputs unchanged")
+                    continue
+
+                if dry_run:
+                    status[name] = "planned"
+                    print(f"📝 {name}: would run")
+                    continue
+
+                print(f"▶️  {name}: running")
+                running[pool.submit(run_stage, stage)] = stage
+
+            if not running:
+                if pending and len(pending) == waiting:
+                    raise RuntimeError("Pipeline dependency cycle detected")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = running.pop(future)
+                result = future.result()
+
+                if result["returncode"] == 0:
+                    status[stage.name] = "ran"
+                    state[stage.name] = {
+                        "input_hash": hash_inputs(stage),
+                        "outputs": output_hashes(stage),
+                        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "seconds": result["seconds"],
+                    }
+                    save_state(state)
+                    print(f"✅ {stage.name}: done in {result['seconds']}s")
+                else:
+                    status[stage.name] = "failed"
+                    print(f"❌ {stage.name}: exit code {result['returncode']}")
+                    print(result["stderr"][-2000:])
+
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--only", nargs="+", metavar="STAGE",
+                        help="run only these stages (e.g. --only serve)")
+    parser.add_argument("--with-scrape", action="store_true",
+                        help="include the live scraper stage")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore cached input hashes")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="show what would run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="max concurrent stages")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔁 CAR DATA PIPELINE")
+    print("=" * 60)
+
+    stages = select_stages(args.only, args.with_scrape)
+    status = run_pipeline(stages, args.force, args.dry_run, args.workers)
+
+    print("-" * 60)
+    for stage in stages:
+        print(f"  {stage.name:10s}: {status.get(stage.name)}")
+    print("=" * 60)
+
+    return 1 if any(v in ("failed", "blocked") for v in status.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
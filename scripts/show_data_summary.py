@@ -1,16 +1,23 @@
 """
 Quick summary of all data files
+Streams each file once (constant memory, no pandas).
 """
-import json
 import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+sys.path.append(BASE_DIR)
+
+from app.streaming_stats import DatasetStats, iter_records
 
 files = {
-    'Real Scraped (Raw)': '../data/raw/cars_data.json',
-    'Real API Ready': '../data/raw/cars_data_real_api_ready.json',
-    'Real All': '../data/raw/cars_data_real_all.json',
-    'Real Needs Review': '../data/raw/cars_data_real_needs_review.json',
-    'Mixed (Old)': '../data/raw/cars_data_api_ready.json',
-    'Sample (Fake)': '../data/raw/cars_data_sample.json'
+    'Real Scraped (Raw)': os.path.join(RAW_DIR, 'cars_data.json'),
+    'Real API Ready': os.path.join(RAW_DIR, 'cars_data_real_api_ready.json'),
+    'Real All': os.path.join(RAW_DIR, 'cars_data_real_all.json'),
+    'Real Needs Review': os.path.join(RAW_DIR, 'cars_data_real_needs_review.json'),
+    'Mixed (Old)': os.path.join(RAW_DIR, 'cars_data_api_ready.json'),
+    'Sample (Fake)': os.path.join(RAW_DIR, 'cars_data_sample.json')
 }
 
 print("\n" + "="*60)
@@ -20,17 +27,32 @@ print("="*60 + "\n")
 for name, filepath in files.items():
     if os.path.exists(filepath):
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            count = len(data)
+            stats = DatasetStats(categorical_fields=('brand', 'data_source'))
+            for car in iter_records(filepath):
+                # Missing source is reported as 'unknown'
+                stats.update({'data_source': 'unknown', **car})
+            count = stats.count
             
             # Check data source
-            sources = set(car.get('data_source', 'unknown') for car in data)
+            sources = [s for s, _ in stats.categories['data_source'].top(10)]
             
             print(f"{name:25s}: {count:3d} cars")
             print(f"{'':25s}  Sources: {', '.join(sources)}")
+            
+            prices = stats.numeric['price_numeric']
+            if prices.count:
+                print(
+                    f"{'':25s}  Price: €{prices.min:,.0f} - €{prices.max:,.0f} "
+                    f"(avg €{prices.mean:,.0f}, "
+                    f"median ~€{stats.quantile('price_numeric', 0.5):,.0f})"
+                )
+            
+            brands = stats.categories['brand'].top(3)
+            if brands:
+                print(f"{'':25s}  Top brands: "
+                      + ", ".join(f"{b} ({n})" for b, n in brands))
             print()
-        except:
+        except Exception:
             print(f"{name:25s}: Error reading")
     else:
         print(f"{name:25s}: Not found")
@@ -38,4 +60,4 @@ for name, filepath in files.items():
 print("="*60)
 print("\n✅ Use for production: cars_data_real_api_ready.json")
 print("⚠️ Avoid: cars_data_api_ready.json (mixed data)")
-print("\n" + "="*60 + "\n")
\ No newline at end of file
+print("\n" + "="*60 + "\n")
@@ -0,0 +1,95 @@
+"""
+Incremental retraining of ml_model.joblib
+Fits new trees on new/changed rows only; falls back to a full refit
+when the error on new data degrades past the threshold.
+
+    python scripts/train_incremental.py
+    python scripts/train_incremental.py --full
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "cars_data_real_api_ready.json")
+MODEL_PATH = os.path.join(BASE_DIR, "data", "ml_models", "ml_model.joblib")
+sys.path.append(BASE_DIR)
+
+from app.incremental_training import (
+    DEFAULT_DEGRADE_THRESHOLD,
+    DEFAULT_MAX_TREES,
+    DEFAULT_TREES_PER_UPDATE,
+    TRAINING_STATE_PATH,
+    incremental_train,
+    load_training_state,
+    save_training_state,
+)
+from app.model_bundle import ModelBundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental price model training")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--trees-per-update", type=int, default=DEFAULT_TREES_PER_UPDATE)
+    parser.add_argument("--max-trees", type=int, default=DEFAULT_MAX_TREES)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_DEGRADE_THRESHOLD,
+                        help="relative MAE degradation that forces a full refit")
+    parser.add_argument("--full", action="store_true", help="force a full refit")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🚗 INCREMENTAL PRICE MODEL TRAINING")
+    print("=" * 70)
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        cars = json.load(f)
+
+    bundle = None
+    if os.path.exists(MODEL_PATH):
+        try:
+            bundle = ModelBundle.load(MODEL_PATH)
+        except ValueError as e:
+            print(f"⚠️ {e} -> full refit")
+
+    # Fingerprints only describe the model they were recorded with;
+    # without them we can't tell which rows are new, so refit once
+    # (with the current model's estimator config)
+    force_full = args.full
+    state = load_training_state(TRAINING_STATE_PATH)
+    if bundle is not None and state.get("model_version") != bundle.version:
+        print("⚠️ No training state for the current model -> full refit")
+        force_full = True
+        state = {"fingerprints": {}, "history": state.get("history", [])}
+
+    started = time.perf_counter()
+    bundle, state, report = incremental_train(
+        cars,
+        bundle,
+        state,
+        trees_per_update=args.trees_per_update,
+        max_trees=args.max_trees,
+        degrade_threshold=args.threshold,
+        force_full=force_full,
+    )
+    elapsed = time.perf_counter() - started
+
+    if report["mode"] != "skipped":
+        bundle.save(MODEL_PATH)
+    save_training_state(state, TRAINING_STATE_PATH)
+
+    print(f"Rows: {report['rows']} "
+          f"(new/changed {report['new_or_changed']}, unchanged {report['unchanged']})")
+    print(f"Mode: {report['mode'].upper()} - {report['reason']}")
+    if "drift" in report:
+        print("\n📈 Drift on new rows:")
+        for key, value in report["drift"].items():
+            print(f"  - {key}: {value}")
+    print(f"\n⏱️  {elapsed:.2f}s, model version {bundle.version}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Hyperparameter search for the price model
+Cross-validates forest and gradient boosting configs on all cores
+within a time budget, then picks the best-MAE model that meets the
+p99 single-row latency SLO.
+
+    python scripts/tune_price_model.py --budget 300 --slo-ms 20
+    python scripts/tune_price_model.py --save     # also replace ml_model.joblib
+
+--save fits the selected config on every row and records the training
+state, so scripts/train_incremental.py keeps updating that model.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "cars_data_real_api_ready.json")
+MODEL_PATH = os.path.join(BASE_DIR, "data", "ml_models", "ml_model.joblib")
+REPORT_PATH = os.path.join(BASE_DIR, "data", "ml_models", "search_report.json")
+sys.path.append(BASE_DIR)
+
+from app.incremental_training import (
+    TRAINING_STATE_PATH,
+    build_training_state,
+    full_refit,
+    load_training_state,
+    save_training_state,
+)
+from app.model_bundle import filter_training_records
+from app.model_search import (
+    DEFAULT_BUDGET_SECONDS,
+    DEFAULT_FOLDS,
+    DEFAULT_P99_SLO_MS,
+    build_estimator,
+    prepare_features,
+    search,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price model search")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="wall-clock budget in seconds")
+    parser.add_argument("--slo-ms", type=float, default=DEFAULT_P99_SLO_MS,
+                        help="p99 single-row prediction latency SLO")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--save", action="store_true",
+                        help="train the selected config and save it as the model")
+    args = parser.parse_args()
+
+    print("=" * 90)
+    print("🔎 PRICE MODEL SEARCH")
+    print("=" * 90)
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        cars = json.load(f)
+
+    X, y = prepare_features(cars)
+    report = search(X, y, budget_seconds=args.budget, p99_slo_ms=args.slo_ms,
+                    folds=args.folds, workers=args.workers)
+
+    print(f"{report['configs_completed']}/{report['configs_total']} configs, "
+          f"{report['folds']}-fold CV, {report['workers']} workers"
+          + (" (budget exhausted)" if report["timed_out"] else ""))
+    print("-" * 90)
+    print(f"{'model':60s} {'MAE':>9s} {'p99 ms':>8s} {'size KB':>8s}")
+    for r in report["results"]:
+        p99 = f"{r['p99_ms']:.2f}" if "p99_ms" in r else "-"
+        size = f"{r['size_bytes'] / 1024:.0f}" if "size_bytes" in r else "-"
+        flag = "" if r.get("meets_slo") else "  ✗ SLO"
+        print(f"{r['label'][:60]:60s} {r['cv_mae']:9,.0f} {p99:>8s} {size:>8s}{flag}")
+    print("-" * 90)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Report: {REPORT_PATH}")
+
+    selected = report["selected"]
+    if selected is None:
+        print(f"❌ No config meets the p99 SLO of {args.slo_ms} ms")
+        return 1
+
+    print(f"✅ Selected: {selected['label']} "
+          f"(MAE €{selected['cv_mae']:,.0f}, p99 {selected['p99_ms']} ms)")
+
+    if args.save:
+        complete = filter_training_records(cars)
+        bundle, profile = full_refit(complete, build_estimator(selected["config"]))
+        bundle.metrics["search"] = {
+            "label": selected["label"],
+            "cv_mae": selected["cv_mae"],
+            "p99_ms": selected["p99_ms"],
+            "size_bytes": selected["size_bytes"],
+        }
+        bundle.save(MODEL_PATH)
+
+        entry = {
+            "at": datetime.now().isoformat(),
+            "rows": len(complete),
+            "mode": "full",
+            "reason": f"tuned: {selected['label']}",
+        }
+        save_training_state(
+            build_training_state(complete, bundle, profile,
+                                 load_training_state(TRAINING_STATE_PATH), entry),
+            TRAINING_STATE_PATH,
+        )
+        print(f"💾 Saved {bundle.version} to {MODEL_PATH} (trained on {len(complete)} rows)")
+
+    print("=" * 90)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Append the latest scrape to the listing price history
+
+Input: scrapers/output.json
+Output: data/history/price_history.npz
+
+    python scripts/update_price_history.py                 # append + report
+    python scripts/update_price_history.py --report-only --drop 10 --days 7
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from app.price_history import HISTORY_PATH, PriceHistoryStore
+
+SOURCE_PATH = os.path.join(BASE_DIR, "scrapers", "output.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listing price history")
+    parser.add_argument("--source", default=SOURCE_PATH)
+    parser.add_argument("--report-only", action="store_true",
+                        help="only print recent price drops")
+    parser.add_argument("--drop", type=float, default=10.0,
+                        help="minimum price drop in percent")
+    parser.add_argument("--days", type=float, default=7.0,
+                        help="look-back window in days")
+    args = parser.parse_args()
+
+    store = PriceHistoryStore.load(HISTORY_PATH)
+
+    if not args.report_only:
+        with open(args.source, "r", encoding="utf-8") as f:
+            cars = json.load(f)
+
+        # Scrape time = when the scraper last wrote its output
+        observed_at = datetime.fromtimestamp(os.path.getmtime(args.source))
+        changes = store.append_scrape(cars, observed_at)
+        store.save(HISTORY_PATH)
+
+        print(f"✅ {len(cars)} cars appended, {changes} price/mileage changes")
+        print(f"   {len(store)} listings, {store.event_count} stored events")
+
+    drops = store.price_drops(args.drop, args.days)
+    print(f"\n📉 Price dropped >= {args.drop:g}% in {args.days:g} days: {len(drops)}")
+    for d in drops[:20]:
+        print(f"  - {d['listing_id']}: €{d['price_before']:,} -> "
+              f"€{d['price_now']:,} (-{d['drop_pct']}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from app.ai_calculations import analyze_raw_batch
+from app.main import app
+from app.models import CarAnalysisBatch
+
+GOOD = {
+    "car_title": "Volkswagen Golf",
+    "price": "€ 3,950",
+    "Vehicle_History": {"Mileage": "239,000 km", "First_registration": "11/2015"},
+}
+PRICE_ON_REQUEST = {"car_title": "Audi A4", "price": "Price on request"}
+
+
+def test_unreadable_price_is_a_normalize_error():
+    errors = []
+    results, _ = analyze_raw_batch([GOOD, PRICE_ON_REQUEST], errors)
+
+    assert len(results) == 1
+    assert errors == [{"index": 1, "stage": "normalize",
+                       "error": "ValueError: unreadable price: 'Price on request'"}]
+
+
+def test_unreadable_price_fails_fast():
+    with pytest.raises(ValueError, match="price"):
+        analyze_raw_batch([GOOD, PRICE_ON_REQUEST])
+
+
+def test_unreadable_mileage_is_not_zero_km():
+    errors = []
+    analyze_raw_batch([{**GOOD, "Vehicle_History": {"Mileage": "N/A"}}], errors)
+
+    assert errors[0]["stage"] == "normalize"
+    assert "Mileage" in errors[0]["error"]
+
+
+def test_missing_price_counts_as_zero():
+    results, _ = analyze_raw_batch([{"car_title": "Fiat Panda"}])
+
+    assert results[0]["price_numeric"] == 0
+
+
+def test_analyze_cars_route_strict_modes():
+    client = TestClient(app)
+    batch = [GOOD, PRICE_ON_REQUEST]
+
+    assert client.post("/analyze-cars/", json=batch).status_code == 500
+
+    response = client.post("/analyze-cars/?strict=false", json=batch)
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["index"] for row in body["results"]] == [0]
+    assert body["errors"][0]["index"] == 1
+    assert body["errors"][0]["stage"] == "normalize"
+    CarAnalysisBatch.model_validate(body)
+
+
+def test_analyze_cars_openapi_declares_both_shapes():
+    schema = TestClient(app).get("/openapi.json").json()
+    ok = schema["paths"]["/analyze-cars/"]["post"]["responses"]["200"]
+    refs = [option.get("$ref") or option["items"]["$ref"]
+            for option in ok["content"]["application/json"]["schema"]["anyOf"]]
+
+    assert refs == ["#/components/schemas/CarAnalysis", "#/components/schemas/CarAnalysisBatch"]
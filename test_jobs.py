@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.jobs import DONE, FINISHED, JobManager
+
+GOOD = {
+    "car_title": "Volkswagen Golf",
+    "price": "€ 3,950",
+    "Vehicle_History": {"Mileage": "239,000 km", "First_registration": "11/2015"},
+}
+
+
+def _run_job(manager, cars):
+    job_id, upload_path = manager.create()
+    with open(upload_path, "w", encoding="utf-8") as f:
+        json.dump(cars, f)
+    manager.submit(job_id)
+
+    deadline = time.monotonic() + 30
+    while manager.status(job_id)["state"] not in FINISHED and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return job_id
+
+
+def test_bad_car_becomes_an_error_row(tmp_path):
+    manager = JobManager(str(tmp_path), chunk_size=2)
+    cars = [GOOD, {"Vehicle_History": "n/a"}, GOOD, GOOD, GOOD]
+    try:
+        job_id = _run_job(manager, cars)
+    finally:
+        manager.stop()
+
+    status = manager.status(job_id)
+    assert status["state"] == DONE
+    assert status["processed"] == 5
+    assert status["failed_rows"] == 1
+
+    with open(manager.results_path(job_id), "rb") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 5
+    assert rows[1]["index"] == 1
+    assert rows[1]["stage"] == "normalize"
+    assert rows[2]["title"] == "Volkswagen Golf"
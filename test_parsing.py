@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.parsing import (
+    parse_mileage,
+    parse_number,
+    parse_power_kw,
+    parse_price,
+    parse_year,
+)
+
+
+# The locale table in the app.parsing docstring
+@pytest.mark.parametrize("raw, expected", [
+    ("12,990", 12990.0),
+    ("12.990", 12990.0),
+    ("12 990", 12990.0),
+    ("12'990", 12990.0),
+    ("12.990,50", 12990.5),
+    ("12,990.50", 12990.5),
+    ("3,8", 3.8),
+])
+def test_parse_number_locales(raw, expected):
+    assert parse_number(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("€ 3,950", 3950),
+    ("€ 1,234,567", 1234567),
+    ("€ 12.990,-", 12990),
+    ("12 990 EUR", 12990),
+    ("12 990 €", 12990),
+    ("€ 12,990.00", 12990),
+    # Decimal commas are not thousands separators
+    ("€ 12,50", 12),
+    ("€ 1,00", 1),
+    ("Price on request", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_price(raw, expected):
+    assert parse_price(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("239,000 km", 239000),
+    ("239.000 km", 239000),
+    ("239 000 km", 239000),
+    ("12,5 km", 12),
+    ("N/A", None),
+    ("", None),
+])
+def test_parse_mileage(raw, expected):
+    assert parse_mileage(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("11/2015", 2015),
+    ("2015-11", 2015),
+    (2015, 2015),
+    ("new", None),
+])
+def test_parse_year(raw, expected):
+    assert parse_year(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("55 kW (75 hp)", 55),
+    ("75 hp", 55),
+    ("n/a", None),
+])
+def test_parse_power_kw(raw, expected):
+    assert parse_power_kw(raw) == expected
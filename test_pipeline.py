@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+import run_pipeline
+from run_pipeline import (
+    BASE_DIR,
+    STAGES,
+    Stage,
+    hash_inputs,
+    is_up_to_date,
+    output_hashes,
+    select_stages,
+    stage_argv,
+)
+
+
+def _stage(name):
+    return next(s for s in STAGES if s.name == name)
+
+
+def test_stage_args_are_passed_verbatim():
+    argv = stage_argv(_stage("publish"))
+
+    assert argv[1] == os.path.join(BASE_DIR, "scripts", "model_registry.py")
+    assert argv[2:] == ["publish", "--activate"]
+
+
+def test_publish_stage_argv_parses():
+    from model_registry import MODEL_PATH, build_parser
+
+    args = build_parser().parse_args(stage_argv(_stage("publish"))[2:])
+
+    assert args.command == "publish"
+    assert args.activate is True
+    assert args.path == MODEL_PATH
+
+
+def test_train_stage_is_keyed_on_cleaned_data():
+    stages = select_stages(None, with_scrape=False)
+    train = next(s for s in stages if s.name == "train")
+
+    assert "clean" in train.depends_on
+
+
+@pytest.fixture
+def built_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_pipeline, "BASE_DIR", str(tmp_path))
+    for name in ("in.txt", "a.out", "b.out"):
+        (tmp_path / name).write_text(name)
+
+    stage = Stage(name="build", command=["build.py"], inputs=["in.txt"],
+                  outputs=["a.out", "b.out"])
+    state = {"build": {"input_hash": hash_inputs(stage), "outputs": output_hashes(stage)}}
+    return tmp_path, stage, state
+
+
+def test_stage_up_to_date_when_outputs_match(built_stage):
+    _, stage, state = built_stage
+
+    assert is_up_to_date(stage, state)
+
+
+def test_stage_reruns_when_an_output_is_missing(built_stage):
+    tmp_path, stage, state = built_stage
+    (tmp_path / "b.out").unlink()
+
+    assert not is_up_to_date(stage, state)
+
+
+def test_stage_reruns_when_an_output_changed(built_stage):
+    tmp_path, stage, state = built_stage
+    (tmp_path / "a.out").write_text("edited")
+
+    assert not is_up_to_date(stage, state)
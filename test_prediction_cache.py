@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.prediction_cache import PredictionCache
+
+
+def test_stale_model_writes_are_dropped():
+    cache = PredictionCache(maxsize=10)
+    cache.ensure_version("v1")
+    # A model swap lands while the v1 request is predicting
+    cache.ensure_version("v2")
+    cache.put_many([("a",)], [1000.0], "v1")
+
+    assert cache.get_many([("a",)], "v2") == [None]
+    assert cache.stats()["size"] == 0
+
+
+def test_stale_model_reads_miss():
+    cache = PredictionCache(maxsize=10)
+    cache.ensure_version("v2")
+    cache.put_many([("a",)], [2000.0], "v2")
+
+    assert cache.get_many([("a",)], "v1") == [None]
+    assert cache.get_many([("a",)], "v2") == [2000.0]
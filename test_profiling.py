@@ -0,0 +1,50 @@
+import contextvars
+import os
+import pstats
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.main import app
+from app.profiling import ProfileSession, ProfilingMiddleware, StackSampler, follow_request
+
+
+def test_cprofile_follows_top_deals_into_worker_threads(tmp_path):
+    profiled = ProfilingMiddleware(app, token="secret", mode="cprofile", directory=str(tmp_path))
+    client = TestClient(profiled)
+
+    response = client.get("/cars/top-deals?limit=7", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+
+    path = tmp_path / (response.headers["x-profile-id"] + ".pstats")
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert "_top_deals_body" in functions
+
+
+def _slow_worker_call():
+    time.sleep(0.2)
+
+
+def test_sampler_follows_wrapped_worker_calls():
+    session = ProfileSession("sample")
+    sampler = StackSampler(session.thread_ids, interval=0.005)
+    sampler.start()
+
+    token = profiling._session.set(session)
+    try:
+        worker = threading.Thread(
+            target=contextvars.copy_context().run, args=(follow_request(_slow_worker_call),)
+        )
+        worker.start()
+        worker.join()
+    finally:
+        profiling._session.reset(token)
+        sampler.stop()
+
+    assert "_slow_worker_call" in sampler.folded()
+    assert session.thread_ids == {threading.get_ident()}